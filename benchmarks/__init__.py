@@ -0,0 +1,3 @@
+"""
+Measurements for the performance of the HTTP clients.
+"""
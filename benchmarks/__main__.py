@@ -0,0 +1,100 @@
+"""
+Runs the benchmark suite against a local McM stand-in.
+
+Usage:
+    python -m benchmarks --output results.json
+    python -m benchmarks --output results.json --compare baseline.json
+    python -m benchmarks --input results.json --compare baseline.json
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Union
+
+from benchmarks import workloads  # noqa: F401 - Registers the benchmarks
+from benchmarks.suite import (
+    BENCHMARKS,
+    Config,
+    compare,
+    format_comparison,
+    format_results,
+    load,
+    run_suite,
+    save,
+)
+
+
+def main() -> Union[int, None]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", type=Path, help="Store the results in this file")
+    parser.add_argument(
+        "--input", type=Path, help="Load the results from this file instead of running"
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="Compare the results with this baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown considered a regression (default: 0.1)",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        choices=sorted(BENCHMARKS),
+        help="Benchmark to run, it can be repeated (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server delay (s)")
+    parser.add_argument("--roots", type=int, default=10, help="Roots per workflow")
+    parser.add_argument("--chains", type=int, default=2, help="Chains per root")
+    parser.add_argument("--requests", type=int, default=2000, help="Search size")
+    parser.add_argument("--calls", type=int, default=500, help="Calls per sample")
+    args = parser.parse_args()
+
+    if args.input:
+        results = load(args.input)
+    else:
+        config = Config(
+            repeat=args.repeat,
+            latency=args.latency,
+            roots=args.roots,
+            chains=args.chains,
+            requests=args.requests,
+            calls=args.calls,
+        )
+
+        # The clients log every step, and the workflows create log files
+        # in the working directory: keep them out of the way.
+        logging.disable(logging.WARNING)
+        current_directory = Path.cwd()
+        with tempfile.TemporaryDirectory() as folder:
+            os.chdir(folder)
+            try:
+                results = run_suite(config=config, selected=args.benchmark)
+            finally:
+                os.chdir(current_directory)
+                logging.disable(logging.NOTSET)
+
+    if args.output:
+        save(results, args.output)
+    print(format_results(results))
+
+    if args.compare:
+        comparison = compare(
+            baseline=load(args.compare), current=results, threshold=args.threshold
+        )
+        print()
+        print(format_comparison(comparison))
+        if any(entry["regression"] for entry in comparison):
+            return 1
+    return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Measures the time to import the package using
+`python -X importtime` and fails if it exceeds a budget.
+
+Usage:
+    python -m benchmarks.imports --statement "from rest import McM" --budget 50
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Union
+
+
+def _run_importtime(statement: str) -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+    times: dict[str, tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def import_times(statement: str) -> dict[str, tuple[int, int]]:
+    """
+    Runs the statement in a new interpreter and parses its
+    `-X importtime` report. The modules loaded by the interpreter
+    at startup (e.g. `site`) are excluded.
+
+    Returns:
+        Self and cumulative import time, in microseconds, per module.
+    """
+    startup = _run_importtime(statement="pass")
+    times = _run_importtime(statement=statement)
+    return {module: timing for module, timing in times.items() if module not in startup}
+
+
+def total_time(times: dict[str, tuple[int, int]]) -> int:
+    """
+    Total import time in microseconds.
+    """
+    return sum(self_us for self_us, _ in times.values())
+
+
+def main() -> Union[int, None]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--statement", default="import rest", help="Code to time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument(
+        "--budget", type=float, default=None, help="Maximum import time (ms)"
+    )
+    args = parser.parse_args()
+
+    times = import_times(statement=args.statement)
+    total_ms = total_time(times) / 1000
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)
+
+    print(f"{args.statement!r}: {total_ms:.2f} ms, {len(times)} modules")
+    for module, (_, cumulative_us) in slowest[: args.top]:
+        print(f"  {cumulative_us / 1000:8.2f} ms  {module}")
+
+    if args.budget is not None and total_ms > args.budget:
+        print(f"Import time exceeds the budget ({args.budget:.2f} ms)")
+        return 1
+    return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
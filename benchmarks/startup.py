@@ -0,0 +1,68 @@
+"""
+Measures how long it takes to create a client, with and
+without deferring the authentication until the first request.
+
+Usage:
+    python -m benchmarks.startup --app mcm --id oidc --dev
+"""
+
+import argparse
+import statistics
+import time
+from typing import Union
+
+from rest.applications.base import BaseClient
+
+
+def measure(
+    app: str, id: str, dev: bool, cookie: Union[str, None], lazy: bool, repeat: int
+) -> dict[str, float]:
+    """
+    Creates and closes the client several times.
+
+    Returns:
+        Median time, in seconds, to create the client and to configure
+        its HTTP session.
+    """
+    creation: list[float] = []
+    setup: list[float] = []
+    for _ in range(repeat):
+        start = time.monotonic()
+        client = BaseClient(app=app, id=id, dev=dev, cookie=cookie, lazy=lazy)
+        creation.append(time.monotonic() - start)
+        client.close()
+        setup.append(client.session_setup_time or 0.0)
+
+    return {
+        "creation": statistics.median(creation),
+        "session_setup": statistics.median(setup),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default="mcm", help="Target application")
+    parser.add_argument("--id", default="none", help="Authentication mechanism")
+    parser.add_argument("--dev", action="store_true", help="Use the dev instance")
+    parser.add_argument("--cookie", default=None, help="Credential's path")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of samples")
+    args = parser.parse_args()
+
+    for lazy in (False, True):
+        result = measure(
+            app=args.app,
+            id=args.id,
+            dev=args.dev,
+            cookie=args.cookie,
+            lazy=lazy,
+            repeat=args.repeat,
+        )
+        print(
+            f"{'lazy' if lazy else 'eager':<6} "
+            f"creation: {result['creation'] * 1000:8.2f} ms  "
+            f"session setup: {result['session_setup'] * 1000:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
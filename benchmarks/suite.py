@@ -0,0 +1,206 @@
+"""
+Runs the registered benchmarks, stores their results
+as JSON and compares them with a previous execution.
+"""
+
+import json
+import platform
+import statistics
+import sys
+import time
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import Callable, Union
+
+# A benchmark prepares its fixtures (e.g. a stand-in server) and provides
+# the operation to time. The operation returns the number of operations it
+# performed (e.g. calls or documents), to compute the throughput.
+Setup = Callable[["Config"], AbstractContextManager[Callable[[], int]]]
+
+
+class Config:
+    """
+    Parameters shared by all the benchmarks.
+
+    Attributes:
+        repeat: Number of samples per benchmark.
+        latency: Delay, in seconds, added by the stand-in server to every response.
+        roots: Number of root requests processed by the workflow benchmarks.
+        chains: Number of chained requests per root request.
+        requests: Approximate number of requests walked by the search benchmarks.
+        calls: Number of calls for the per-call overhead benchmarks.
+    """
+
+    def __init__(
+        self,
+        repeat: int = 5,
+        latency: float = 0.0,
+        roots: int = 10,
+        chains: int = 2,
+        requests: int = 2000,
+        calls: int = 500,
+    ):
+        self.repeat = repeat
+        self.latency = latency
+        self.roots = roots
+        self.chains = chains
+        self.requests = requests
+        self.calls = calls
+
+    def to_dict(self) -> dict[str, Union[int, float]]:
+        return dict(vars(self))
+
+
+class Benchmark:
+    """
+    A measurement registered in the suite.
+
+    Attributes:
+        name: Unique name, used to compare executions.
+        description: What is measured.
+        setup: Prepares the fixtures and provides the operation to time.
+    """
+
+    def __init__(self, name: str, description: str, setup: Setup):
+        self.name = name
+        self.description = description
+        self.setup = setup
+
+    def run(self, config: Config) -> dict[str, Union[str, int, float, list[float]]]:
+        """
+        Times the operation `config.repeat` times, using new fixtures
+        for every sample.
+
+        Returns:
+            Samples, in seconds, and their summary.
+        """
+        samples: list[float] = []
+        operations = 0
+        for _ in range(config.repeat):
+            with self.setup(config) as operation:
+                start = time.perf_counter()
+                operations = operation()
+                samples.append(time.perf_counter() - start)
+
+        median = statistics.median(samples)
+        return {
+            "description": self.description,
+            "samples": samples,
+            "min": min(samples),
+            "median": median,
+            "mean": statistics.mean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "operations": operations,
+            "operations_per_second": operations / median if median else 0.0,
+        }
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, description: str) -> Callable[[Setup], Setup]:
+    """
+    Registers a benchmark in the suite.
+    """
+
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = Benchmark(name=name, description=description, setup=setup)
+        return setup
+
+    return register
+
+
+def run_suite(config: Config, selected: Union[list[str], None] = None) -> dict:
+    """
+    Runs the registered benchmarks.
+
+    Args:
+        config: Parameters for the benchmarks.
+        selected: Names of the benchmarks to run, all if not provided.
+
+    Returns:
+        The execution metadata and the results per benchmark.
+    """
+    names = selected or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {sorted(unknown)}")
+
+    results = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = BENCHMARKS[name].run(config)
+
+    return {
+        "metadata": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": config.to_dict(),
+        },
+        "benchmarks": results,
+    }
+
+
+def save(results: dict, path: Path) -> None:
+    path.write_text(json.dumps(results, indent=4), encoding="utf-8")
+
+
+def load(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = 0.1
+) -> list[dict[str, Union[str, float, bool]]]:
+    """
+    Compares the median time of the benchmarks included in both executions.
+
+    Args:
+        baseline: Results of the reference execution.
+        current: Results of the execution to check.
+        threshold: Relative slowdown considered a regression, e.g. 0.1 for 10%.
+
+    Returns:
+        One entry per benchmark with the median times, the relative
+        change and whether it is a regression.
+    """
+    comparison = []
+    for name, result in current["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if not reference:
+            continue
+
+        before, after = reference["median"], result["median"]
+        change = (after - before) / before if before else 0.0
+        comparison.append(
+            {
+                "name": name,
+                "baseline": before,
+                "current": after,
+                "change": change,
+                "regression": change > threshold,
+            }
+        )
+    return comparison
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'Benchmark':<36} {'Median (ms)':>12} {'Min (ms)':>10} {'Ops/s':>10}"]
+    for name, result in results["benchmarks"].items():
+        lines.append(
+            f"{name:<36} {result['median'] * 1000:>12.2f} "
+            f"{result['min'] * 1000:>10.2f} {result['operations_per_second']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(comparison: list[dict]) -> str:
+    lines = [f"{'Benchmark':<36} {'Before (ms)':>12} {'After (ms)':>12} {'Change':>8}"]
+    for entry in comparison:
+        flag = "  REGRESSION" if entry["regression"] else ""
+        lines.append(
+            f"{entry['name']:<36} {entry['baseline'] * 1000:>12.2f} "
+            f"{entry['current'] * 1000:>12.2f} {entry['change']:>+8.1%}{flag}"
+        )
+    return "\n".join(lines)
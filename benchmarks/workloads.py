@@ -0,0 +1,249 @@
+"""
+Benchmarks for the client hot paths and the orchestration
+workflows, run against the local McM stand-in.
+"""
+
+import json
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import requests
+
+from benchmarks.suite import Config, benchmark
+from rest.applications.mcm.core import McM
+from rest.applications.mcm.invalidate_request import InvalidateDeleteRequests
+from rest.applications.mcm.resubmission import ChainRequestResubmitter
+from rest.client.codec import JSONCodec, OrjsonCodec, orjson
+from rest.testing.mcm_server import CAMPAIGNS, McMDataset, McMServer
+
+
+@contextmanager
+def _stand_in(config: Config, **dataset_options) -> Iterator[McMServer]:
+    dataset = McMDataset.generate(seed=0, **dataset_options)
+    with McMServer(dataset=dataset, latency=config.latency) as server:
+        yield server
+
+
+def _roots(server: McMServer) -> list[str]:
+    return [
+        request["prepid"]
+        for request in server.dataset.search(
+            "requests", {"member_of_campaign": CAMPAIGNS[0]}
+        )
+    ]
+
+
+@benchmark(
+    name="session_request_plain",
+    description="Per-call cost of a plain requests.Session, the baseline",
+)
+@contextmanager
+def session_request_plain(config: Config) -> Iterator[Callable[[], int]]:
+    with _stand_in(config, root_requests=1) as server, requests.Session() as session:
+        url = f"{server.url}restapi/users/get_role"
+
+        def operation() -> int:
+            for _ in range(config.calls):
+                session.get(url)
+            return config.calls
+
+        yield operation
+
+
+@benchmark(
+    name="session_request_authenticated",
+    description="Per-call cost of AuthenticatedSession.request using an access token",
+)
+@contextmanager
+def session_request_authenticated(config: Config) -> Iterator[Callable[[], int]]:
+    with _stand_in(config, root_requests=1) as server:
+        with tempfile.TemporaryDirectory() as folder:
+            credential = Path(folder) / "credential"
+            credential.write_text(
+                json.dumps(
+                    {
+                        "access_token": "benchmark-token",
+                        "expires_in": 3600,
+                        "obtained_at": time.time(),
+                    }
+                ),
+                encoding="utf-8",
+            )
+            mcm = McM(
+                id=McM.OAUTH,
+                cookie=str(credential),
+                client_id="benchmark",
+                client_secret="benchmark",
+                server=server.url,
+            )
+            url = f"{server.url}restapi/users/get_role"
+
+            def operation() -> int:
+                for _ in range(config.calls):
+                    mcm.session.request("GET", url)
+                return config.calls
+
+            with mcm:
+                yield operation
+
+
+def _paginated_get(page_size: object) -> Callable:
+    @contextmanager
+    def setup(config: Config) -> Iterator[Callable[[], int]]:
+        roots = max(config.requests // len(CAMPAIGNS), 1)
+        with _stand_in(
+            config, root_requests=roots, min_chain_length=len(CAMPAIGNS)
+        ) as server:
+            with McM(id="none", server=server.url) as mcm:
+
+                def operation() -> int:
+                    return len(
+                        mcm.get("requests", query="prepid=*", page_size=page_size)
+                    )
+
+                yield operation
+
+    return setup
+
+
+benchmark(
+    name="mcm_get_paginated",
+    description="Documents per second walking a search with the default page size",
+)(_paginated_get(page_size=McM.PAGE_SIZE))
+
+benchmark(
+    name="mcm_get_paginated_adaptive",
+    description="Documents per second walking a search with an adaptive page size",
+)(_paginated_get(page_size=McM.ADAPTIVE))
+
+
+def _decode_search_page(codec: JSONCodec) -> Callable:
+    @contextmanager
+    def setup(config: Config) -> Iterator[Callable[[], int]]:
+        roots = max(config.requests // len(CAMPAIGNS), 1)
+        dataset = McMDataset.generate(
+            seed=0, root_requests=roots, min_chain_length=len(CAMPAIGNS)
+        )
+        documents = dataset.search("requests", {})
+        content = json.dumps({"results": documents}).encode("utf-8")
+
+        def operation() -> int:
+            decoded = 0
+            for _ in range(10):
+                decoded += len(codec.decode(content)["results"])
+            return decoded
+
+        yield operation
+
+    return setup
+
+
+benchmark(
+    name="decode_search_page_json",
+    description="Documents per second decoding a search page with the standard library",
+)(_decode_search_page(codec=JSONCodec()))
+
+if orjson is not None:
+    benchmark(
+        name="decode_search_page_orjson",
+        description="Documents per second decoding a search page with orjson",
+    )(_decode_search_page(codec=OrjsonCodec()))
+
+
+@benchmark(
+    name="get_range_of_requests",
+    description="Documents per second listing every request by prepid and ranges",
+)
+@contextmanager
+def get_range_of_requests(config: Config) -> Iterator[Callable[[], int]]:
+    roots = max(config.requests // len(CAMPAIGNS), 1)
+    with _stand_in(
+        config, root_requests=roots, min_chain_length=len(CAMPAIGNS)
+    ) as server:
+        # Every root by its prepid and the other steps as ranges
+        lines = _roots(server)
+        for campaign in CAMPAIGNS[1:]:
+            prepids = [
+                request["prepid"]
+                for request in server.dataset.search(
+                    "requests", {"member_of_campaign": campaign}
+                )
+            ]
+            by_pwg: dict[str, list[str]] = {}
+            for prepid in prepids:
+                by_pwg.setdefault(prepid.split("-", 1)[0], []).append(prepid)
+            lines += [f"{group[0]} -> {group[-1]}" for group in by_pwg.values()]
+        query = "\n".join(lines)
+
+        with McM(id="none", server=server.url) as mcm:
+
+            def operation() -> int:
+                return len(mcm.get_range_of_requests(query))
+
+            yield operation
+
+
+def _invalidate_delete_cascade(workers: int) -> Callable:
+    @contextmanager
+    def setup(config: Config) -> Iterator[Callable[[], int]]:
+        with _stand_in(
+            config,
+            root_requests=config.roots,
+            chains_per_root=config.chains,
+            min_chain_length=len(CAMPAIGNS),
+        ) as server:
+            with McM(id="none", server=server.url, pool_maxsize=workers) as mcm:
+                invalidator = InvalidateDeleteRequests(mcm=mcm)
+                roots = _roots(server)
+
+                def operation() -> int:
+                    result = invalidator.invalidate_delete_cascade_requests(
+                        requests_prepid=roots, workers=workers
+                    )
+                    if len(result["success"]) != len(roots):
+                        raise RuntimeError(
+                            f"Some root requests failed: {result['failed']}"
+                        )
+                    return len(roots)
+
+                yield operation
+
+    return setup
+
+
+benchmark(
+    name="invalidate_delete_cascade",
+    description="Root requests per second processed by invalidate_delete_cascade_requests",
+)(_invalidate_delete_cascade(workers=1))
+
+benchmark(
+    name="invalidate_delete_cascade_parallel",
+    description="Root requests per second processed by invalidate_delete_cascade_requests with 4 workers",
+)(_invalidate_delete_cascade(workers=4))
+
+
+@benchmark(
+    name="resubmit_chain_request",
+    description="Root requests per second processed by resubmit_chain_request",
+)
+@contextmanager
+def resubmit_chain_request(config: Config) -> Iterator[Callable[[], int]]:
+    with _stand_in(
+        config,
+        root_requests=config.roots,
+        chains_per_root=config.chains,
+        min_chain_length=len(CAMPAIGNS),
+    ) as server:
+        with McM(id="none", server=server.url) as mcm:
+            resubmitter = ChainRequestResubmitter(mcm=mcm)
+            roots = _roots(server)
+
+            def operation() -> int:
+                for root in roots:
+                    resubmitter.resubmit_chain_request(root_request_prepid=root)
+                return len(roots)
+
+            yield operation
@@ -18,10 +18,13 @@ def run_wmpriority(workflow, priority):
 
 if __name__ == "__main__":
     list_of_requests = ["B2G-PhaseIISpr18AODMiniAOD-00054"]
-    for prepid in list_of_requests:
-        # Get request we want to change:
-        request = mcm.get("requests", prepid, method="get")
-        assert isinstance(request, dict)
+
+    # Get the requests we want to change, they are processed as they arrive.
+    for prepid, request in mcm.iter_many("requests", list_of_requests):
+        if not isinstance(request, dict):
+            print("Unable to retrieve %s: %s" % (prepid, request))
+            continue
+
         workflow: str = request["reqmgr_name"][-1]["name"]
 
         # Run actual priority change
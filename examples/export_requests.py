@@ -0,0 +1,19 @@
+"""
+Exports all the requests of a campaign to a JSON Lines file.
+Documents are written as the search pages arrive, so the
+memory usage does not depend on the number of requests.
+"""
+
+import json
+
+from rest import McM
+
+mcm = McM(id=McM.OIDC, dev=True, page_size=McM.ADAPTIVE)
+
+if __name__ == "__main__":
+    campaign = "Run3Summer22GS"
+    with open(f"{campaign}.jsonl", mode="w", encoding="utf-8") as f:
+        for request in mcm.iter_search(
+            "requests", query=f"member_of_campaign={campaign}"
+        ):
+            f.write(json.dumps(request) + "\n")
@@ -2,9 +2,49 @@
 Exposes the REST client for the McM application
 like the old structure used to do.
 Just to keep backward compatibility.
+
+The clients are imported the first time they are accessed, so that
+importing the package does not load every application and its
+dependencies (e.g. `requests`).
 """
 
-from rest.applications.base import BaseClient
-from rest.applications.mcm.core import McM
-from rest.applications.stats.core import Stats2
-from rest.applications.rereco.core import ReReco
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from rest.applications.aio import AsyncMcM, AsyncReReco, AsyncStats2
+    from rest.applications.base import BaseClient
+    from rest.applications.mcm.core import McM
+    from rest.applications.rereco.core import ReReco
+    from rest.applications.stats.core import Stats2
+
+# Public name -> Module defining it
+_LAZY_ATTRIBUTES = {
+    "BaseClient": "rest.applications.base",
+    "McM": "rest.applications.mcm.core",
+    "Stats2": "rest.applications.stats.core",
+    "ReReco": "rest.applications.rereco.core",
+    "AsyncMcM": "rest.applications.aio",
+    "AsyncStats2": "rest.applications.aio",
+    "AsyncReReco": "rest.applications.aio",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # `importlib.import_module` runs the requested module's import in Python,
+    # where `python -X importtime` does not report it, only the modules it
+    # imports. `__import__` keeps it in the report, see `benchmarks/imports.py`.
+    module = __import__(module_name, fromlist=[name])
+    value = getattr(module, name)
+    # Cache it, later lookups skip this function.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,199 @@
+"""
+Asyncio flavour of the REST clients.
+Calls are dispatched to a bounded pool of worker threads
+sharing the same credentials, so that thousands of them
+can be awaited from a single event loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Union
+
+import requests
+
+from rest.applications.base import BaseClient
+from rest.applications.mcm.core import McM
+from rest.applications.rereco.core import ReReco
+from rest.applications.stats.core import Stats2
+
+
+class AsyncBaseClient:
+    """
+    Wraps a synchronous client and exposes all its methods
+    as coroutines. For instance, `await AsyncMcM().get("requests", prepid)`
+    behaves like `McM().get("requests", prepid)`. Generator methods, like
+    `iter_many`, become asynchronous iterators and the methods returning a
+    context manager, like `deadline`, are called as they are.
+
+    Attributes:
+        client: Synchronous client performing the HTTP requests. Its
+            authentication handlers are reused, each worker thread sends
+            the requests through its own HTTP session.
+        max_concurrency: Maximum number of requests in flight at the same time.
+            The remaining calls wait in a queue until a worker is available.
+    """
+
+    # Methods returning a context manager, they do not send any request.
+    PASSTHROUGH = ("deadline",)
+
+    def __init__(self, client: BaseClient, max_concurrency: int = 32):
+        if max_concurrency < 1:
+            raise ValueError("At least one concurrent request must be allowed")
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.logger = client.logger
+        self.server = client.server
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix=f"pdmv-http-client-{client._app}",
+        )
+        self._sessions: list[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+    def _in_worker(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executes a call in a worker thread, using its own HTTP session like
+        the workers of the synchronous pools, so that the worker threads
+        do not share a cookie jar or a connection pool. The session is
+        forked on the first call, so that a failure setting it up is only
+        reported to that call.
+        """
+        if getattr(self.client._local, "session", None) is None:
+            session = self.client._fork_session()
+            with self._sessions_lock:
+                self._sessions.append(session)
+            self.client._local.session = session
+        return func(*args, **kwargs)
+
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executes a blocking call in the worker pool and waits for its result.
+        The call runs in a copy of the current context, so that a deadline
+        set by the coroutine applies to it.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(context.run, self._in_worker, func, *args, **kwargs),
+        )
+
+    async def _iterate(self, iterator: Iterator) -> AsyncIterator:
+        """
+        Consumes a blocking iterator in the worker pool, one item at a time.
+        The iterator is closed in the worker pool as well if the iteration
+        is abandoned.
+        """
+        sentinel = object()
+        try:
+            while True:
+                item = await self._run(next, iterator, sentinel)
+                if item is sentinel:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                # The worker pool could be closed already if the iteration was abandoned
+                await asyncio.get_running_loop().run_in_executor(None, close)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.client, name)
+        if not callable(attribute) or name in self.PASSTHROUGH:
+            return attribute
+
+        if inspect.isgeneratorfunction(attribute):
+
+            @functools.wraps(attribute)
+            def iterate(*args, **kwargs):
+                return self._iterate(attribute(*args, **kwargs))
+
+            return iterate
+
+        @functools.wraps(attribute)
+        async def coroutine(*args, **kwargs):
+            return await self._run(attribute, *args, **kwargs)
+
+        return coroutine
+
+    def close(self) -> None:
+        """
+        Waits for the pending calls and closes the HTTP session.
+        """
+        self._executor.shutdown(wait=True)
+        for session in self._sessions:
+            session.close()
+        self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __repr__(self):
+        return f"<Async {self.client!r} max concurrency: {self.max_concurrency}>"
+
+
+class AsyncMcM(AsyncBaseClient):
+    """
+    Asyncio HTTP client for querying McM.
+    It accepts the same arguments as `McM`. The HTTP session is
+    set up by the first call, in the worker pool, so that the
+    authentication does not block the event loop.
+    """
+
+    client: McM
+
+    def __init__(self, max_concurrency: int = 32, **kwargs):
+        kwargs.setdefault("lazy", True)
+        super().__init__(client=McM(**kwargs), max_concurrency=max_concurrency)
+
+    def iter_search(
+        self, object_type: str, query: str, page_size: Union[int, str, None] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Runs a search and yields its results as the pages arrive.
+        See `McM.iter_search`.
+        """
+        pages = self.client._search_pages(
+            object_type=object_type.strip(),
+            query=query,
+            page_size=page_size or self.client.page_size,
+        )
+        return self._flatten(self._iterate(pages))
+
+    @staticmethod
+    async def _flatten(pages: AsyncIterator[list[dict]]) -> AsyncIterator[dict]:
+        async for page_results in pages:
+            for document in page_results:
+                yield document
+
+
+class AsyncStats2(AsyncBaseClient):
+    """
+    Asyncio HTTP client for querying Stats2.
+    It accepts the same arguments as `Stats2`. The HTTP session is
+    set up by the first call, in the worker pool.
+    """
+
+    def __init__(self, max_concurrency: int = 32, **kwargs):
+        kwargs.setdefault("lazy", True)
+        super().__init__(client=Stats2(**kwargs), max_concurrency=max_concurrency)
+
+
+class AsyncReReco(AsyncBaseClient):
+    """
+    Asyncio HTTP client for querying ReReco.
+    It accepts the same arguments as `ReReco`. The HTTP session is
+    set up by the first call, in the worker pool.
+    """
+
+    def __init__(self, max_concurrency: int = 32, **kwargs):
+        kwargs.setdefault("lazy", True)
+        super().__init__(client=ReReco(**kwargs), max_concurrency=max_concurrency)
@@ -4,13 +4,35 @@ This sets the default schema for creating a HTTP client
 object for PdmV applications.
 """
 
+import functools
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager, contextmanager
+from copy import deepcopy
 from pathlib import Path
-from typing import Union
+from typing import Any, Callable, Iterator, Union
 
 import requests
 
-from rest.client.session import SessionFactory
+from rest.applications.pagination import Paginator
+from rest.client.auth.refresher import CredentialRefresher
+from rest.client.cache import PersistentResponseCache, ResponseCache
+from rest.client.codec import JSONCodec, default_codec
+from rest.client.deadline import (
+    DEFAULT_TIMEOUT,
+    ContextThreadPoolExecutor,
+    Timeout,
+    check,
+    deadline,
+    timeout_for,
+    without_read_timeout,
+)
+from rest.client.metrics import MetricsRegistry
+from rest.client.retry import RetryPolicy
+from rest.client.session import AuthenticatedSession, SessionFactory
+from rest.client.throttling import RateLimiter
 from rest.utils.logger import LoggerFactory
 from rest.utils.shell import describe_platform
 
@@ -35,6 +57,22 @@ class BaseClient:
         dev: bool = True,
         client_id: str = "",
         client_secret: str = "",
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+        page_prefetch: int = 4,
+        cache: Union[ResponseCache, None] = None,
+        persistent_cache: bool = False,
+        refresh_credentials: bool = False,
+        lazy: bool = False,
+        metrics: Union[MetricsRegistry, None] = None,
+        server: Union[str, None] = None,
+        rate_limit: Union[float, None] = None,
+        rate_burst: Union[int, None] = None,
+        adaptive_concurrency: bool = False,
+        retry: Union[RetryPolicy, None] = None,
+        timeout: Union[Timeout, None] = DEFAULT_TIMEOUT,
+        codec: Union[JSONCodec, None] = None,
     ):
         """
         Initializes the HTTP client session configuring the
@@ -67,6 +105,47 @@ class BaseClient:
                 is the client ID for requesting an access token.
             client_secret: This is an optional argument only used if `id = OAUTH`, this
                 is the client secret for requesting an access token.
+            pool_connections: Number of per-host connection pools kept by the session.
+            pool_maxsize: Maximum number of connections kept alive per host.
+                Raise it if the client is shared by several threads.
+            keep_alive: Keep the TCP/TLS connections open across requests so that
+                later calls skip the handshake.
+            page_prefetch: Maximum number of pages requested at the same time
+                when walking a paginated search. Use 1 to fetch them sequentially.
+            cache: Cache for the responses of read-only requests, e.g. retrieving
+                a document by its ID. Disabled by default.
+            persistent_cache: If no `cache` is provided, persist the responses
+                in a SQLite database next to the credential's file so that
+                later executions only transfer the documents that changed.
+            refresh_credentials: Renew the OAuth2/OIDC tokens in a background
+                thread before they expire, instead of waiting for a request
+                to be rejected.
+            lazy: Defer the authentication and the HTTP session setup
+                until the first request is sent. Clients that are created
+                but never used skip it completely.
+            metrics: Registry to record the latency, payload size and
+                outcome of the requests per endpoint. Disabled by default.
+            server: Base URL of the web application, e.g. a local stand-in
+                like `http://127.0.0.1:8000/mcm/`. If provided, `dev` is ignored.
+            rate_limit: Maximum number of requests per second sent to the
+                web application. The limit is shared by all the clients
+                targeting the same server in this process.
+            rate_burst: Number of requests that could be sent back to back
+                before `rate_limit` applies. By default, one second worth of them.
+            adaptive_concurrency: Limit the number of requests in flight to the
+                web application, adjusting the limit from the observed latency
+                and throttling responses (HTTP 429/5xx). Shared like `rate_limit`.
+            retry: Policy to retry the idempotent requests that fail due to
+                transient errors, e.g. `RetryPolicy.default()`. Disabled by default.
+            timeout: Seconds to wait for the connection and for the server
+                to send data, as a `(connect, read)` pair or a single number
+                for both. None waits forever. The read timeout only applies
+                to the requests to read-only resources, the ones changing data
+                (e.g. injecting a request) could take several minutes and
+                they are not retried. See also `deadline`.
+            codec: Encodes the request bodies and decodes the responses.
+                By default, `orjson` if it is installed or the standard
+                library otherwise.
         """
         self._app = app
         self._id = id
@@ -75,11 +154,78 @@ class BaseClient:
         self._dev = dev
         self._client_id = client_id
         self._client_secret = client_secret
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+        self._page_prefetch = page_prefetch
+        self._refresh_credentials = refresh_credentials
 
         self.logger = LoggerFactory.getLogger(f"pdmv-http-client.{self._app}")
-        self.server = self._target_web_application()
+        self.server = server or self._target_web_application()
+        self.cache = cache
+        self.metrics = metrics
+        self.retry = retry
+        self.timeout = timeout
+        self.codec = codec or default_codec()
+        self.rate_limiter: Union[RateLimiter, None] = None
+        if rate_limit or adaptive_concurrency:
+            self.rate_limiter = RateLimiter.for_server(
+                self.server,
+                requests_per_second=rate_limit,
+                burst=rate_burst,
+                adaptive=adaptive_concurrency,
+            )
+        self._owned_cache: Union[PersistentResponseCache, None] = None
+        if self.cache is None and persistent_cache:
+            self._owned_cache = PersistentResponseCache(
+                path=self._cache_path(), codec=self.codec
+            )
+            self.cache = self._owned_cache
         self.credentials_path: Union[Path, None] = None
-        self.session = self._create_session()
+        self.session_setup_time: Union[float, None] = None
+        self._session: Union[requests.Session, None] = None
+        self._session_lock = threading.Lock()
+        self._local = threading.local()
+        self._page_pool: Union[ThreadPoolExecutor, None] = None
+        self._page_pool_sessions: list[requests.Session] = []
+        self._refresher: Union[CredentialRefresher, None] = None
+        if not lazy:
+            self._setup_session()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        HTTP session sending the requests. In lazy mode, it is
+        authenticated and configured the first time it is used.
+        """
+        if self._session is None:
+            self._setup_session()
+        return self._session  # type: ignore[return-value]
+
+    @session.setter
+    def session(self, session: requests.Session) -> None:
+        self._session = session
+
+    def _setup_session(self) -> None:
+        """
+        Creates the HTTP session, once, and starts renewing its
+        credentials in the background if requested.
+        """
+        with self._session_lock:
+            if self._session is not None:
+                return
+
+            start = time.monotonic()
+            session = self._create_session()
+            self.session_setup_time = time.monotonic() - start
+            self.logger.debug(
+                "HTTP session configured in %.3f seconds", self.session_setup_time
+            )
+
+            if self._refresh_credentials and isinstance(session, AuthenticatedSession):
+                self._refresher = CredentialRefresher(handler=session._handler)
+                self._refresher.start()
+            self._session = session
 
     def _target_web_application(self) -> str:
         """
@@ -129,6 +275,14 @@ class BaseClient:
 
         return path
 
+    def _cache_path(self) -> Path:
+        """
+        Sets the path for the persistent response cache, next
+        to the credential's file.
+        """
+        credential_path = self._credentials_path()
+        return credential_path.parent / f"{self._credential_name()}-cache.sqlite"
+
     def _create_session(self) -> requests.Session:
         """
         Configures the HTTP session depending on the chosen authentication method.
@@ -161,16 +315,348 @@ class BaseClient:
             self.logger.warning("Using HTTP client without providing authentication")
             session = requests.Session()
 
+        # Keep the connections alive across requests
+        SessionFactory.configure_connection_pool(
+            session=session,
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            keep_alive=self._keep_alive,
+        )
+
         # Include some headers for the session
         user_agent = {
             "User-Agent": f"PdmV HTTP client (For: {self._app}): {describe_platform()}"
         }
         session.headers.update(user_agent)
+        if isinstance(session, AuthenticatedSession):
+            session.metrics = self.metrics
         return session
 
+    def _fork_session(self) -> requests.Session:
+        """
+        Creates a new HTTP session sharing the credentials and headers of
+        the main one but with its own connection pool.
+        """
+        session: requests.Session
+        if isinstance(self.session, AuthenticatedSession):
+            session = AuthenticatedSession(handler=self.session._handler)
+            session.metrics = self.metrics
+        else:
+            session = requests.Session()
+
+        session.headers.update(self.session.headers)
+        SessionFactory.configure_connection_pool(
+            session=session,
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            keep_alive=self._keep_alive,
+        )
+        return session
+
+    def _current_session(self) -> requests.Session:
+        """
+        Picks the HTTP session bound to the current thread, if any,
+        or the main session otherwise.
+        """
+        return getattr(self._local, "session", None) or self.session
+
+    def deadline(
+        self, seconds: Union[float, None]
+    ) -> AbstractContextManager[Union[float, None]]:
+        """
+        Limits the wall time of all the requests sent within the block,
+        including the ones sent by worker threads, e.g.
+        `with mcm.deadline(60): mcm.get("requests", query=...)`.
+        Requests in flight time out when the deadline expires and
+        the ones sent afterwards raise `DeadlineExceeded`.
+
+        Args:
+            seconds: Time available for the block. None to only
+                keep the outer deadline, if any.
+        """
+        return deadline(seconds)
+
+    @contextmanager
+    def _worker_pool(self, max_workers: int) -> Iterator[ThreadPoolExecutor]:
+        """
+        Provides a thread pool whose workers send requests through their
+        own HTTP session. The sessions are closed once the pool is released.
+        Tasks run in the context they were submitted from, so that the
+        caller's deadline applies to them.
+
+        Args:
+            max_workers: Number of worker threads.
+        """
+        sessions: list[requests.Session] = []
+        executor = self._new_worker_pool(max_workers=max_workers, sessions=sessions)
+        try:
+            yield executor
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            for session in sessions:
+                session.close()
+
+    def _new_worker_pool(
+        self, max_workers: int, sessions: list[requests.Session]
+    ) -> ThreadPoolExecutor:
+        """
+        Creates a thread pool whose workers send requests through their
+        own HTTP session, forked when the worker thread starts. Threads
+        are only started when tasks are submitted.
+
+        Args:
+            max_workers: Number of worker threads.
+            sessions: Collects the forked sessions, to close them
+                once the pool is shut down.
+        """
+        lock = threading.Lock()
+
+        def bind_session() -> None:
+            session = self._fork_session()
+            with lock:
+                sessions.append(session)
+            self._local.session = session
+
+        return ContextThreadPoolExecutor(
+            max_workers=max_workers,
+            initializer=bind_session,
+            thread_name_prefix=f"pdmv-http-client-{self._app}",
+        )
+
+    def _prefetch_pool(self) -> ThreadPoolExecutor:
+        """
+        Thread pool to prefetch search pages. It lives as long as the
+        client, so that its workers keep their connections alive
+        across searches.
+        """
+        with self._session_lock:
+            if self._page_pool is None:
+                self._page_pool = self._new_worker_pool(
+                    max_workers=self._page_prefetch, sessions=self._page_pool_sessions
+                )
+            return self._page_pool
+
+    def _paginate(
+        self,
+        fetch_page: Callable[[int], list],
+        page_size: Union[int, None] = None,
+        honored_page_size: Union[int, None] = None,
+    ) -> Iterator[list]:
+        """
+        Walks a paginated search. The first page is retrieved with the
+        current session and, if it is full, the following ones are
+        prefetched concurrently.
+
+        Args:
+            fetch_page: Retrieves the results for a page number, starting from 0.
+            page_size: Number of results in a full page, if known. It allows
+                to stop as soon as a short page is received.
+            honored_page_size: Largest page size the web application is known
+                to honor, see `Paginator`.
+
+        Yields:
+            Non-empty pages, in order.
+        """
+        if self._page_prefetch <= 1:
+            yield from Paginator(
+                fetch_page=fetch_page,
+                page_size=page_size,
+                honored_page_size=honored_page_size,
+            ).pages()
+            return
+
+        paginator = Paginator(
+            fetch_page=fetch_page,
+            page_size=page_size,
+            prefetch=self._page_prefetch,
+            executor=self._prefetch_pool(),
+            honored_page_size=honored_page_size,
+        )
+        yield from paginator.pages()
+
+    def close(self) -> None:
+        """
+        Closes the HTTP session and releases its pooled connections.
+        """
+        if self._refresher:
+            self._refresher.stop()
+        if self._page_pool is not None:
+            self._page_pool.shutdown(wait=True, cancel_futures=True)
+            for session in self._page_pool_sessions:
+                session.close()
+            self._page_pool = None
+            self._page_pool_sessions = []
+        if self._session is not None:
+            self._session.close()
+        if self._owned_cache:
+            self._owned_cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
     def __repr__(self):
         return f"<HTTP client (For: {self._app}) id: {self._id} server: {self.server} credential: {self.credentials_path}>"
 
+    def _send(
+        self,
+        method: str,
+        url: str,
+        data: Union[dict, list, None] = None,
+        headers: Union[dict[str, str], None] = None,
+        timeout: Union[Timeout, None] = None,
+    ) -> requests.Response:
+        """
+        Sends one HTTP request, pacing it with the rate limiter and
+        recording its measurements. The timeouts are capped to the
+        time left before the current deadline.
+
+        Args:
+            method: HTTP method.
+            url: Absolute resource URL.
+            data: Request's body, it is sent as JSON.
+            headers: Additional headers for this request only.
+            timeout: Connect and read timeouts for this request.
+        """
+        body: Union[bytes, None] = None
+        if data is not None:
+            body = self.codec.encode(data)
+            headers = {"Content-Type": "application/json", **(headers or {})}
+
+        # Do not take a slot from the rate limiter if the deadline expired
+        check()
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        start = time.monotonic()
+        status_code: Union[int, None] = None
+        try:
+            response = self._current_session().request(
+                method=method,
+                url=url,
+                data=body,
+                headers=headers,
+                timeout=timeout_for(timeout),
+            )
+            status_code = response.status_code
+        except requests.RequestException:
+            if self.metrics:
+                self.metrics.record_request(
+                    method=method,
+                    url=url,
+                    latency=time.monotonic() - start,
+                    error=True,
+                )
+            raise
+        finally:
+            if self.rate_limiter:
+                self.rate_limiter.release(
+                    latency=time.monotonic() - start, status_code=status_code
+                )
+
+        if self.metrics:
+            self.metrics.record_request(
+                method=method,
+                url=url,
+                latency=time.monotonic() - start,
+                bytes_sent=len(body or b""),
+                bytes_received=len(response.content),
+                error=response.status_code >= 400,
+            )
+        return response
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        data: Union[dict, list, None] = None,
+        headers: Union[dict[str, str], None] = None,
+        idempotent: Union[bool, None] = None,
+    ) -> requests.Response:
+        """
+        Sends an HTTP request to the target resource using the session
+        bound to the current thread.
+
+        Args:
+            method: HTTP method.
+            url: Resource URL. Do not include a slash at the beginning.
+            data: Request's body, it is sent as JSON.
+            headers: Additional headers for this request only.
+            idempotent: Allows the retry policy to send the request again
+                after it reached the server, see `RetryPolicy.execute`.
+
+        Returns:
+            Raw HTTP response.
+        """
+        full_url = f"{self.server}{url}"
+        timeout = self.timeout
+        if not RetryPolicy.is_read_only(method=method, url=full_url):
+            timeout = without_read_timeout(timeout)
+        send = functools.partial(
+            self._send,
+            method=method,
+            url=full_url,
+            data=data,
+            headers=headers,
+            timeout=timeout,
+        )
+        if self.retry:
+            response = self.retry.execute(
+                method=method, url=full_url, send=send, idempotent=idempotent
+            )
+        else:
+            response = send()
+        if self.cache and not (method == "GET" and self.cache.is_cacheable(url)):
+            # Evict the cached copies of the objects this request could modify
+            self.cache.invalidate_request(url=url, data=data)
+
+        return response
+
+    def _fetch(self, url: str) -> tuple[Any, int]:
+        """
+        Performs a GET request to the target resource, reusing the cached
+        response if available. This assumes the target resource's response
+        format is JSON.
+
+        Args:
+            url: Resource URL. Do not include a slash at the beginning.
+
+        Returns:
+            Target resource response and the number of bytes received.
+        """
+        if not self.cache or not self.cache.is_cacheable(url):
+            response = self._request(method="GET", url=url)
+            return self.codec.decode(response.content), len(response.content)
+
+        entry = self.cache.lookup(url)
+        if entry and entry.fresh:
+            return deepcopy(entry.value), 0
+
+        # Revalidate the stale entry, if possible.
+        validators: dict[str, str] = {}
+        if entry and entry.etag:
+            validators["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            validators["If-Modified-Since"] = entry.last_modified
+
+        response = self._request(method="GET", url=url, headers=validators)
+        if entry and response.status_code == 304:
+            self.cache.refresh(url=url)
+            return deepcopy(entry.value), len(response.content)
+
+        value = self.codec.decode(response.content)
+        if response.ok:
+            self.cache.store(
+                url=url,
+                value=value,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+        return deepcopy(value), len(response.content)
+
     def _get(self, url: str):
         """
         Performs a GET request to the target resource.
@@ -183,9 +669,8 @@ class BaseClient:
         Returns:
             Target resource response.
         """
-        full_url = f"{self.server}{url}"
-        response = self.session.get(url=full_url)
-        return response.json()
+        value, _ = self._fetch(url=url)
+        return value
 
     def _put(self, url: str, data: dict):
         """
@@ -200,9 +685,8 @@ class BaseClient:
         Returns:
             Target resource response.
         """
-        full_url = f"{self.server}{url}"
-        response = self.session.put(url=full_url, json=data)
-        return response.json()
+        response = self._request(method="PUT", url=url, data=data)
+        return self.codec.decode(response.content)
 
     def _post(self, url: str, data: dict):
         """
@@ -217,9 +701,8 @@ class BaseClient:
         Returns:
             Target resource response.
         """
-        full_url = f"{self.server}{url}"
-        response = self.session.post(url=full_url, json=data)
-        return response.json()
+        response = self._request(method="POST", url=url, data=data)
+        return self.codec.decode(response.content)
 
     def _delete(self, url: str):
         """
@@ -233,6 +716,5 @@ class BaseClient:
         Returns:
             Target resource response.
         """
-        full_url = f"{self.server}{url}"
-        response = self.session.delete(url=full_url)
-        return response.json()
+        response = self._request(method="DELETE", url=url)
+        return self.codec.decode(response.content)
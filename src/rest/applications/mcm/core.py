@@ -3,9 +3,12 @@ REST client for the McM application.
 """
 
 import warnings
-from typing import Union
+from concurrent.futures import as_completed
+from copy import deepcopy
+from typing import Any, Callable, Iterator, Union
 
 from rest.applications.base import BaseClient
+from rest.applications.pagination import AdaptivePaginator
 
 
 class McM(BaseClient):
@@ -13,6 +16,22 @@ class McM(BaseClient):
     Initializes an HTTP client for querying McM.
     """
 
+    # Page size used by default in searches. McM is known
+    # to honor it, larger page sizes could be capped.
+    PAGE_SIZE = 50
+
+    # Tunes the page size on the fly to reduce the number of requests
+    ADAPTIVE = "adaptive"
+
+    # Number of requests retrieved per call in bulk lookups
+    BULK_CHUNK_SIZE = 500
+
+    # Request types that begin a chain
+    ROOT_REQUEST_TYPES = ("LHE", "Prod")
+
+    # Updates sent before giving up when the object keeps being modified
+    MAX_UPDATE_ATTEMPTS = 3
+
     def __init__(
         self,
         id: str = BaseClient.SSO,
@@ -21,7 +40,21 @@ class McM(BaseClient):
         dev: bool = True,
         client_id: str = "",
         client_secret: str = "",
+        page_size: Union[int, str] = PAGE_SIZE,
+        **kwargs,
     ):
+        """
+        Arguments:
+            page_size: Number of results requested per page in searches.
+                Use `McM.ADAPTIVE` to grow it while the responses stay within
+                the latency and payload budgets and shrink it on timeouts.
+
+            For the other arguments, see `BaseClient`.
+        """
+        if isinstance(page_size, str) and page_size != self.ADAPTIVE:
+            raise ValueError(f"Invalid page size: {page_size}")
+        self.page_size = page_size
+
         # Set the HTTP session
         super().__init__(
             app="mcm",
@@ -31,6 +64,7 @@ class McM(BaseClient):
             dev=dev,
             client_id=client_id,
             client_secret=client_secret,
+            **kwargs,
         )
 
     def __get(self, url):
@@ -66,7 +100,16 @@ class McM(BaseClient):
         return self._delete(url=url)
 
     # McM methods
-    def get(self, object_type, object_id=None, query="", method="get", page=-1):
+    def get(
+        self,
+        object_type,
+        object_id=None,
+        query="",
+        method="get",
+        page=-1,
+        page_size=None,
+        deadline=None,
+    ):
         """
         Get data from McM
         object_type - [chained_campaigns, chained_requests, campaigns, requests, flows, etc.]
@@ -74,62 +117,194 @@ class McM(BaseClient):
         query - query to be run in order to receive an object, e.g. tags=M17p1A, multiple parameters can be used with & tags=M17p1A&pwg=HIG
         method - action to be performed, such as get, migrate or inspect
         page - which page to be fetched. -1 means no pagination, return all results
+        page_size - number of results per page, the client's default is used if not given
+        deadline - seconds available to retrieve all the results, e.g. every page
+            of a search. Only the per-request timeouts apply if not given
         """
-        object_type = object_type.strip()
-        if object_id:
-            object_id = object_id.strip()
-            self.logger.debug(
-                "Object ID %s provided, method is %s, database %s",
-                object_id,
-                method,
-                object_type,
-            )
-            url = "restapi/%s/%s/%s" % (object_type, method, object_id)
-            result = self._get(url)
-            if type(result) == list:
-                return result
-            elif type(result) == str:
-                return result
-            result = result.get("results")
-            if not result:
-                return None
-            return result
-        elif query:
-            if page != -1:
-                self.logger.debug(
-                    "Fetching page %s of %s for query %s", page, object_type, query
-                )
-                url = "search/?db_name=%s&limit=50&page=%d&%s" % (
-                    object_type,
-                    page,
-                    query,
-                )
-                results = self._get(url).get("results", [])
+        with self.deadline(deadline):
+            object_type = object_type.strip()
+            if object_id:
+                object_id = object_id.strip()
                 self.logger.debug(
-                    "Found %s %s in page %s for query %s",
-                    len(results),
+                    "Object ID %s provided, method is %s, database %s",
+                    object_id,
+                    method,
                     object_type,
-                    page,
-                    query,
                 )
-                return results
+                url = "restapi/%s/%s/%s" % (object_type, method, object_id)
+                result = self._get(url)
+                if type(result) == list:
+                    return result
+                elif type(result) == str:
+                    return result
+                result = result.get("results")
+                if not result:
+                    return None
+                return result
+            elif query:
+                page_size = page_size or self.page_size
+                if page != -1:
+                    if page_size == self.ADAPTIVE:
+                        # Page numbers are only meaningful for a fixed page size
+                        page_size = self.PAGE_SIZE
+
+                    results, _ = self._search_page(
+                        object_type=object_type,
+                        query=query,
+                        page=page,
+                        page_size=page_size,
+                    )
+                    return results
+                else:
+                    self.logger.debug(
+                        "Page not given, will use pagination to build response"
+                    )
+                    results = []
+                    for page_results in self._search_pages(
+                        object_type=object_type, query=query, page_size=page_size
+                    ):
+                        results += page_results
+
+                    return results
             else:
-                self.logger.debug(
-                    "Page not given, will use pagination to build response"
+                self.logger.error(
+                    "Neither object ID, nor query is given, doing nothing..."
                 )
-                page_results = [{}]
-                results = []
-                page = 0
-                while page_results:
-                    page_results = self.get(
-                        object_type=object_type, query=query, method=method, page=page
+
+    def _search_page(
+        self, object_type: str, query: str, page: int, page_size: int
+    ) -> tuple[list[dict], int]:
+        """
+        Retrieves one page of search results.
+
+        Returns:
+            The page results and the size of the response payload in bytes.
+        """
+        self.logger.debug(
+            "Fetching page %s (size %s) of %s for query %s",
+            page,
+            page_size,
+            object_type,
+            query,
+        )
+        url = "search/?db_name=%s&limit=%d&page=%d&%s" % (
+            object_type,
+            page_size,
+            page,
+            query,
+        )
+        content, payload = self._fetch(url=url)
+        results = content.get("results", [])
+        self.logger.debug(
+            "Found %s %s in page %s for query %s",
+            len(results),
+            object_type,
+            page,
+            query,
+        )
+        return results, payload
+
+    def _search_pages(
+        self, object_type: str, query: str, page_size: Union[int, str]
+    ) -> Iterator[list[dict]]:
+        """
+        Walks all the pages of a search.
+
+        Yields:
+            Non-empty pages, in order.
+        """
+        if page_size == self.ADAPTIVE:
+            paginator = AdaptivePaginator(
+                fetch_page=lambda page, size: self._search_page(
+                    object_type=object_type, query=query, page=page, page_size=size
+                ),
+                page_size=self.PAGE_SIZE,
+            )
+            return paginator.pages()
+        if not isinstance(page_size, int):
+            raise ValueError(f"Invalid page size: {page_size}")
+
+        return self._paginate(
+            fetch_page=lambda page: self._search_page(
+                object_type=object_type, query=query, page=page, page_size=page_size
+            )[0],
+            page_size=page_size,
+            honored_page_size=self.PAGE_SIZE,
+        )
+
+    def iter_search(
+        self, object_type: str, query: str, page_size: Union[int, str, None] = None
+    ) -> Iterator[dict]:
+        """
+        Runs a search and yields its results as the pages arrive.
+        Only the pages being prefetched are kept in memory, so that
+        large exports could be processed while they are downloaded.
+
+        Args:
+            object_type: McM database, e.g. requests or chained_requests.
+            query: Search query, e.g. member_of_campaign=Run3Summer22GS&status=done
+            page_size: Number of results per page, the client's default is
+                used if not given.
+
+        Yields:
+            Documents matching the query.
+        """
+        pages = self._search_pages(
+            object_type=object_type.strip(),
+            query=query,
+            page_size=page_size or self.page_size,
+        )
+        for page_results in pages:
+            yield from page_results
+
+    def iter_many(
+        self, object_type: str, prepids: list[str], max_workers: int = 8
+    ) -> Iterator[tuple[str, Union[dict, None, Exception]]]:
+        """
+        Fetches several objects concurrently and yields them as soon as
+        each one is received, not in the order they were requested.
+
+        Args:
+            object_type: McM database, e.g. requests or chained_requests.
+            prepids: Identifiers of the objects to retrieve. Duplicates
+                are only fetched once.
+            max_workers: Number of requests in flight at the same time.
+                Each worker thread uses its own HTTP session.
+
+        Yields:
+            Pairs of (prepid, result). The result is the same `get` would
+            return or the exception raised while fetching that object.
+        """
+        with self._worker_pool(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.get, object_type, prepid): prepid
+                for prepid in dict.fromkeys(prepids)
+            }
+            for future in as_completed(futures):
+                prepid = futures[future]
+                try:
+                    yield prepid, future.result()
+                except Exception as e:
+                    self.logger.error(
+                        "Unable to retrieve %s from %s: %s", prepid, object_type, e
                     )
-                    results += page_results
-                    page += 1
+                    yield prepid, e
 
-                return results
-        else:
-            self.logger.error("Neither object ID, nor query is given, doing nothing...")
+    def get_many(
+        self, object_type: str, prepids: list[str], max_workers: int = 8
+    ) -> dict[str, Union[dict, None, Exception]]:
+        """
+        Fetches several objects concurrently, see `iter_many`.
+
+        Returns:
+            Results keyed by prepid. Objects that could not be retrieved
+            map to the raised exception instead of aborting the whole batch.
+        """
+        return dict(
+            self.iter_many(
+                object_type=object_type, prepids=prepids, max_workers=max_workers
+            )
+        )
 
     def update(self, object_type, object_data):
         """
@@ -139,6 +314,75 @@ class McM(BaseClient):
         """
         return self.put(object_type, object_data, method="update")
 
+    def update_optimistic(
+        self,
+        object_type: str,
+        object_data: Union[dict, str],
+        change: Callable[[dict], None],
+        max_attempts: int = MAX_UPDATE_ATTEMPTS,
+    ) -> dict:
+        """
+        Applies a change to an object and updates it, reusing the revision
+        (`_rev`) of the document already retrieved instead of retrieving it
+        again. Only if the object was modified meanwhile, it is retrieved
+        again and the change is reapplied.
+
+        Args:
+            object_type: [chained_campaigns, chained_requests, campaigns, requests, flows, etc.]
+            object_data: Object retrieved before, it is not modified. If only
+                its prepid is provided, the object is retrieved first.
+            change: Modifies the object in place, e.g. sets a field. It is
+                called again for every attempt, so it must be idempotent.
+            max_attempts: Maximum number of updates sent.
+
+        Returns:
+            Response of the last update.
+        """
+        if isinstance(object_data, str):
+            prepid, document = object_data, self.get(object_type, object_data)
+        else:
+            prepid, document = object_data.get("prepid", ""), deepcopy(object_data)
+
+        url = "restapi/%s/update" % (object_type)
+        result: Any = {"results": False, "message": f"{prepid} does not exist"}
+        for attempt in range(1, max_attempts + 1):
+            if not document:
+                break
+
+            change(document)
+            response = self._request(method="PUT", url=url, data=document)
+            result = self.codec.decode(response.content)
+            if not self._is_revision_conflict(response.status_code, result):
+                return result
+            if attempt == max_attempts:
+                break
+
+            self.logger.info(
+                "%s was modified meanwhile, retrieving it again (attempt %s/%s)",
+                prepid,
+                attempt,
+                max_attempts,
+            )
+            document = self.get(object_type, prepid)
+
+        self.logger.warning("Unable to update %s: %s", prepid, result)
+        return result
+
+    @staticmethod
+    def _is_revision_conflict(status_code: int, result: Any) -> bool:
+        """
+        Whether an update was rejected because the object was modified
+        meanwhile. CouchDB reports it with HTTP 409. The message check is
+        a fallback, not verified against McM, for the case the conflict is
+        reported with another status code.
+        """
+        if status_code == 409:
+            return True
+        if not isinstance(result, dict) or result.get("results"):
+            return False
+        message = str(result.get("message", "")).lower()
+        return "revision" in message or "conflict" in message
+
     def put(self, object_type, object_data, method="save"):
         """
         Put data into McM
@@ -176,6 +420,72 @@ class McM(BaseClient):
         res = self._put("restapi/requests/listwithfile", data={"contents": query})
         return res.get("results", None)
 
+    def get_requests(
+        self, prepids: list[str], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> dict[str, Union[dict, None]]:
+        """
+        Retrieves many requests with a few `listwithfile` calls, one per chunk
+        of prepids. If the client has a response cache, the requests already
+        cached are not retrieved again and the retrieved ones are cached, so
+        that later `get("requests", prepid)` calls reuse them.
+
+        Args:
+            prepids: Request identifiers. Duplicates are only retrieved once.
+            chunk_size: Maximum number of prepids per call.
+
+        Returns:
+            Requests keyed by prepid, without surrounding whitespace,
+            None for the ones that do not exist.
+        """
+        found: dict[str, Union[dict, None]] = dict.fromkeys(
+            prepid.strip() for prepid in prepids
+        )
+        missing: list[str] = []
+        for prepid in found:
+            entry = self.cache.lookup(self._request_url(prepid)) if self.cache else None
+            if entry and entry.fresh and isinstance(entry.value, dict):
+                found[prepid] = deepcopy(entry.value.get("results")) or None
+            else:
+                missing.append(prepid)
+
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start : start + chunk_size]
+            requests = self.get_range_of_requests("\n".join(chunk))
+            if not isinstance(requests, list):
+                # The whole chunk was rejected, e.g. due to a malformed prepid
+                self.logger.warning(
+                    "Unable to list %s requests at once, retrieving them one by one",
+                    len(chunk),
+                )
+                requests = [
+                    request
+                    for request in self.get_many("requests", chunk).values()
+                    if isinstance(request, dict)
+                ]
+
+            for request in requests:
+                prepid = request.get("prepid")
+                if prepid not in found:
+                    continue
+                found[prepid] = request
+                if self.cache:
+                    self.cache.store(
+                        url=self._request_url(prepid),
+                        value={"results": deepcopy(request)},
+                    )
+
+        self.logger.debug(
+            "Retrieved %s requests with %s calls, %s were cached",
+            len(found),
+            -(-len(missing) // chunk_size),
+            len(found) - len(missing),
+        )
+        return found
+
+    @staticmethod
+    def _request_url(prepid: str) -> str:
+        return "restapi/requests/get/%s" % (prepid)
+
     def delete(self, object_type, object_id):
         url = "restapi/%s/delete/%s" % (object_type, object_id)
         self._delete(url)
@@ -236,25 +546,29 @@ class McM(BaseClient):
         res = self._get("restapi/chained_requests/flow/%s" % (chained_request_prepid))
         return res.get("results", None)
 
-    def root_requests_from_ticket(self, ticket_prepid):
+    def root_requests_from_ticket(self, ticket_prepid, deadline=None):
         """
         Return list of all root (first ones in the chain) requests of a ticket
+        deadline - seconds available to retrieve the ticket and its requests
         """
-        mccm = self.get("mccms", ticket_prepid)
-        query = ""
-        for root_request in mccm.get("requests", []):
-            if isinstance(root_request, str):
-                query += "%s\n" % (root_request)
-            elif isinstance(root_request, list):
-                # List always contains two elements - start and end of a range
-                query += "%s -> %s\n" % (root_request[0], root_request[1])
-            else:
-                self.logger.error(
-                    "%s is of unsupported type %s", root_request, type(root_request)
-                )
+        with self.deadline(deadline):
+            mccm = self.get("mccms", ticket_prepid)
+            query = ""
+            for root_request in mccm.get("requests", []):
+                if isinstance(root_request, str):
+                    query += "%s\n" % (root_request)
+                elif isinstance(root_request, list):
+                    # List always contains two elements - start and end of a range
+                    query += "%s -> %s\n" % (root_request[0], root_request[1])
+                else:
+                    self.logger.error(
+                        "%s is of unsupported type %s",
+                        root_request,
+                        type(root_request),
+                    )
 
-        requests = self.get_range_of_requests(query)
-        return requests
+            requests = self.get_range_of_requests(query)
+            return requests
 
     def is_root_request(self, request: Union[str, dict]) -> bool:
         """
@@ -274,4 +588,25 @@ class McM(BaseClient):
         else:
             raise ValueError(f"Unexpected value: {request} - {type(request)}")
 
-        return request_data.get("type", "") in ("LHE", "Prod")
+        return request_data.get("type", "") in self.ROOT_REQUEST_TYPES
+
+    def are_root_requests(
+        self, prepids: list[str], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> dict[str, bool]:
+        """
+        Checks if many requests are root requests, retrieving them
+        in bulk, see `get_requests`.
+
+        Args:
+            prepids: Request identifiers.
+            chunk_size: Maximum number of prepids per call.
+
+        Returns:
+            Whether each request is a root request, False for the
+            ones that do not exist. See `get_requests` for the keys.
+        """
+        requests = self.get_requests(prepids=prepids, chunk_size=chunk_size)
+        return {
+            prepid: request is not None and self.is_root_request(request=request)
+            for prepid, request in requests.items()
+        }
@@ -5,28 +5,69 @@ This is intended to be used only for
 `production_manager` users or `administrators`.
 """
 
+import contextvars
 import datetime
 import logging
+from concurrent.futures import Executor
+from contextlib import contextmanager
 from copy import deepcopy
+from functools import partial
 from itertools import groupby
-from typing import Union
+from typing import Iterator, Union
 
 from rest import McM
+from rest.applications.scheduler import TaskGraph
 from rest.utils.miscellaneous import pformat
 
+# Root request being processed by the current thread, to prefix its log records.
+_current_root: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "pdmv_http_client_current_root", default=""
+)
+
+
+class _RootPrefixFilter(logging.Filter):
+    """
+    Includes the root request being processed in the log records, so that
+    the records of the roots processed in parallel could be told apart.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        root = _current_root.get()
+        record.root_prefix = f"[{root}]" if root else ""
+        return True
+
 
 class InvalidateDeleteRequests:
     """
     Invalidate and delete all the chain requests in McM
     linked to a root request in McM and delete the
     root requests if required.
+
+    Attributes:
+        lookup_workers: Number of invalidation searches sent at the same time.
+        announce_chunk_size: Maximum number of invalidation records
+            announced per call.
+        step_workers: Number of independent steps (e.g. rewinding or deleting)
+            run at the same time while processing the chain requests of a root.
     """
 
-    def __init__(self, mcm: McM) -> None:
+    def __init__(
+        self,
+        mcm: McM,
+        lookup_workers: int = 8,
+        announce_chunk_size: int = 100,
+        step_workers: int = 8,
+    ) -> None:
         self.mcm = mcm
+        self.lookup_workers = lookup_workers
+        self.announce_chunk_size = announce_chunk_size
+        self.step_workers = step_workers
         self.logger = self._get_logger()
         self._chain_request_type = "chained_requests"
         self._request_type = "requests"
+        self._lookup_executor: Union[Executor, None] = None
+        self._step_executor: Union[Executor, None] = None
+        self._announced: set[str] = set()
         self.logger.warning(
             "Sending requests to target environment: %s", self.mcm.server
         )
@@ -37,54 +78,153 @@ class InvalidateDeleteRequests:
         """
         logger: logging.Logger = logging.getLogger(__name__)
         logger.handlers.clear() # Avoid to record the same message twice in the log
-        formatter = logging.Formatter("[%(asctime)s][%(levelname)s] %(message)s")
+        formatter = logging.Formatter(
+            "[%(asctime)s][%(levelname)s]%(root_prefix)s %(message)s"
+        )
         current_date = str(datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S"))
         fh: logging.Handler = logging.FileHandler(
             f"mcm_invalidate_requests_{current_date}.log"
         )
         fh.setFormatter(formatter)
+        fh.addFilter(_RootPrefixFilter())
         logger.addHandler(fh)
         return logger
 
-    def _get_invalidations(self, requests: list[str]) -> list[dict]:
+    @contextmanager
+    def _lookup_pool(self) -> Iterator[None]:
+        """
+        Keeps a worker pool for the invalidation searches while processing
+        several root requests, so that its connections are reused.
+        """
+        if self._lookup_executor or self.lookup_workers <= 1:
+            yield
+            return
+
+        with self.mcm._worker_pool(max_workers=self.lookup_workers) as executor:
+            self._lookup_executor = executor
+            try:
+                yield
+            finally:
+                self._lookup_executor = None
+
+    @contextmanager
+    def _step_pool(self) -> Iterator[None]:
+        """
+        Keeps a worker pool to run the steps of the chain requests
+        while processing several root requests.
+        """
+        if self._step_executor or self.step_workers <= 1:
+            yield
+            return
+
+        with self.mcm._worker_pool(max_workers=self.step_workers) as executor:
+            self._step_executor = executor
+            try:
+                yield
+            finally:
+                self._step_executor = None
+
+    def _get_invalidations(self, requests: list[str], skipped: int = 0) -> list[dict]:
         """
         Get all the invalidation records related to the given requests.
+        Each request is looked up once, even if it is included several
+        times, the searches are sent concurrently and the records already
+        announced by this instance are skipped.
 
         Args:
             requests: List of `prepids` used to retrieve its invalidations.
+            skipped: Number of lookups the caller skipped because
+                the requests were already looked up, only to report them.
 
         Returns:
             Invalidations related to the requests.
         """
+        prepids = list(dict.fromkeys(requests))
+        skipped += len(requests) - len(prepids)
+        if not prepids:
+            if skipped:
+                self.logger.info("Skipped %s invalidation lookups", skipped)
+            return []
+
+        # A page size McM honors, so that a short page is the last one
+        page_size = self.mcm.PAGE_SIZE
+
+        def lookup(prepid: str) -> tuple[list[dict], int]:
+            """
+            Walks the search pages for a request.
+
+            Returns:
+                The invalidation records and the number of searches sent.
+            """
+            inv_req: list[dict] = []
+            page = 0
+            while True:
+                page_results = self.mcm.get(
+                    "invalidations",
+                    query=f"prepid={prepid}",
+                    page=page,
+                    page_size=page_size,
+                )
+                assert isinstance(page_results, list)
+                inv_req += page_results
+                page += 1
+                if len(page_results) < page_size:
+                    return inv_req, page
+
+        if self._lookup_executor and len(prepids) > 1:
+            found = dict(zip(prepids, self._lookup_executor.map(lookup, prepids)))
+        else:
+            found = {prepid: lookup(prepid) for prepid in prepids}
+
         results: list[dict] = []
-        for req in requests:
-            inv_req = self.mcm.get("invalidations", query=f"prepid={req}")
-            assert isinstance(inv_req, list)
-            results += inv_req
+        seen: set[str] = set()
+        for invalidations, _ in found.values():
+            for invalidation in invalidations:
+                inv_id = invalidation.get("_id", "")
+                if inv_id in seen or inv_id in self._announced:
+                    continue
+                seen.add(inv_id)
+                results.append(invalidation)
 
+        self.logger.info(
+            "Looked up invalidations for %s requests with %s searches, "
+            "skipped %s lookups of requests already looked up",
+            len(prepids),
+            sum(searches for _, searches in found.values()),
+            skipped,
+        )
         return results
 
     def _announce_invalidations(self, invalidations: list[dict]) -> dict:
         """
-        Announce an invalidation for the given invalidation records.
+        Announce an invalidation for the given invalidation records,
+        sending up to `announce_chunk_size` of them per call.
 
         Args:
             invalidations: List of `invalidation` records to announce.
 
         Returns:
-            Announce result.
+            Announce result: The first one that failed or the last one.
         """
         # Flatten and just get the `_id` field
-        inv_ids: list[str] = [
-            i.get("_id", "") for i in invalidations if i.get("_id", "")
-        ]
-        announce_result = self.mcm.put(
-            object_type="invalidations", object_data=inv_ids, method="announce"
+        inv_ids: list[str] = list(
+            dict.fromkeys(i.get("_id", "") for i in invalidations if i.get("_id", ""))
         )
+        announce_result: dict = {}
+        for start in range(0, len(inv_ids), self.announce_chunk_size):
+            inv_chunk = inv_ids[start : start + self.announce_chunk_size]
+            announce_result = self.mcm.put(
+                object_type="invalidations", object_data=inv_chunk, method="announce"
+            )
+            if not announce_result or not announce_result.get("results"):
+                break
+            self._announced.update(inv_chunk)
 
         return announce_result
 
-    def _process_invalidation(self, request_prepids: list[str]) -> None:
+    def _process_invalidation(
+        self, request_prepids: list[str], skipped: int = 0
+    ) -> None:
         """
         Get all the invalidations related to a request and announces them
         in case they exist.
@@ -92,8 +232,12 @@ class InvalidateDeleteRequests:
         Args:
             request_prepids: List of request's prepid to process its
                 invalidation.
+            skipped: Number of requests not included because they were
+                already looked up, see `_get_invalidations`.
         """
-        invalidations_to_announce = self._get_invalidations(requests=request_prepids)
+        invalidations_to_announce = self._get_invalidations(
+            requests=request_prepids, skipped=skipped
+        )
         if invalidations_to_announce:
             announce_result = self._announce_invalidations(
                 invalidations=invalidations_to_announce
@@ -177,88 +321,230 @@ class InvalidateDeleteRequests:
             [el.get("prepid") for el in chain_req_operate],
         )
 
-        # Set the flag to `False` and save
-        for ch_r in chain_req_operate:
-            ch_req_prepid = ch_r.get("prepid")
-            updated_ch_r = self.mcm.get(
-                object_type=self._chain_request_type, object_id=ch_req_prepid
-            )
-            updated_ch_r["action_parameters"]["flag"] = False
-            updated_ch_r = self.mcm.update(
-                object_type=self._chain_request_type, object_data=updated_ch_r
-            )
-            self.logger.info("Disable 'flag' response: %s", updated_ch_r)
+        steps = self._chain_requests_steps(
+            chain_req_operate=chain_req_operate, remove_chain=remove_chain
+        )
+        self.logger.info(
+            "Running %s steps for %s chain requests, %s of them in sequence",
+            len(steps),
+            len(chain_req_operate),
+            steps.depth(),
+        )
+        steps.run(executor=self._step_executor)
 
-            if not updated_ch_r or not updated_ch_r.get("results"):
-                msg = f"Error updating chain requests: {ch_req_prepid}"
-                self.logger.error(msg)
-                raise RuntimeError(msg)
+    def _chain_requests_steps(
+        self, chain_req_operate: list[dict], remove_chain: bool
+    ) -> TaskGraph:
+        """
+        Describes the steps to rewind, invalidate and delete the chain
+        requests and the order they must follow:
+            - The `flag` of every chain request is disabled before rewinding
+                any of them: they share requests, so rewinding one of them
+                modifies the others.
+            - Rewinding resets the requests in the chain. Chain requests sharing
+                requests are rewound one after another, in the given order.
+            - The invalidations of a chain request are announced after rewinding it.
+            - A request is deleted once all the chains including it were
+                rewound and invalidated, and after the requests following it
+                in those chains: from the deepest data tier upwards. When the
+                steps run one by one, the requests of a chain are deleted
+                before rewinding the next one, unless they are shared with it.
+            - A chain request is re-enabled after deleting its requests. Otherwise,
+                the root request is reset after deleting all of them and the
+                chain requests are deleted afterwards.
 
-        for ch_r in chain_req_operate:
-            ch_req_prepid = ch_r.get("prepid")
-
-            # Rewind the chain request to `root`.
-            rewind_endpoint = f"restapi/chained_requests/rewind_to_root/{ch_req_prepid}"
-            rewind_response = self.mcm._get(rewind_endpoint)
-            self.logger.info("Rewind chain request response: %s", rewind_response)
-            if not rewind_response or not rewind_response.get("results"):
-                msg = f"Unable to rewind chain request to root ({ch_r}) - Details: {rewind_response}"
-                self.logger.error(msg)
-                raise RuntimeError(msg)
+        Args:
+            chain_req_operate: Chain requests to process, sorted.
+            remove_chain: Delete the chain requests instead of re-enabling them.
 
-            # Announce the invalidation.
-            ch_req_requests: list[str] = ch_r.get("chain")
-            self._process_invalidation(request_prepids=ch_r.get("chain"))
+        Returns:
+            Steps to run.
+        """
+        steps = TaskGraph()
+        rewound_by: dict[str, str] = {}
+        looked_up: set[str] = set()
+
+        # Chain requests including each request and the request following it
+        # in each of them, to delete them from the deepest data tier upwards.
+        chains_of: dict[str, list[str]] = {}
+        following: dict[str, list[str]] = {}
+        for ch_r in chain_req_operate:
+            ch_req_requests = ch_r.get("chain", [])
+            for idx, rid in enumerate(ch_req_requests[1:], start=1):
+                chains_of.setdefault(rid, []).append(ch_r["prepid"])
+                following.setdefault(rid, []).extend(ch_req_requests[idx + 1 : idx + 2])
+
+        deleted_by: dict[str, str] = {}
+
+        def deletable(rid: str) -> bool:
+            invalidated = all(f"invalidate:{ch}" in steps for ch in chains_of[rid])
+            return invalidated and all(deletable(nrid) for nrid in following[rid])
+
+        def delete(rid: str) -> str:
+            if rid not in deleted_by:
+                deeper = [delete(next_rid) for next_rid in following[rid]]
+                deleted_by[rid] = steps.add(
+                    f"delete:{rid}",
+                    partial(
+                        self.mcm.delete, object_type=self._request_type, object_id=rid
+                    ),
+                    after=[f"invalidate:{ch}" for ch in chains_of[rid]] + deeper,
+                )
+            return deleted_by[rid]
 
-            # Delete the other requests EXCEPT for the `root`
-            # The first record in this list is the `root` request
-            chain_delete = ch_req_requests[1:]
+        disabled = [
+            steps.add(
+                f"disable-flag:{ch_r['prepid']}",
+                partial(self._set_chain_request_flag, ch_r, False),
+            )
+            for ch_r in chain_req_operate
+        ]
+        for ch_r in chain_req_operate:
+            ch_req_prepid: str = ch_r["prepid"]
+            ch_req_requests: list[str] = ch_r.get("chain", [])
+
+            rewind = steps.add(
+                f"rewind:{ch_req_prepid}",
+                partial(self._rewind_chain_request, ch_req_prepid),
+                after=disabled
+                + [rewound_by[rid] for rid in ch_req_requests[1:] if rid in rewound_by],
+            )
+            rewound_by.update((rid, rewind) for rid in ch_req_requests[1:])
+
+            # The root request is not modified by the rewinds and the requests
+            # shared with the chains processed before were already reset and
+            # looked up: skip looking them up again.
+            to_look_up = [rid for rid in ch_req_requests if rid not in looked_up]
+            looked_up.update(ch_req_requests)
+            steps.add(
+                f"invalidate:{ch_req_prepid}",
+                partial(
+                    self._process_invalidation,
+                    request_prepids=to_look_up,
+                    skipped=len(ch_req_requests) - len(to_look_up),
+                ),
+                after=[rewind],
+            )
 
-            # INFO: They must be deleted in order from the deepest
-            # data tier to upwards
-            chain_delete = reversed(chain_delete)
+            # Delete the other requests EXCEPT for the `root`, the ones shared
+            # with the next chain requests are deleted after processing them.
+            # The steps are added in the order they run one by one.
+            for rid in reversed(ch_req_requests[1:]):
+                if deletable(rid):
+                    delete(rid)
 
-            for rd in chain_delete:
-                self.mcm.delete(object_type=self._request_type, object_id=rd)
+        for rid in following:
+            delete(rid)
 
         # Process the chain request
         if remove_chain:
             # Precondition: All the chained request share the same
             # root request.
             root_request_prepid: str = chain_req_operate[0].get("chain", [])[0]
-            self.logger.warning(
-                "Full resetting the root request (%s) as it is required to properly delete the chains",
-                root_request_prepid,
+            reset = steps.add(
+                f"reset:{root_request_prepid}",
+                partial(self._full_reset_root_request, root_request_prepid),
+                after=list(deleted_by.values())
+                + [f"invalidate:{ch_r['prepid']}" for ch_r in chain_req_operate],
             )
-            result = self.mcm.reset(prepid=root_request_prepid)
-            if not result:
-                raise RuntimeError("Unable to reset the root request", result)
 
             # Process the root request invalidation.
-            self._process_invalidation([root_request_prepid])
+            root_invalidate = steps.add(
+                f"invalidate:{root_request_prepid}",
+                partial(self._process_invalidation, [root_request_prepid]),
+                after=[reset],
+            )
 
             # Remove all the chain requests
             for ch_r in chain_req_operate:
-                ch_req_prepid = ch_r.get("prepid")
-                self.mcm.delete(
-                    object_type=self._chain_request_type, object_id=ch_req_prepid
+                ch_req_prepid = ch_r["prepid"]
+                steps.add(
+                    f"delete:{ch_req_prepid}",
+                    partial(
+                        self.mcm.delete,
+                        object_type=self._chain_request_type,
+                        object_id=ch_req_prepid,
+                    ),
+                    after=[root_invalidate],
                 )
         else:
-            # Re-enable the `flag`
+            # Re-enable the `flag`. The rewind and the deletions modified
+            # the chain requests, so they are retrieved again.
             for ch_r in chain_req_operate:
-                ch_req_prepid = ch_r.get("prepid")
-                updated_ch_r = self.mcm.get(
-                    object_type=self._chain_request_type, object_id=ch_req_prepid
-                )
-                updated_ch_r["action_parameters"]["flag"] = True
-                updated_ch_r = self.mcm.update(
-                    object_type=self._chain_request_type, object_data=updated_ch_r
+                ch_req_prepid = ch_r["prepid"]
+                steps.add(
+                    f"enable-flag:{ch_req_prepid}",
+                    partial(self._set_chain_request_flag, ch_req_prepid, True),
+                    after=[f"invalidate:{ch_req_prepid}"]
+                    + [deleted_by[rid] for rid in ch_r.get("chain", [])[1:]],
                 )
-                self.logger.info("Disable 'flag' response: %s", updated_ch_r)
-                if not updated_ch_r or not updated_ch_r.get("results"):
-                    msg = f"Error updating chain requests: {ch_req_prepid}"
-                    self.logger.error(msg)
-                    raise RuntimeError(msg)
+
+        return steps
+
+    def _set_chain_request_flag(
+        self, ch_req_data: Union[dict, str], flag: bool
+    ) -> None:
+        """
+        Enables or disables a chain request's `flag`.
+
+        Args:
+            ch_req_data: Chain request data object, it is retrieved again
+                only if it was modified meanwhile. If only its prepid is
+                provided, it is retrieved first.
+            flag: Value to set.
+
+        Raises:
+            RuntimeError: If the chain request could not be updated.
+        """
+        ch_req_prepid = (
+            ch_req_data if isinstance(ch_req_data, str) else ch_req_data["prepid"]
+        )
+
+        def set_flag(ch_r: dict) -> None:
+            ch_r.setdefault("action_parameters", {})["flag"] = flag
+
+        updated_ch_r = self.mcm.update_optimistic(
+            object_type=self._chain_request_type,
+            object_data=ch_req_data,
+            change=set_flag,
+        )
+        self.logger.info(
+            "%s 'flag' response: %s", "Enable" if flag else "Disable", updated_ch_r
+        )
+        if not updated_ch_r or not updated_ch_r.get("results"):
+            msg = f"Error updating chain requests: {ch_req_prepid}"
+            self.logger.error(msg)
+            raise RuntimeError(msg)
+
+    def _rewind_chain_request(self, ch_req_prepid: str) -> None:
+        """
+        Rewinds the chain request to `root`.
+
+        Raises:
+            RuntimeError: If the chain request could not be rewound.
+        """
+        rewind_endpoint = f"restapi/chained_requests/rewind_to_root/{ch_req_prepid}"
+        rewind_response = self.mcm._get(rewind_endpoint)
+        self.logger.info("Rewind chain request response: %s", rewind_response)
+        if not rewind_response or not rewind_response.get("results"):
+            msg = f"Unable to rewind chain request to root ({ch_req_prepid}) - Details: {rewind_response}"
+            self.logger.error(msg)
+            raise RuntimeError(msg)
+
+    def _full_reset_root_request(self, root_request_prepid: str) -> None:
+        """
+        Full resets the root request, it is required to properly delete the chains.
+
+        Raises:
+            RuntimeError: If the root request could not be reset.
+        """
+        self.logger.warning(
+            "Full resetting the root request (%s) as it is required to properly delete the chains",
+            root_request_prepid,
+        )
+        result = self.mcm.reset(prepid=root_request_prepid)
+        if not result:
+            raise RuntimeError("Unable to reset the root request", result)
 
     def _invalidate_delete_root_request(
         self, root_prepid: str, remove_root: bool = False, remove_chain: bool = False
@@ -322,18 +608,55 @@ class InvalidateDeleteRequests:
         Filter the given request's prepids and only pick
         those related only to root requests.
         """
-        root_requests: list[str] = []
-        for rid in requests_prepid:
-            if self.mcm.is_root_request(request=rid):
-                root_requests.append(rid)
+        is_root = self.mcm.are_root_requests(prepids=requests_prepid)
+        root_requests: list[str] = [rid for rid in requests_prepid if is_root[rid]]
         return root_requests
 
+    def _process_root_request(
+        self,
+        root_prepid: str,
+        remove_root: bool,
+        remove_chain: bool,
+        position: str,
+    ) -> bool:
+        """
+        Processes one root request, see `_invalidate_delete_root_request`.
+        Errors are recorded instead of raised, so that they do not stop
+        processing the other root requests.
+
+        Args:
+            position: Position of the root request in the batch, for logging.
+
+        Returns:
+            True if the root request was processed successfully.
+        """
+        token = _current_root.set(root_prepid)
+        try:
+            self.logger.info("(%s) Processing root request", position)
+            self._invalidate_delete_root_request(
+                root_prepid=root_prepid,
+                remove_root=remove_root,
+                remove_chain=remove_chain,
+            )
+            return True
+        except Exception as e:
+            self.logger.error(
+                "Unable to process root request (%s): %s",
+                root_prepid,
+                e,
+                exc_info=True,
+            )
+            return False
+        finally:
+            _current_root.reset(token)
+
     def invalidate_delete_cascade_requests(
         self,
         requests_prepid: list[str],
         remove_root: bool = False,
         remove_chain: bool = False,
         limit: int = 2**64,
+        workers: int = 1,
     ) -> dict[str, list[str]]:
         """
         Invalidate and delete all the request including into the
@@ -350,9 +673,13 @@ class InvalidateDeleteRequests:
             remove_chain: After removing the intermediate requests,
                 remove the chain or re-enable it chain again.
             limit: Process root requests until the limit is reached.
+            workers: Number of root requests processed at the same time.
+                Each root request is processed by one worker, with its
+                own HTTP session. Its log records are prefixed with its prepid.
 
         Returns:
             Details about the requests processed in three categories: Success, Failed, Filtered.
+            The root requests are listed in the order they were provided.
         """
         root_request_prepids: list[str] = self._filter_root_requests(
             requests_prepid=deepcopy(requests_prepid)
@@ -365,35 +692,37 @@ class InvalidateDeleteRequests:
                 pformat(discarded_prepids),
             )
 
-        failed_requests: list[str] = []
-        success_requests: list[str] = []
+        to_process = root_request_prepids[:limit]
         total_to_process = len(root_request_prepids)
-        for idx, root_prepid in enumerate(root_request_prepids, start=1):
-            try:
+        if len(to_process) < total_to_process:
+            self.logger.info(
+                "Early stopping processing root requests after %s of them",
+                len(to_process),
+            )
+
+        def process(idx: int, root_prepid: str) -> bool:
+            return self._process_root_request(
+                root_prepid=root_prepid,
+                remove_root=remove_root,
+                remove_chain=remove_chain,
+                position=f"{idx}/{total_to_process}",
+            )
+
+        positions = range(1, len(to_process) + 1)
+        with self._lookup_pool(), self._step_pool():
+            if workers <= 1:
+                outcomes = list(map(process, positions, to_process))
+            else:
                 self.logger.info(
-                    "(%s/%s) Processing root request", idx, total_to_process
+                    "Processing %s root requests with %s workers",
+                    len(to_process),
+                    workers,
                 )
-                self._invalidate_delete_root_request(
-                    root_prepid=root_prepid,
-                    remove_root=remove_root,
-                    remove_chain=remove_chain,
-                )
-                success_requests.append(root_prepid)
-            except Exception as e:
-                self.logger.error(
-                    "Unable to process root request (%s): %s",
-                    root_prepid,
-                    e,
-                    exc_info=True,
-                )
-                failed_requests.append(root_prepid)
-            finally:
-                if limit <= idx:
-                    self.logger.info("Early stopping processing root requests...")
-                    break
+                with self.mcm._worker_pool(max_workers=workers) as executor:
+                    outcomes = list(executor.map(process, positions, to_process))
 
         return {
-            "success": success_requests,
-            "failed": failed_requests,
+            "success": [r for r, ok in zip(to_process, outcomes) if ok],
+            "failed": [r for r, ok in zip(to_process, outcomes) if not ok],
             "filtered": discarded_prepids,
         }
@@ -44,6 +44,10 @@ class ChainRequestResubmitter:
         mcm: McM client instance
     """
 
+    # Seconds to wait for a request to reach the desired approval/status.
+    # Injecting the root request takes ~3 to 5 min.
+    APPROVAL_DEADLINE = 900.0
+
     def __init__(self, mcm: McM) -> None:
         self._mcm = mcm
         self._invalidator = InvalidateDeleteRequests(mcm=self._mcm)
@@ -249,7 +253,11 @@ class ChainRequestResubmitter:
             )
 
     def _approve_request_until(
-        self, request_prepid: str, approval: str, status: str
+        self,
+        request_prepid: str,
+        approval: str,
+        status: str,
+        deadline: Union[float, None] = APPROVAL_DEADLINE,
     ) -> None:
         """
         Approves one request until a desired state.
@@ -258,42 +266,51 @@ class ChainRequestResubmitter:
             request_prepid: Request identifier.
             approval: Desired approval for the request.
             status: Desired status for the request.
-        """
-        request: Union[dict, None] = self._mcm.get(
-            object_type="requests", object_id=request_prepid
-        )
-        if not request:
-            raise ValueError(f"Request not found: {request_prepid}")
+            deadline: Seconds available to reach the desired state.
+                None to wait as long as the approvals take.
 
-        is_root: bool = self._mcm.is_root_request(request=request)
-        attempts = 10
-        for _ in range(attempts):
-            request = self._mcm.get(object_type="requests", object_id=request_prepid)
-            req_approval = request.get("approval")
-            req_status = request.get("status")
-
-            if approval == req_approval and status == req_status:
-                return
-
-            approve_result = self._mcm.approve(
+        Raises:
+            DeadlineExceeded: If the request did not reach the desired
+                state before the deadline.
+        """
+        with self._mcm.deadline(deadline):
+            request: Union[dict, None] = self._mcm.get(
                 object_type="requests", object_id=request_prepid
             )
-            if not approve_result or not approve_result.get("results"):
-                if approve_result and is_root:
-                    message = approve_result.get("message", "")
-                    if "Illegal Approval Step: 5" in message:
-                        return
+            if not request:
+                raise ValueError(f"Request not found: {request_prepid}")
+
+            is_root: bool = self._mcm.is_root_request(request=request)
+            attempts = 10
+            for _ in range(attempts):
+                request = self._mcm.get(
+                    object_type="requests", object_id=request_prepid
+                )
+                req_approval = request.get("approval")
+                req_status = request.get("status")
 
-                msg = (
-                    "Unable to approve the request to the next status - "
-                    f"Request PrepID: {request_prepid} - "
-                    f"Current approval/status: {req_approval}/{req_status} - "
-                    f"Details: {pformat(approve_result)}"
+                if approval == req_approval and status == req_status:
+                    return
+
+                approve_result = self._mcm.approve(
+                    object_type="requests", object_id=request_prepid
                 )
-                self.logger.error(msg)
-                raise RuntimeError(msg)
+                if not approve_result or not approve_result.get("results"):
+                    if approve_result and is_root:
+                        message = approve_result.get("message", "")
+                        if "Illegal Approval Step: 5" in message:
+                            return
+
+                    msg = (
+                        "Unable to approve the request to the next status - "
+                        f"Request PrepID: {request_prepid} - "
+                        f"Current approval/status: {req_approval}/{req_status} - "
+                        f"Details: {pformat(approve_result)}"
+                    )
+                    self.logger.error(msg)
+                    raise RuntimeError(msg)
 
-        raise RuntimeError("Unable to get the desired approval status")
+            raise RuntimeError("Unable to get the desired approval status")
 
     def _perform_chain_request_injection(
         self, chain_request_prepid: str, root_request_processing: RootRequestReset
@@ -0,0 +1,232 @@
+"""
+Pagination engine shared by the application clients
+to walk search results spread across several pages.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Iterator, Union
+
+from requests.exceptions import Timeout
+
+
+class Paginator:
+    """
+    Walks a paginated search in order, requesting the following pages
+    before the current one is consumed.
+
+    The first page is fetched in the calling thread. Only if it is full,
+    the following ones are requested through the executor: the number of
+    pages in flight starts at two and doubles after every full page, up
+    to `prefetch`, so that short searches cost a single request and no
+    worker thread while long ones are fetched concurrently.
+
+    Attributes:
+        fetch_page: Retrieves the results for a page number, starting from 0.
+        page_size: Expected number of results in a full page. A page
+            with fewer results is considered the last one if the server
+            honors this page size. If not known, the search stops at the
+            first empty page.
+        honored_page_size: Largest page size the server is known to honor.
+            If `page_size` exceeds it, the server could have capped it, so
+            a page with fewer results only ends the search once a page
+            came back full. Otherwise, the search stops at the first empty
+            page. If not given, `page_size` is assumed to be honored.
+        prefetch: Maximum number of pages requested at the same time.
+        executor: Executor to fetch the pages concurrently. If not provided,
+            pages are fetched sequentially.
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[int], list],
+        page_size: Union[int, None] = None,
+        prefetch: int = 1,
+        executor: Union[Executor, None] = None,
+        honored_page_size: Union[int, None] = None,
+    ):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.prefetch = max(prefetch, 1)
+        self.executor = executor
+        self.honored_page_size = honored_page_size
+
+    def _is_honored(self) -> bool:
+        """
+        Checks if the server is known to honor the page size.
+        """
+        if self.honored_page_size is None:
+            return True
+        if not self.page_size:
+            return False
+        return self.page_size <= self.honored_page_size
+
+    def _is_last(self, page_results: list, honored: bool) -> bool:
+        """
+        Checks if there are no more results after the given page.
+
+        Args:
+            page_results: Results of the page.
+            honored: Whether the server is known to honor the page size.
+        """
+        if not page_results:
+            return True
+        if self.page_size and len(page_results) < self.page_size:
+            return honored
+        return False
+
+    def _sequential_pages(self, page: int = 0) -> Iterator[list]:
+        honored = self._is_honored()
+        while True:
+            page_results = self.fetch_page(page)
+            if page_results:
+                yield page_results
+            if self._is_last(page_results, honored):
+                return
+            honored = honored or len(page_results) == self.page_size
+            page += 1
+
+    def pages(self) -> Iterator[list]:
+        """
+        Yields the non-empty pages in order.
+        """
+        if not self.executor or self.prefetch == 1:
+            yield from self._sequential_pages()
+            return
+
+        honored = self._is_honored()
+        page_results = self.fetch_page(0)
+        if page_results:
+            yield page_results
+        if self._is_last(page_results, honored):
+            return
+        honored = honored or len(page_results) == self.page_size
+
+        pending: deque[Future] = deque()
+        window = min(2, self.prefetch)
+        next_page = 1
+        try:
+            while True:
+                while len(pending) < window:
+                    pending.append(self.executor.submit(self.fetch_page, next_page))
+                    next_page += 1
+
+                page_results = pending.popleft().result()
+                if page_results:
+                    yield page_results
+                if self._is_last(page_results, honored):
+                    return
+                honored = honored or len(page_results) == self.page_size
+
+                window = min(window * 2, self.prefetch)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class AdaptivePaginator:
+    """
+    Walks a paginated search in order, tuning the page size on the fly.
+
+    The page size doubles while the responses are received within the
+    latency and payload budgets, and it is halved when they exceed them
+    or the request times out. As the server locates a page by its number,
+    the page size only changes when the current offset is a multiple of the
+    new size, so that no result is skipped or repeated.
+
+    The server could cap the page size: a page shorter than requested
+    with a size larger than any already honored is fetched again with the
+    largest honored size, which then becomes the upper bound. For this
+    reason, the initial page size must be honored by the server.
+
+    Attributes:
+        fetch_page: Retrieves a page given its number and size. It returns
+            the page results and the size of the response payload in bytes.
+        page_size: Current page size, the initial one must be honored by
+            the server.
+        min_page_size: Lower bound for the page size.
+        max_page_size: Upper bound for the page size.
+        target_latency: Time budget, in seconds, to receive one page.
+        max_payload: Payload budget, in bytes, for one page.
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[int, int], tuple[list, int]],
+        page_size: int = 50,
+        min_page_size: int = 10,
+        max_page_size: int = 5000,
+        target_latency: float = 2.0,
+        max_payload: int = 8 * 1024 * 1024,
+    ):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.min_page_size = min_page_size
+        self.max_page_size = max_page_size
+        self.target_latency = target_latency
+        self.max_payload = max_payload
+
+    def _shrink(self) -> bool:
+        """
+        Halves the page size if possible.
+
+        Returns:
+            True if the page size changed.
+        """
+        smaller = self.page_size // 2
+        if self.page_size % 2 or smaller < self.min_page_size:
+            return False
+
+        self.page_size = smaller
+        return True
+
+    def _adapt(self, latency: float, payload: int, offset: int) -> None:
+        """
+        Tunes the page size for the next page based on the last response.
+        """
+        if latency > self.target_latency or payload > self.max_payload:
+            self._shrink()
+            return
+
+        # Grow only if there is room to double the page within the budget
+        bigger = self.page_size * 2
+        within_budget = (
+            latency * 2 <= self.target_latency and payload * 2 <= self.max_payload
+        )
+        if within_budget and bigger <= self.max_page_size and offset % bigger == 0:
+            self.page_size = bigger
+
+    def pages(self) -> Iterator[list]:
+        """
+        Yields the non-empty pages in order.
+
+        Raises:
+            Timeout: If a page still times out using the minimum page size.
+        """
+        offset = 0
+        # Largest page size the server honored
+        honored = self.page_size
+        while True:
+            page_size = self.page_size
+            start = time.monotonic()
+            try:
+                page_results, payload = self.fetch_page(offset // page_size, page_size)
+            except Timeout:
+                if self._shrink():
+                    continue
+                raise
+
+            latency = time.monotonic() - start
+            if page_results and len(page_results) < page_size and page_size > honored:
+                # The page size could have been capped: fetch the page again
+                self.page_size = self.max_page_size = honored
+                continue
+            if page_results:
+                yield page_results
+            if len(page_results) < page_size:
+                return
+
+            honored = max(honored, page_size)
+            offset += page_size
+            self._adapt(latency=latency, payload=payload, offset=offset)
@@ -18,6 +18,7 @@ class ReReco(BaseClient):
             dev: bool = True,
             client_id: str = "",
             client_secret: str = "",
+            **kwargs,
     ):
 
         # Set the HTTP session
@@ -29,6 +30,7 @@ class ReReco(BaseClient):
             dev=dev,
             client_id=client_id,
             client_secret=client_secret,
+            **kwargs,
         )
 
     def get(self, object_type, object_id=None, query=None ,method="get", page=-1):
@@ -50,15 +52,13 @@ class ReReco(BaseClient):
                 results = self._get(url).get("response",{}).get("results", [])
                 return results
             else:
-                page_results = [{}]
                 results = []
-                page = 0
-                while page_results:
-                    page_results = self.get(
+                for page_results in self._paginate(
+                    fetch_page=lambda page: self.get(
                         object_type=object_type, query=query, method=method, page=page
                     )
+                ):
                     results += page_results
-                    page += 1
 
                 return results
         else:
@@ -0,0 +1,115 @@
+"""
+Runs a set of operations that depend on each other, sending
+at the same time the ones whose dependencies are complete.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Iterable, Union
+
+
+class TaskGraph:
+    """
+    Directed acyclic graph of tasks.
+
+    A task is added after the tasks it depends on, so the graph cannot
+    have cycles and the insertion order is a valid sequential order.
+    """
+
+    def __init__(self):
+        self._tasks: dict[str, Callable[[], Any]] = {}
+        self._dependencies: dict[str, tuple[str, ...]] = {}
+
+    def add(self, name: str, func: Callable[[], Any], after: Iterable[str] = ()) -> str:
+        """
+        Adds a task.
+
+        Args:
+            name: Unique task name.
+            func: Operation to perform.
+            after: Names of the tasks that must complete before this one.
+
+        Returns:
+            The task name, to reference it as a dependency.
+
+        Raises:
+            ValueError: If the name is already taken or a dependency
+                does not exist yet.
+        """
+        if name in self._tasks:
+            raise ValueError(f"Task already exists: {name}")
+
+        dependencies = tuple(dict.fromkeys(after))
+        unknown = [d for d in dependencies if d not in self._tasks]
+        if unknown:
+            raise ValueError(f"Unknown dependencies for {name}: {unknown}")
+
+        self._tasks[name] = func
+        self._dependencies[name] = dependencies
+        return name
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tasks
+
+    def depth(self) -> int:
+        """
+        Number of tasks in the longest chain of dependencies, i.e. the
+        minimum number of sequential steps to run the graph.
+        """
+        levels: dict[str, int] = {}
+        for name, dependencies in self._dependencies.items():
+            levels[name] = 1 + max((levels[d] for d in dependencies), default=0)
+        return max(levels.values(), default=0)
+
+    def run(self, executor: Union[Executor, None] = None) -> dict[str, Any]:
+        """
+        Runs the tasks, each one as soon as its dependencies are complete.
+        If a task fails, no more tasks are started and, once the running
+        ones finish, its exception is raised.
+
+        Args:
+            executor: Runs the tasks that are ready at the same time. If
+                not provided, the tasks run one by one in insertion order.
+
+        Returns:
+            The result of each task, keyed by name.
+        """
+        if executor is None:
+            return {name: func() for name, func in self._tasks.items()}
+
+        pending = {name: set(deps) for name, deps in self._dependencies.items()}
+        dependents: dict[str, list[str]] = {name: [] for name in self._tasks}
+        for name, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+
+        results: dict[str, Any] = {}
+        running: dict[Future, str] = {}
+        error: Union[BaseException, None] = None
+
+        def submit_ready(names: Iterable[str]) -> None:
+            for name in names:
+                if not pending[name]:
+                    del pending[name]
+                    running[executor.submit(self._tasks[name])] = name
+
+        submit_ready(list(pending))
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+
+                results[name] = future.result()
+                if error is None:
+                    for dependent in dependents[name]:
+                        pending[dependent].discard(name)
+                    submit_ready(dependents[name])
+
+        if error is not None:
+            raise error
+        return results
@@ -19,6 +19,7 @@ class Stats2(BaseClient):
         dev: bool = True,
         client_id: str = "",
         client_secret: str = "",
+        **kwargs,
     ):
         # Set the HTTP session
         super().__init__(
@@ -29,6 +30,7 @@ class Stats2(BaseClient):
             dev=dev,
             client_id=client_id,
             client_secret=client_secret,
+            **kwargs,
         )
 
     def get_workflow(self, workflow_name: str) -> dict:
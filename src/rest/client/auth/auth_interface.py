@@ -4,6 +4,7 @@ for an HTTP client session.
 """
 
 from abc import ABC, abstractmethod
+from typing import Union
 
 from requests import Response, Session
 
@@ -23,6 +24,10 @@ class AuthInterface(ABC):
     For more details, check the `handlers` module.
     """
 
+    # Connect and read timeouts, in seconds, for the requests sent to the
+    # CERN Auth service and to probe the web application.
+    TIMEOUT: tuple[float, float] = (10.0, 30.0)
+
     @abstractmethod
     def _load_credential(self):
         """
@@ -69,6 +74,44 @@ class AuthInterface(ABC):
         """
         ...
 
+    def expires_at(self) -> Union[float, None]:
+        """
+        Reports when the current credential expires.
+
+        Returns:
+            Expiration time as epoch seconds, None if it is unknown.
+        """
+        return None
+
+    def refresh(self) -> bool:
+        """
+        Renews the current credential without human interaction,
+        before it expires.
+
+        Returns:
+            True if the credential was renewed.
+        """
+        return False
+
+    def credential_rejected(self, response: Response) -> bool:
+        """
+        Checks whether a response that failed `validate_response` means the
+        credential sent is not valid anymore and must be renewed, instead of
+        lacking the permissions for the requested resource.
+
+        Returns:
+            True if the credential must be renewed.
+        """
+        return not self.validate_response(response)
+
+    def discard_credential(self, response: Response) -> None:
+        """
+        Notifies the credential sent to get the given response was rejected
+        by the target web application so that it is not considered valid
+        anymore, even if it has not expired yet.
+        """
+        pass
+
     @abstractmethod
     def configure(self, session: Session) -> Session:
         """
@@ -3,18 +3,98 @@ This module provides a handler
 to authenticate requests using OAuth2 tokens.
 """
 
+import base64
+import binascii
 import json
 import os
+import time
 from json import JSONDecodeError
 from pathlib import Path
+from typing import Union
 
 import requests
+from requests import Response
 from requests.sessions import Session
 
 from rest.client.auth.auth_interface import AuthInterface
+from rest.client.auth.lock import CredentialLock
+from rest.client.deadline import timeout_for
 from rest.utils.logger import LoggerFactory
 
 
+def _token_claims(raw_token: str) -> dict:
+    """
+    Decodes the claims of a JSON Web Token without verifying its
+    signature. This is only meant to read metadata, like its expiration time.
+
+    Returns:
+        The token claims, empty if the token is not a JWT.
+    """
+    try:
+        payload = raw_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims if isinstance(claims, dict) else {}
+    except (IndexError, ValueError, binascii.Error):
+        return {}
+
+
+def _token_expiration(credential: dict) -> Union[float, None]:
+    """
+    Computes when a credential expires, using the `exp` claim of
+    the access token or, if not available, the time the credential was
+    obtained and its `expires_in` attribute.
+
+    Returns:
+        Expiration time as epoch seconds, None if it is unknown.
+    """
+    claims = _token_claims(credential.get("access_token", ""))
+    expiration = claims.get("exp")
+    if isinstance(expiration, (int, float)):
+        return float(expiration)
+
+    obtained_at = credential.get("obtained_at")
+    expires_in = credential.get("expires_in")
+    if isinstance(obtained_at, (int, float)) and isinstance(expires_in, (int, float)):
+        return float(obtained_at + expires_in)
+
+    return None
+
+
+def _sent_token(response: Response) -> str:
+    """
+    Retrieves the bearer token sent in the request that produced
+    the given response, before any redirection.
+    """
+    original = response.history[0] if response.history else response
+    authorization = original.request.headers.get("Authorization", "")
+    if isinstance(authorization, bytes):
+        authorization = authorization.decode("latin-1")
+    return authorization.removeprefix("Bearer ")
+
+
+def _token_rejected(response: Response) -> bool:
+    """
+    Checks whether the web application refused the bearer token sent:
+    the request was answered with 401 or redirected to the CERN
+    Authentication login page. A 403 only means the token is not valid
+    if it has expired: McM also answers 403 when the user does not have
+    the role required for an operation.
+    """
+    if (
+        response.url.startswith("https://auth.cern.ch/auth/realms/cern")
+        or response.status_code == 401
+    ):
+        return True
+    if response.status_code == 403:
+        expiration = _token_claims(_sent_token(response)).get("exp")
+        if isinstance(expiration, (int, float)):
+            return time.time() >= expiration
+        return True
+
+    return False
+
+
 class AccessTokenHandler(AuthInterface):
     """
     Loads an access token from a JSON file and configures
@@ -37,6 +117,10 @@ class AccessTokenHandler(AuthInterface):
 
     TOKEN_ENDPOINT = "https://auth.cern.ch/auth/realms/cern/api-access/token"
 
+    # Consider the token expired some seconds before, to avoid using it
+    # while it expires in flight.
+    EXPIRATION_MARGIN = 60
+
     def __init__(
         self,
         url: str,
@@ -51,6 +135,7 @@ class AccessTokenHandler(AuthInterface):
         self._client_secret = client_secret
         self._target_application = target_application
         self._credential: dict = {}
+        self._rejected_token: str = ""
         self._logger = LoggerFactory.getLogger("pdmv-http-client.client")
 
     def _load_credential(self) -> dict:
@@ -70,6 +155,7 @@ class AccessTokenHandler(AuthInterface):
                 "client_secret": self._client_secret,
                 "audience": self._target_application,
             },
+            timeout=timeout_for(self.TIMEOUT),
         )
 
         if access_token.status_code != 200:
@@ -79,7 +165,9 @@ class AccessTokenHandler(AuthInterface):
             )
             raise PermissionError(msg)
 
-        return access_token.json()
+        credential = access_token.json()
+        credential["obtained_at"] = time.time()
+        return credential
 
     def _save_credential(self) -> None:
         with open(file=self._credential_path, mode="w", encoding="utf-8") as f:
@@ -88,18 +176,20 @@ class AccessTokenHandler(AuthInterface):
         os.chmod(path=self._credential_path, mode=0o600)
 
     def authenticate(self) -> None:
-        loaded_access_token = self._load_credential()
-        if self._validate(access_token=loaded_access_token):
-            self._credential = loaded_access_token
-            return
-
-        # Access token is not valid anymore, request another one
-        self._logger.debug("Access token is not valid, requesting a new one")
-        new_access_token = self._request_credential()
-        if self._validate(access_token=new_access_token):
-            self._credential = new_access_token
-            self._save_credential()
-            return
+        # Only one thread or process renews the token, the rest reuse it.
+        with CredentialLock(self._credential_path):
+            loaded_access_token = self._load_credential()
+            if self._validate(access_token=loaded_access_token):
+                self._credential = loaded_access_token
+                return
+
+            # Access token is not valid anymore, request another one
+            self._logger.debug("Access token is not valid, requesting a new one")
+            new_access_token = self._request_credential()
+            if self._validate(access_token=new_access_token):
+                self._credential = new_access_token
+                self._save_credential()
+                return
 
     def configure(self, session: Session) -> Session:
         if not self._credential:
@@ -109,18 +199,60 @@ class AccessTokenHandler(AuthInterface):
         session.headers.update({"Authorization": f"Bearer {raw_access_token}"})
         return session
 
+    def expires_at(self) -> Union[float, None]:
+        return _token_expiration(self._credential)
+
+    def refresh(self) -> bool:
+        with CredentialLock(self._credential_path):
+            # Another thread or process could have renewed it already
+            loaded_access_token = self._load_credential()
+            loaded_expiration = _token_expiration(loaded_access_token) or 0
+            if loaded_expiration > (self.expires_at() or 0) and self._validate(
+                access_token=loaded_access_token
+            ):
+                self._credential = loaded_access_token
+                return True
+
+            # Client credentials are enough to request a new access token
+            try:
+                new_access_token = self._request_credential()
+            except (PermissionError, requests.RequestException) as e:
+                self._logger.warning("Unable to renew the access token: %s", e)
+                return False
+
+            self._credential = new_access_token
+            self._save_credential()
+            return True
+
+    def credential_rejected(self, response: Response) -> bool:
+        return _token_rejected(response)
+
+    def discard_credential(self, response: Response) -> None:
+        if self.credential_rejected(response):
+            self._rejected_token = _sent_token(response)
+
     def _validate(self, access_token: dict) -> bool:
         """
         Checks if the provided access token is valid to consume a resource in
-        the target web application.
+        the target web application. The token's expiration time is checked
+        locally; the target web application is only queried if it is unknown.
 
         Args:
             access_token: OAuth2 access token retrieve from
                 CERN Authentication service.
         """
         raw_access_token = access_token.get("access_token", "")
+        if not raw_access_token or raw_access_token == self._rejected_token:
+            return False
+
+        expiration = _token_expiration(access_token)
+        if expiration is not None:
+            return time.time() < expiration - self.EXPIRATION_MARGIN
+
         test_response = requests.get(
-            self._url, headers={"Authorization": f"Bearer {raw_access_token}"}
+            self._url,
+            headers={"Authorization": f"Bearer {raw_access_token}"},
+            timeout=timeout_for(self.TIMEOUT),
         )
         return self.validate_response(test_response)
 
@@ -152,6 +284,10 @@ class IDTokenHandler(AuthInterface):
         "https://auth.cern.ch/auth/realms/cern/protocol/openid-connect/auth/device"
     )
 
+    # Consider the token expired some seconds before, to avoid using it
+    # while it expires in flight.
+    EXPIRATION_MARGIN = 60
+
     def __init__(
         self,
         url: str,
@@ -162,6 +298,7 @@ class IDTokenHandler(AuthInterface):
         self._credential_path = credential_path
         self._target_application = target_application
         self._credential: dict = {}
+        self._rejected_token: str = ""
         self._logger = LoggerFactory.getLogger("pdmv-http-client.client")
 
     def _load_credential(self) -> dict:
@@ -188,6 +325,7 @@ class IDTokenHandler(AuthInterface):
                 "refresh_token": self._credential.get("refresh_token", ""),
             },
             headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=timeout_for(self.TIMEOUT),
         )
         details = refresh_request.json()
         if refresh_request.status_code != 200:
@@ -199,6 +337,7 @@ class IDTokenHandler(AuthInterface):
             return {}
 
         id_token = details
+        id_token["obtained_at"] = time.time()
         return id_token
 
     def _request_new_id_token(self) -> dict:
@@ -215,6 +354,7 @@ class IDTokenHandler(AuthInterface):
             url=IDTokenHandler.DEVICE_ENDPOINT,
             data={"client_id": self._target_application},
             headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=timeout_for(self.TIMEOUT),
         )
         self._logger.info(
             "Go to: %s\n", device_code.json()["verification_uri_complete"]
@@ -238,6 +378,7 @@ class IDTokenHandler(AuthInterface):
                 "client_id": self._target_application,
             },
             headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=timeout_for(self.TIMEOUT),
         )
 
         completion_details = device_completion.json()
@@ -249,6 +390,7 @@ class IDTokenHandler(AuthInterface):
             raise PermissionError(msg)
 
         id_token = completion_details
+        id_token["obtained_at"] = time.time()
         return id_token
 
     def _request_credential(self) -> dict:
@@ -270,18 +412,20 @@ class IDTokenHandler(AuthInterface):
         os.chmod(path=self._credential_path, mode=0o600)
 
     def authenticate(self) -> None:
-        loaded_id_token = self._load_credential()
-        if self._validate(id_token=loaded_id_token):
-            self._credential = loaded_id_token
-            return
-
-        # ID token is not valid anymore, request another one
-        self._logger.debug("ID token is not valid, requesting a new one")
-        new_id_token = self._request_credential()
-        if self._validate(id_token=new_id_token):
-            self._credential = new_id_token
-            self._save_credential()
-            return
+        # Only one thread or process renews the token, the rest reuse it.
+        with CredentialLock(self._credential_path):
+            loaded_id_token = self._load_credential()
+            if self._validate(id_token=loaded_id_token):
+                self._credential = loaded_id_token
+                return
+
+            # ID token is not valid anymore, request another one
+            self._logger.debug("ID token is not valid, requesting a new one")
+            new_id_token = self._request_credential()
+            if self._validate(id_token=new_id_token):
+                self._credential = new_id_token
+                self._save_credential()
+                return
 
     def configure(self, session: Session) -> Session:
         if not self._credential:
@@ -291,17 +435,62 @@ class IDTokenHandler(AuthInterface):
         session.headers.update({"Authorization": f"Bearer {raw_access_token}"})
         return session
 
+    def expires_at(self) -> Union[float, None]:
+        return _token_expiration(self._credential)
+
+    def refresh(self) -> bool:
+        with CredentialLock(self._credential_path):
+            # Another thread or process could have renewed it already
+            loaded_id_token = self._load_credential()
+            loaded_expiration = _token_expiration(loaded_id_token) or 0
+            if loaded_expiration > (self.expires_at() or 0) and self._validate(
+                id_token=loaded_id_token
+            ):
+                self._credential = loaded_id_token
+                return True
+
+            # Only the refresh token is used, the device flow requires human interaction
+            try:
+                new_id_token = self._refresh_token()
+            except requests.RequestException as e:
+                self._logger.warning("Unable to refresh the ID token: %s", e)
+                return False
+
+            if not new_id_token:
+                return False
+
+            self._credential = new_id_token
+            self._save_credential()
+            return True
+
+    def credential_rejected(self, response: Response) -> bool:
+        return _token_rejected(response)
+
+    def discard_credential(self, response: Response) -> None:
+        if self.credential_rejected(response):
+            self._rejected_token = _sent_token(response)
+
     def _validate(self, id_token: dict) -> bool:
         """
         Checks if the provided ID token is valid to consume a resource in
-        the target web application.
+        the target web application. The token's expiration time is checked
+        locally; the target web application is only queried if it is unknown.
 
         Args:
             id_token: OIDC ID token retrieve from
                 CERN Authentication service.
         """
         raw_access_token = id_token.get("access_token", "")
+        if not raw_access_token or raw_access_token == self._rejected_token:
+            return False
+
+        expiration = _token_expiration(id_token)
+        if expiration is not None:
+            return time.time() < expiration - self.EXPIRATION_MARGIN
+
         test_response = requests.get(
-            self._url, headers={"Authorization": f"Bearer {raw_access_token}"}
+            self._url,
+            headers={"Authorization": f"Bearer {raw_access_token}"},
+            timeout=timeout_for(self.TIMEOUT),
         )
         return self.validate_response(test_response)
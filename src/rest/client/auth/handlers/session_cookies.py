@@ -12,6 +12,8 @@ import requests
 from requests.sessions import Session
 
 from rest.client.auth.auth_interface import AuthInterface
+from rest.client.auth.lock import CredentialLock
+from rest.client.deadline import timeout_for
 from rest.utils.logger import LoggerFactory
 from rest.utils.shell import run_command
 
@@ -67,19 +69,21 @@ class SessionCookieHandler(AuthInterface):
         os.chmod(path=self._credential_path, mode=0o600)
 
     def authenticate(self) -> None:
-        loaded_cookie = self._load_credential()
-        if self._validate(cookie=loaded_cookie):
-            self._credential = loaded_cookie
-            self._save_credential()
-            return
-
-        # The credential is not valid anymore, renew it.
-        self._logger.debug("Session cookie is not valid, requesting a new one")
-        renewed_cookie = self._request_credential()
-        if self._validate(cookie=renewed_cookie):
-            self._credential = renewed_cookie
-            self._save_credential()
-            return
+        # Only one thread or process renews the cookie, the rest reuse it.
+        with CredentialLock(self._credential_path):
+            loaded_cookie = self._load_credential()
+            if self._validate(cookie=loaded_cookie):
+                self._credential = loaded_cookie
+                self._save_credential()
+                return
+
+            # The credential is not valid anymore, renew it.
+            self._logger.debug("Session cookie is not valid, requesting a new one")
+            renewed_cookie = self._request_credential()
+            if self._validate(cookie=renewed_cookie):
+                self._credential = renewed_cookie
+                self._save_credential()
+                return
 
         # It is not possible to authenticate a request
         # using session cookies.
@@ -106,5 +110,7 @@ class SessionCookieHandler(AuthInterface):
         Args:
             cookie: Cookie to check.
         """
-        test_response = requests.get(self._url, cookies=cookie)
+        test_response = requests.get(
+            self._url, cookies=cookie, timeout=timeout_for(self.TIMEOUT)
+        )
         return self.validate_response(test_response)
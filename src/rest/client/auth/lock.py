@@ -0,0 +1,83 @@
+"""
+Serializes the access to a credential file across the threads
+and processes sharing it, so that only one of them renews it
+while the others wait and reuse the result.
+"""
+
+import threading
+from pathlib import Path
+from typing import IO, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+class CredentialLock:
+    """
+    Reentrant lock for a credential file. It combines a lock shared by
+    all the threads of the process and an advisory lock (`flock`) on a
+    `<credential>.lock` file shared with other processes.
+
+    Attributes:
+        path: Credential file to protect.
+    """
+
+    _registry_lock = threading.Lock()
+    _thread_locks: dict[str, threading.RLock] = {}
+    _holders: dict[str, int] = {}
+    _files: dict[str, IO] = {}
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._key = str(self.path.absolute())
+        with CredentialLock._registry_lock:
+            self._thread_lock = CredentialLock._thread_locks.setdefault(
+                self._key, threading.RLock()
+            )
+
+    def _lock_file(self) -> Union[IO, None]:
+        if fcntl is None:
+            return None
+
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        try:
+            lock_file = open(file=lock_path, mode="a", encoding="utf-8")
+        except OSError:
+            # E.g. read-only folder: only the threads are synchronized
+            return None
+
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        except OSError:
+            lock_file.close()
+            raise
+        return lock_file
+
+    def __enter__(self) -> "CredentialLock":
+        self._thread_lock.acquire()
+        try:
+            # Only the outermost acquisition takes the file lock
+            holders = CredentialLock._holders.get(self._key, 0)
+            if holders == 0:
+                lock_file = self._lock_file()
+                if lock_file:
+                    CredentialLock._files[self._key] = lock_file
+            CredentialLock._holders[self._key] = holders + 1
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *args) -> None:
+        try:
+            holders = CredentialLock._holders[self._key] - 1
+            CredentialLock._holders[self._key] = holders
+            if holders == 0:
+                lock_file = CredentialLock._files.pop(self._key, None)
+                if lock_file:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    lock_file.close()
+        finally:
+            self._thread_lock.release()
@@ -0,0 +1,67 @@
+"""
+Renews credentials in the background before they expire,
+so that requests never carry an expired credential.
+"""
+
+import threading
+import time
+
+from rest.client.auth.auth_interface import AuthInterface
+from rest.utils.logger import LoggerFactory
+
+
+class CredentialRefresher:
+    """
+    Background thread that renews the handler's credential some time
+    before it expires. Handlers that do not know when their credential
+    expires (e.g. session cookies) are not refreshed; they keep relying
+    on the renewal after a rejected request.
+
+    Attributes:
+        handler: Authentication handler holding the credential.
+        margin: Seconds before the expiration to renew the credential.
+        retry_interval: Seconds to wait before retrying a failed renewal.
+    """
+
+    def __init__(
+        self, handler: AuthInterface, margin: float = 300, retry_interval: float = 30
+    ):
+        self.handler = handler
+        self.margin = margin
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="pdmv-http-client-refresher", daemon=True
+        )
+        self._logger = LoggerFactory.getLogger("pdmv-http-client.client")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            expiration = self.handler.expires_at()
+            if expiration is None:
+                self._logger.debug("Credential expiration unknown, not refreshing it")
+                return
+
+            # Check again after waking up, it could have been renewed meanwhile.
+            remaining = expiration - time.time()
+            if remaining > self.margin:
+                self._stop.wait(remaining - self.margin)
+                continue
+
+            self._logger.debug("Credential expires soon, renewing it")
+            if not self.handler.refresh():
+                self._stop.wait(self.retry_interval)
+                continue
+
+            # Avoid renewing short-lived credentials over and over
+            renewed_remaining = (self.handler.expires_at() or 0) - time.time()
+            if renewed_remaining <= self.margin:
+                self._stop.wait(max(renewed_remaining / 2, 1))
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,433 @@
+"""
+Caches the responses of read-only requests so that
+documents retrieved several times are only transferred once,
+in memory or persisted on disk.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Union
+
+from rest.client.codec import JSONCodec, default_codec
+
+
+class CacheEntry:
+    """
+    A cached response body and the metadata to decide whether it is
+    still usable or it must be revalidated with the server.
+
+    Attributes:
+        value: Decoded response body.
+        expires_at: Epoch time after which the entry is considered stale.
+        etag: `ETag` header received with the response, if any.
+        last_modified: `Last-Modified` header received with the response, if any.
+    """
+
+    def __init__(
+        self,
+        value: Any,
+        expires_at: float,
+        etag: Union[str, None] = None,
+        last_modified: Union[str, None] = None,
+    ):
+        self.value = value
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache for read-only requests.
+
+    Only the resources that are safe to reuse are cached: documents
+    retrieved by their identifier (e.g. `restapi/requests/get/<prepid>`)
+    and search results. Any other request touching a document evicts
+    the cached copies related to it. As the server could also modify
+    other objects as a side effect (e.g. resetting a request creates
+    invalidations), any request that is not read-only evicts all the
+    search results.
+
+    Attributes:
+        max_entries: Maximum number of cached responses. The least
+            recently used entry is evicted once the limit is reached.
+        ttl: Time to live, in seconds, for the cached responses.
+        ttl_by_type: Time to live, in seconds, for a particular object type
+            (e.g. `chained_campaigns`), it overrides the default one.
+    """
+
+    # Resources considered read-only: (object type, object ID) pairs.
+    _DOCUMENT = re.compile(
+        r"(?:^|/)(?:restapi|api)/(?P<type>[^/?]+)/get/(?P<id>[^/?]+)$"
+    )
+    _WORKFLOW = re.compile(r"(?:^|/)api/get_json/(?P<id>[^/?]+)$")
+    _SEARCH = re.compile(r"(?:^|/)search/?\?(?:.*&)?db_name=(?P<type>[^&]+)")
+
+    # Any other resource operating an object: `<type>/<action>[/<id>]`
+    _OPERATION = re.compile(
+        r"(?:^|/)(?:restapi|api)/(?P<type>[^/?]+)/(?P<action>[^/?]+)(?:/(?P<id>[^/?]+))?"
+    )
+
+    # Actions that only read data even if they are not sent via GET.
+    _READ_ONLY_ACTIONS = ("listwithfile", "get_role")
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 60.0,
+        ttl_by_type: Union[dict[str, float], None] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.ttl_by_type = ttl_by_type or {}
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @classmethod
+    def classify(cls, url: str) -> Union[tuple[str, Union[str, None]], None]:
+        """
+        Describes a read-only resource.
+
+        Returns:
+            The object type and the object ID, the latter is None for search
+            results. None if the resource is not cacheable.
+        """
+        path = url.split("?", 1)[0]
+        document = cls._DOCUMENT.search(path)
+        if document:
+            return document.group("type"), document.group("id")
+
+        workflow = cls._WORKFLOW.search(path)
+        if workflow:
+            return "workflows", workflow.group("id")
+
+        search = cls._SEARCH.search(url)
+        if search:
+            return search.group("type"), None
+
+        return None
+
+    def is_cacheable(self, url: str) -> bool:
+        return self.classify(url) is not None
+
+    def _ttl_for(self, url: str) -> float:
+        description = self.classify(url)
+        if not description:
+            return self.ttl
+        return self.ttl_by_type.get(description[0], self.ttl)
+
+    @staticmethod
+    def _revision_validator(value: Any) -> Union[str, None]:
+        """
+        Derives an entity tag from the document revision (`_rev`),
+        for servers that use it as their `ETag`.
+        """
+        if isinstance(value, dict) and isinstance(value.get("results"), dict):
+            revision = value["results"].get("_rev")
+            if revision:
+                return f'"{revision}"'
+        return None
+
+    # Storage primitives, the lock is held by the caller.
+    def _read(self, url: str) -> Union[CacheEntry, None]:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def _write(self, url: str, entry: CacheEntry) -> int:
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def _remove(self, object_type: str, object_id: Union[str, None]) -> int:
+        to_evict = []
+        for url in self._entries:
+            description = self.classify(url)
+            if not description:
+                continue
+            entry_type, entry_id = description
+            same_object = object_id is not None and entry_id == object_id
+            same_type = entry_type == object_type and (
+                entry_id is None or object_id is None
+            )
+            if same_object or same_type:
+                to_evict.append(url)
+
+        for url in to_evict:
+            del self._entries[url]
+        return len(to_evict)
+
+    def _remove_searches(self) -> int:
+        to_evict = []
+        for url in self._entries:
+            description = self.classify(url)
+            if description and description[1] is None:
+                to_evict.append(url)
+
+        for url in to_evict:
+            del self._entries[url]
+        return len(to_evict)
+
+    def _size(self) -> int:
+        return len(self._entries)
+
+    def _truncate(self) -> None:
+        self._entries.clear()
+
+    def lookup(self, url: str) -> Union[CacheEntry, None]:
+        """
+        Retrieves the cached entry for a resource, fresh or stale.
+        A fresh entry counts as a hit, anything else as a miss.
+        """
+        with self._lock:
+            entry = self._read(url)
+            if entry is not None and entry.fresh:
+                self._hits += 1
+            else:
+                self._misses += 1
+            return entry
+
+    def store(
+        self,
+        url: str,
+        value: Any,
+        etag: Union[str, None] = None,
+        last_modified: Union[str, None] = None,
+    ) -> None:
+        """
+        Caches the response for a resource, evicting the least recently
+        used entries if the cache is full.
+        """
+        entry = CacheEntry(
+            value=value,
+            expires_at=time.time() + self._ttl_for(url),
+            etag=etag or self._revision_validator(value),
+            last_modified=last_modified,
+        )
+        with self._lock:
+            self._evictions += self._write(url, entry)
+
+    def refresh(self, url: str) -> None:
+        """
+        Extends the lifetime of an entry the server confirmed is
+        still up to date.
+        """
+        with self._lock:
+            entry = self._read(url)
+            if entry is not None:
+                entry.expires_at = time.time() + self._ttl_for(url)
+                self._write(url, entry)
+
+    def invalidate(self, object_type: str, object_id: Union[str, None] = None) -> int:
+        """
+        Evicts the cached copies of an object and the search results
+        for its type, as they could include it.
+
+        Args:
+            object_type: Object type, e.g. requests.
+            object_id: Object identifier. If not provided, all the entries
+                related to the type are evicted.
+
+        Returns:
+            Number of evicted entries.
+        """
+        with self._lock:
+            evicted = self._remove(object_type=object_type, object_id=object_id)
+            self._invalidations += evicted
+            return evicted
+
+    def invalidate_request(
+        self, url: str, data: Union[dict, list, None] = None
+    ) -> None:
+        """
+        Evicts the entries related to the objects a non read-only
+        request operates on: the object referenced in the URL, the ones
+        included in its body and all the search results.
+
+        Args:
+            url: Resource URL, e.g. restapi/requests/approve/<prepid>
+            data: Request's body.
+        """
+        operation = self._OPERATION.search(url.split("?", 1)[0])
+        if operation and operation.group("action") in self._READ_ONLY_ACTIONS:
+            return
+
+        with self._lock:
+            self._invalidations += self._remove_searches()
+        if not operation:
+            return
+
+        object_type = operation.group("type")
+        object_ids: set[str] = set()
+        if operation.group("id"):
+            object_ids.add(operation.group("id"))
+        if isinstance(data, dict) and data.get("prepid"):
+            object_ids.add(data["prepid"])
+        elif isinstance(data, list):
+            object_ids.update(el for el in data if isinstance(el, str))
+
+        if not object_ids:
+            self.invalidate(object_type=object_type)
+        for object_id in object_ids:
+            self.invalidate(object_type=object_type, object_id=object_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._truncate()
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        """
+        Reports the cache usage.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": self._size(),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+class PersistentResponseCache(ResponseCache):
+    """
+    Response cache persisted in a SQLite database, so that it
+    could be reused by later executions.
+
+    Stale entries are not dropped, they are revalidated with the server
+    using their `ETag`, `Last-Modified` or document revision (`_rev`) and
+    only transferred again if they changed.
+
+    Attributes:
+        path: SQLite database file.
+        codec: Serializes the cached documents.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 100_000,
+        ttl: float = 60.0,
+        ttl_by_type: Union[dict[str, float], None] = None,
+        codec: Union[JSONCodec, None] = None,
+    ):
+        super().__init__(max_entries=max_entries, ttl=ttl, ttl_by_type=ttl_by_type)
+        self.path = Path(path)
+        self.codec = codec or default_codec()
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                object_type TEXT,
+                object_id TEXT,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)"
+        )
+        os.chmod(self.path, 0o600)
+
+    def _read(self, url: str) -> Union[CacheEntry, None]:
+        row = self._connection.execute(
+            "SELECT value, expires_at, etag, last_modified FROM responses WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._connection.execute(
+            "UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url)
+        )
+        value, expires_at, etag, last_modified = row
+        return CacheEntry(
+            value=self.codec.decode(value),
+            expires_at=expires_at,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    def _write(self, url: str, entry: CacheEntry) -> int:
+        object_type, object_id = self.classify(url) or (None, None)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                object_type,
+                object_id,
+                self.codec.encode(entry.value),
+                entry.expires_at,
+                entry.etag,
+                entry.last_modified,
+                time.time(),
+            ),
+        )
+        excess = self._size() - self.max_entries
+        if excess <= 0:
+            return 0
+
+        self._connection.execute(
+            "DELETE FROM responses WHERE url IN "
+            "(SELECT url FROM responses ORDER BY accessed_at LIMIT ?)",
+            (excess,),
+        )
+        return excess
+
+    def _remove(self, object_type: str, object_id: Union[str, None]) -> int:
+        if object_id is None:
+            cursor = self._connection.execute(
+                "DELETE FROM responses WHERE object_type = ?", (object_type,)
+            )
+        else:
+            cursor = self._connection.execute(
+                "DELETE FROM responses WHERE object_id = ? "
+                "OR (object_type = ? AND object_id IS NULL)",
+                (object_id, object_type),
+            )
+        return cursor.rowcount
+
+    def _remove_searches(self) -> int:
+        cursor = self._connection.execute(
+            "DELETE FROM responses WHERE object_type IS NOT NULL AND object_id IS NULL"
+        )
+        return cursor.rowcount
+
+    def _size(self) -> int:
+        count = self._connection.execute("SELECT COUNT(*) FROM responses")
+        return count.fetchone()[0]
+
+    def _truncate(self) -> None:
+        self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,81 @@
+"""
+Encodes and decodes the JSON bodies exchanged with the web applications.
+`orjson` is used if it is installed, it is several times faster than
+the standard library for large documents like search pages.
+"""
+
+import json
+from typing import Any, Union
+
+import requests
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+
+class JSONCodec:
+    """
+    Codec based on the standard library.
+
+    Attributes:
+        name: Codec identifier.
+    """
+
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Serializes a request body as UTF-8 JSON.
+        """
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def _loads(self, content: Union[bytes, str]) -> Any:
+        return json.loads(content)
+
+    def decode(self, content: Union[bytes, str]) -> Any:
+        """
+        Parses a response body straight from its raw bytes.
+
+        Raises:
+            requests.exceptions.JSONDecodeError: If the body is not
+                valid JSON, like `requests.Response.json()`.
+        """
+        try:
+            return self._loads(content)
+        except json.JSONDecodeError as e:
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+        except ValueError as e:
+            # e.g. invalid UTF-8 sequences
+            raise requests.exceptions.JSONDecodeError(str(e), "", 0) from e
+
+    def __repr__(self):
+        return f"<JSON codec: {self.name}>"
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Codec based on `orjson`.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def _loads(self, content: Union[bytes, str]) -> Any:
+        return orjson.loads(content)
+
+
+def default_codec() -> JSONCodec:
+    """
+    Picks the fastest codec available.
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    return JSONCodec()
@@ -0,0 +1,134 @@
+"""
+Bounds the wall time of the requests sent by the clients.
+
+Every request has connect/read timeouts and, optionally, it belongs to
+an operation with an overall deadline, e.g. walking all the pages of
+a search. The deadline is kept in a context variable, so it applies to
+all the requests sent within the block, including the ones sent by
+worker threads started with `copy_context`.
+"""
+
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Union
+
+import requests
+
+# Connect and read timeouts, in seconds. A None read timeout waits forever.
+Timeout = Union[float, tuple[float, Union[float, None]]]
+
+DEFAULT_TIMEOUT: tuple[float, float] = (10.0, 300.0)
+
+_deadline: contextvars.ContextVar[Union[float, None]] = contextvars.ContextVar(
+    "pdmv_http_client_deadline", default=None
+)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    The operation ran out of time before sending or completing a request.
+    It is a `Timeout` so that the existing error handling applies, but
+    it is never retried.
+    """
+
+
+@contextmanager
+def deadline(seconds: Union[float, None]) -> Iterator[Union[float, None]]:
+    """
+    Limits the wall time of the requests sent within the block.
+    Nested deadlines never extend the outer one.
+
+    Args:
+        seconds: Time available for the operation. None to only
+            keep the outer deadline, if any.
+
+    Yields:
+        The instant, in `time.monotonic()` terms, when the deadline expires.
+    """
+    expires = _deadline.get()
+    if seconds is not None:
+        own = time.monotonic() + seconds
+        expires = own if expires is None else min(expires, own)
+
+    token = _deadline.set(expires)
+    try:
+        yield expires
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Union[float, None]:
+    """
+    Time left, in seconds, before the current deadline expires.
+    None if there is no deadline.
+    """
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+
+def check() -> None:
+    """
+    Raises:
+        DeadlineExceeded: If the current deadline expired.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded by {-left:.3f} seconds")
+
+
+def timeout_for(timeout: Union[Timeout, None]) -> Union[Timeout, None]:
+    """
+    Caps the connect/read timeouts of a request to the time
+    left before the current deadline.
+
+    Args:
+        timeout: Timeouts configured for the request.
+
+    Returns:
+        Timeouts to send the request with.
+
+    Raises:
+        DeadlineExceeded: If the current deadline expired.
+    """
+    check()
+    left = remaining()
+    if left is None:
+        return timeout
+    if timeout is None:
+        return (left, left)
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return (min(connect, left), left if read is None else min(read, left))
+    return min(timeout, left)
+
+
+def without_read_timeout(timeout: Union[Timeout, None]) -> Union[Timeout, None]:
+    """
+    Keeps the connect timeout only, for requests the server
+    could take several minutes to answer.
+
+    Args:
+        timeout: Timeouts configured for the client.
+
+    Returns:
+        Timeouts to send the request with.
+    """
+    if timeout is None:
+        return None
+    connect = timeout[0] if isinstance(timeout, tuple) else timeout
+    return (connect, None)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Thread pool running each task in a copy of the context it was
+    submitted from, so that the deadline applies to the workers too.
+    """
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
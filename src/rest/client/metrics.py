@@ -0,0 +1,346 @@
+"""
+Records the latency, payload size and outcome of the HTTP
+requests sent by the clients, grouped by endpoint, so that
+long executions can be profiled.
+"""
+
+import atexit
+import re
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Union
+from urllib.parse import parse_qsl, urlsplit
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, like Prometheus ones.
+
+    Attributes:
+        buckets: Upper bounds of the buckets, in ascending order.
+            An implicit `+Inf` bucket is appended.
+        counts: Number of observations per bucket (not cumulative).
+        sum: Sum of all the observations.
+        count: Number of observations.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """
+        Number of observations less than or equal to each bucket bound.
+        """
+        bounds = list(self.buckets) + [float("inf")]
+        result = []
+        total = 0
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Union[float, None]:
+        """
+        Estimates a quantile interpolating linearly inside its bucket.
+
+        Args:
+            q: Quantile to estimate, between 0 and 1.
+
+        Returns:
+            The estimated value or None if there are no observations.
+            For the `+Inf` bucket, the highest finite bound is returned.
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        lower_bound, lower_count = 0.0, 0
+        for bound, count in self.cumulative():
+            if count >= rank:
+                if bound == float("inf"):
+                    return lower_bound
+                in_bucket = count - lower_count
+                fraction = (rank - lower_count) / in_bucket if in_bucket else 0.0
+                return lower_bound + (bound - lower_bound) * fraction
+            lower_bound, lower_count = bound, count
+        return lower_bound
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram(buckets=self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+
+class EndpointMetrics:
+    """
+    Measurements for one endpoint.
+
+    Attributes:
+        calls: Number of requests sent.
+        errors: Number of requests that raised an exception
+            or were answered with an HTTP error code.
+        auth_retries: Number of times the request was retried
+            after renewing the credentials.
+        bytes_sent: Size of the request bodies.
+        bytes_received: Size of the response bodies.
+        latency: Histogram of the request duration, in seconds.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.calls = 0
+        self.errors = 0
+        self.auth_retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(buckets=buckets)
+
+    def copy(self) -> "EndpointMetrics":
+        metrics = EndpointMetrics(buckets=self.latency.buckets)
+        metrics.calls = self.calls
+        metrics.errors = self.errors
+        metrics.auth_retries = self.auth_retries
+        metrics.bytes_sent = self.bytes_sent
+        metrics.bytes_received = self.bytes_received
+        metrics.latency = self.latency.copy()
+        return metrics
+
+    def to_dict(self) -> dict[str, Union[int, float, None]]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "auth_retries": self.auth_retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency_sum": self.latency.sum,
+            "latency_p50": self.latency.quantile(0.5),
+            "latency_p95": self.latency.quantile(0.95),
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process registry of request measurements, grouped by HTTP method
+    and endpoint template. A template is the resource path with its
+    identifiers replaced, e.g. `mcm/restapi/requests/get/{id}`, and the
+    names of its query parameters, e.g. `mcm/search/?db_name=requests&limit&page`.
+
+    It is safe to share it between threads and clients.
+
+    Attributes:
+        buckets: Upper bounds, in seconds, of the latency histogram buckets.
+    """
+
+    DEFAULT_BUCKETS = (
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+        30.0,
+        60.0,
+    )
+
+    # Path segments kept as they are: object types, actions and keywords.
+    # Anything else, e.g. a prepid, is considered an identifier.
+    _LITERAL_SEGMENT = re.compile(r"^[a-z_]*$")
+
+    # Query parameters whose value is kept in the template.
+    _LITERAL_PARAMETERS = ("db_name",)
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._endpoints: dict[tuple[str, str], EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def endpoint_template(cls, url: str) -> str:
+        """
+        Describes the endpoint a URL belongs to.
+
+        Args:
+            url: Absolute URL or resource path.
+
+        Returns:
+            Endpoint template, e.g. `mcm/restapi/requests/get/{id}`.
+        """
+        parts = urlsplit(url)
+        segments = [
+            segment if cls._LITERAL_SEGMENT.match(segment) else "{id}"
+            for segment in parts.path.lstrip("/").split("/")
+        ]
+        template = "/".join(segments)
+
+        parameters = [
+            f"{key}={value}" if key in cls._LITERAL_PARAMETERS else key
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        ]
+        if parameters:
+            template += "?" + "&".join(sorted(parameters))
+        return template
+
+    def _endpoint(self, method: str, url: str) -> EndpointMetrics:
+        """
+        Retrieves the measurements for an endpoint, the lock is held
+        by the caller.
+        """
+        key = (method.upper(), self.endpoint_template(url))
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = EndpointMetrics(buckets=self.buckets)
+            self._endpoints[key] = metrics
+        return metrics
+
+    def record_request(
+        self,
+        method: str,
+        url: str,
+        latency: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+        error: bool = False,
+    ) -> None:
+        """
+        Records a request sent to an endpoint.
+
+        Args:
+            method: HTTP method.
+            url: Requested URL.
+            latency: Time, in seconds, until the response was received.
+            bytes_sent: Size of the request body.
+            bytes_received: Size of the response body.
+            error: Whether the request failed.
+        """
+        with self._lock:
+            metrics = self._endpoint(method=method, url=url)
+            metrics.calls += 1
+            metrics.errors += int(error)
+            metrics.bytes_sent += bytes_sent
+            metrics.bytes_received += bytes_received
+            metrics.latency.observe(latency)
+
+    def record_auth_retry(self, method: str, url: str) -> None:
+        """
+        Records that a request was retried after renewing the credentials.
+        """
+        with self._lock:
+            self._endpoint(method=method, url=url).auth_retries += 1
+
+    def endpoints(self) -> list[tuple[str, str]]:
+        """
+        HTTP methods and endpoint templates with measurements.
+        """
+        with self._lock:
+            return sorted(self._endpoints)
+
+    def get(self, method: str, template: str) -> Union[EndpointMetrics, None]:
+        """
+        Retrieves a copy of the measurements for an endpoint.
+
+        Args:
+            method: HTTP method.
+            template: Endpoint template, see `endpoint_template`.
+        """
+        with self._lock:
+            metrics = self._endpoints.get((method.upper(), template))
+            return metrics.copy() if metrics else None
+
+    def snapshot(self) -> dict[str, dict[str, Union[int, float, None]]]:
+        """
+        Summarizes the measurements per endpoint, e.g.
+        {"GET mcm/restapi/requests/get/{id}": {"calls": 3, ...}}
+        """
+        with self._lock:
+            return {
+                f"{method} {template}": metrics.to_dict()
+                for (method, template), metrics in sorted(self._endpoints.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    @staticmethod
+    def _labels(**labels: str) -> str:
+        escaped = (
+            '%s="%s"'
+            % (
+                name,
+                value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+            )
+            for name, value in labels.items()
+        )
+        return "{" + ",".join(escaped) + "}"
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the measurements using the Prometheus text format.
+        """
+        counters = (
+            ("pdmv_http_requests_total", "Requests sent.", "calls"),
+            ("pdmv_http_request_errors_total", "Requests failed.", "errors"),
+            (
+                "pdmv_http_auth_retries_total",
+                "Requests retried after renewing the credentials.",
+                "auth_retries",
+            ),
+            ("pdmv_http_sent_bytes_total", "Request body bytes sent.", "bytes_sent"),
+            (
+                "pdmv_http_received_bytes_total",
+                "Response body bytes received.",
+                "bytes_received",
+            ),
+        )
+        with self._lock:
+            endpoints = sorted(
+                (key, metrics.copy()) for key, metrics in self._endpoints.items()
+            )
+
+        lines: list[str] = []
+        for name, description, attribute in counters:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, template), metrics in endpoints:
+                labels = self._labels(method=method, endpoint=template)
+                lines.append(f"{name}{labels} {getattr(metrics, attribute)}")
+
+        name = "pdmv_http_request_duration_seconds"
+        lines.append(f"# HELP {name} Time until the response is received.")
+        lines.append(f"# TYPE {name} histogram")
+        for (method, template), metrics in endpoints:
+            for bound, count in metrics.latency.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = self._labels(method=method, endpoint=template, le=le)
+                lines.append(f"{name}_bucket{labels} {count}")
+            labels = self._labels(method=method, endpoint=template)
+            lines.append(f"{name}_sum{labels} {metrics.latency.sum}")
+            lines.append(f"{name}_count{labels} {metrics.latency.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: Union[str, Path]) -> None:
+        """
+        Writes the measurements to a file using the Prometheus text format.
+        """
+        Path(path).write_text(self.to_prometheus(), encoding="utf-8")
+
+    def dump_at_exit(self, path: Union[str, Path]) -> None:
+        """
+        Writes the measurements to a file when the interpreter exits.
+        """
+        atexit.register(self.dump, path)
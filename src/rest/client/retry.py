@@ -0,0 +1,331 @@
+"""
+Retries the requests that fail due to transient errors, e.g.
+connection resets, timeouts or HTTP 502/503 from a proxy, and
+stops sending them while the web application is down.
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Union
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from rest.client.deadline import DeadlineExceeded, remaining
+from rest.utils.logger import LoggerFactory
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    The request was not sent because the web application has been
+    failing consistently. It is a `ConnectionError` so that the existing
+    error handling applies.
+    """
+
+
+class CircuitBreaker:
+    """
+    Fails fast after several consecutive failures.
+
+    Once `failure_threshold` consecutive requests fail, the circuit opens
+    and no request is sent for `reset_timeout` seconds. Then, one request
+    is let through: if it succeeds the circuit closes, otherwise it
+    opens again.
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the circuit.
+        reset_timeout: Seconds to wait before probing the server again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Union[float, None] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the request must not be sent.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(
+                    f"Circuit open after {self._failures} consecutive failures, "
+                    f"retry in {max(remaining, 0):.1f} seconds"
+                )
+            # Let this request probe the server.
+            self._probing = True
+
+    def release_probe(self) -> None:
+        """
+        Lets another request probe the server, if the probe
+        ended without an outcome, e.g. it was not sent.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class RetryBudget:
+    """
+    Caps the retries to a fraction of the requests, so that retries do
+    not multiply the load on a struggling server.
+
+    Attributes:
+        ratio: Retries allowed per request sent, e.g. 0.2 for 20%.
+        min_retries: Retries always allowed, for clients sending few requests.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._requests = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def withdraw(self) -> bool:
+        """
+        Takes a retry from the budget.
+
+        Returns:
+            False if the budget is exhausted.
+        """
+        with self._lock:
+            if self._retries >= self.min_retries + self.ratio * self._requests:
+                return False
+            self._retries += 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Retries requests that failed due to transient errors, waiting an
+    exponential backoff with full jitter between attempts.
+
+    The web applications change data through GET and PUT requests too,
+    e.g. `restapi/requests/reset/<prepid>` or `restapi/requests/clone`.
+    If such a request reached the server, sending it again could apply
+    the change twice. Therefore, only requests to read-only resources
+    are retried after any transient error. The other ones are only
+    retried if they could not be sent at all, unless the caller states
+    they are idempotent.
+
+    Attributes:
+        max_attempts: Maximum number of attempts per request, including the first one.
+        backoff_factor: Base delay, in seconds. The delay before the attempt `n + 1`
+            is picked at random between 0 and `backoff_factor * 2 ** (n - 1)`.
+        max_backoff: Upper bound, in seconds, for the delay between attempts.
+        statuses: HTTP status codes considered transient.
+        budget: Limits the retries to a fraction of the requests, if provided.
+        circuit_breaker: Stops sending requests while the server is down, if provided.
+    """
+
+    TRANSIENT_STATUSES = frozenset((429, 502, 503, 504))
+
+    # Methods that never change data.
+    SAFE_METHODS = frozenset(("HEAD", "OPTIONS"))
+
+    # Resources that only read data, sent via GET or PUT (`listwithfile`).
+    READ_ONLY_RESOURCES = re.compile(
+        r"(?:^|/)(?:"
+        r"(?:restapi|api)/[^/?]+/(?:get|get_role|listwithfile)(?:[/?]|$)"
+        r"|api/(?:get_json|fetch)(?:[/?]|$)"
+        r"|search/?(?:\?|$)"
+        r")"
+    )
+    READ_ONLY_METHODS = frozenset(("GET", "PUT"))
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        statuses: frozenset[int] = TRANSIENT_STATUSES,
+        budget: Union[RetryBudget, None] = None,
+        circuit_breaker: Union[CircuitBreaker, None] = None,
+    ):
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.budget = budget
+        self.circuit_breaker = circuit_breaker
+        self._logger = LoggerFactory.getLogger("pdmv-http-client.client")
+
+    @classmethod
+    def default(cls) -> "RetryPolicy":
+        """
+        Policy with a retry budget and a circuit breaker.
+        """
+        return cls(budget=RetryBudget(), circuit_breaker=CircuitBreaker())
+
+    def backoff(
+        self, attempt: int, response: Union[requests.Response, None] = None
+    ) -> float:
+        """
+        Delay before the next attempt. The `Retry-After` header
+        is honored if the server sends it.
+
+        Args:
+            attempt: Number of the attempt that failed, starting from 1.
+            response: Response received in that attempt, if any.
+        """
+        retry_after = ""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+
+        ceiling = min(self.backoff_factor * 2 ** (attempt - 1), self.max_backoff)
+        return random.uniform(0, ceiling)
+
+    @classmethod
+    def is_read_only(cls, method: str, url: str) -> bool:
+        """
+        Whether a request only reads data, so that it is safe
+        to send it again even if the server processed it.
+        """
+        method = method.upper()
+        if method in cls.SAFE_METHODS:
+            return True
+        return method in cls.READ_ONLY_METHODS and bool(
+            cls.READ_ONLY_RESOURCES.search(url)
+        )
+
+    @staticmethod
+    def _was_not_sent(error: Union[requests.RequestException, None]) -> bool:
+        """
+        Whether the request failed before reaching the server,
+        i.e. the connection could not be established.
+        """
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if not isinstance(error, requests.ConnectionError):
+            return False
+        reason = getattr(error.args[0] if error.args else None, "reason", None)
+        return isinstance(reason, NewConnectionError)
+
+    def _is_transient(
+        self,
+        response: Union[requests.Response, None],
+        error: Union[requests.RequestException, None],
+    ) -> bool:
+        if error is not None:
+            return isinstance(
+                error, (requests.ConnectionError, requests.Timeout)
+            ) and not isinstance(error, (CircuitOpenError, DeadlineExceeded))
+        return response is not None and response.status_code in self.statuses
+
+    def execute(
+        self,
+        method: str,
+        url: str,
+        send: Callable[[], requests.Response],
+        idempotent: Union[bool, None] = None,
+    ) -> requests.Response:
+        """
+        Sends a request, retrying it while it fails due to transient errors
+        and the current deadline, if any, leaves time for the next attempt.
+
+        Args:
+            method: HTTP method.
+            url: Resource URL.
+            send: Sends one attempt of the request.
+            idempotent: Whether sending the request several times has the
+                same effect as sending it once. If not provided, only
+                requests to read-only resources are considered idempotent.
+
+        Returns:
+            The first non-transient response or the last one received.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            requests.RequestException: If the last attempt failed.
+        """
+        if idempotent is None:
+            idempotent = self.is_read_only(method=method, url=url)
+        if self.budget:
+            self.budget.record_request()
+
+        attempt = 1
+        while True:
+            if self.circuit_breaker:
+                self.circuit_breaker.check()
+
+            response: Union[requests.Response, None] = None
+            error: Union[requests.RequestException, None] = None
+            recorded = False
+            try:
+                try:
+                    response = send()
+                except DeadlineExceeded:
+                    # The request was not sent, there is no outcome to record
+                    raise
+                except requests.RequestException as e:
+                    error = e
+
+                transient = self._is_transient(response=response, error=error)
+                if self.circuit_breaker:
+                    if transient:
+                        self.circuit_breaker.record_failure()
+                    else:
+                        self.circuit_breaker.record_success()
+                    recorded = True
+            finally:
+                if self.circuit_breaker and not recorded:
+                    self.circuit_breaker.release_probe()
+
+            retryable = idempotent or self._was_not_sent(error)
+            can_retry = transient and retryable and attempt < self.max_attempts
+            delay = self.backoff(attempt=attempt, response=response) if can_retry else 0
+            left = remaining()
+            if left is not None and delay >= left:
+                can_retry = False
+            if can_retry and self.budget and not self.budget.withdraw():
+                can_retry = False
+
+            if not can_retry:
+                if error is not None:
+                    raise error
+                return response  # type: ignore[return-value]
+
+            self._logger.warning(
+                "(%s/%s) %s %s failed: %s, retrying in %.2f seconds",
+                attempt,
+                self.max_attempts,
+                method,
+                url,
+                error or f"HTTP {response.status_code}",  # type: ignore[union-attr]
+                delay,
+            )
+            time.sleep(delay)
+            attempt += 1
@@ -7,10 +7,12 @@ from pathlib import Path
 from typing import Union
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from rest.client.auth.auth_interface import AuthInterface
 from rest.client.auth.handlers.oauth2_tokens import AccessTokenHandler, IDTokenHandler
 from rest.client.auth.handlers.session_cookies import SessionCookieHandler
+from rest.client.metrics import MetricsRegistry
 from rest.utils.logger import LoggerFactory
 
 
@@ -19,6 +21,7 @@ class AuthenticatedSession(requests.Session):
         super().__init__()
         self._handler = handler
         self._max_attempts = 3
+        self.metrics: Union[MetricsRegistry, None] = None
         self._logger = LoggerFactory.getLogger("pdmv-http-client.client")
         self._handler.configure(session=self)
 
@@ -26,12 +29,18 @@ class AuthenticatedSession(requests.Session):
         self, method: Union[str, bytes], url: Union[str, bytes], *args, **kwargs
     ) -> requests.Response:
         for attempt, _ in enumerate(range(self._max_attempts), start=1):
-            # Restart the session and send the request
-            with self:
-                response = super().request(method, url, *args, **kwargs)
+            # Pick the latest credential, it could have been renewed in the background
+            self._handler.configure(session=self)
+
+            # Reuse the pooled connections kept alive by the session
+            response = super().request(method, url, *args, **kwargs)
 
             if self._handler.validate_response(response):
                 return response
+            elif not self._handler.credential_rejected(response):
+                # The credential is valid but it lacks the permissions
+                # for this resource, renewing it would not help.
+                return response
             else:
                 # Re-authenticate and return the response.
                 self._logger.debug(
@@ -39,8 +48,10 @@ class AuthenticatedSession(requests.Session):
                     attempt,
                     self._max_attempts,
                 )
+                if self.metrics and attempt < self._max_attempts:
+                    self.metrics.record_auth_retry(method=str(method), url=str(url))
+                self._handler.discard_credential(response=response)
                 self._handler.authenticate()
-                self._handler.configure(session=self)
 
         self._logger.warning(
             "Unable to renew credentials for (%s) after %s attempts: HTTP code %s",
@@ -57,6 +68,37 @@ class SessionFactory:
     required authentication method.
     """
 
+    @classmethod
+    def configure_connection_pool(
+        cls,
+        session: requests.Session,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+    ) -> requests.Session:
+        """
+        Mounts a persistent connection pool into the session so that
+        the TCP/TLS connections are reused across requests.
+
+        Args:
+            session: Session to configure.
+            pool_connections: Number of per-host connection pools to cache.
+            pool_maxsize: Maximum number of connections kept alive per host.
+            keep_alive: Whether to keep the connections open after each request.
+                If False, the server is asked to close them after every response.
+        """
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if keep_alive:
+            session.headers.update({"Connection": "keep-alive"})
+        else:
+            session.headers.update({"Connection": "close"})
+
+        return session
+
     @classmethod
     def configure_by_session_cookie(
         cls, url: str, credential_path: Path
@@ -0,0 +1,258 @@
+"""
+Limits the pace of the requests sent to a web application
+so that parallel scripts do not overload it.
+"""
+
+import math
+import threading
+import time
+from typing import Union
+
+from rest.utils.logger import LoggerFactory
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the number of requests per second.
+
+    The bucket holds up to `burst` tokens and it is refilled at `rate`
+    tokens per second. Each request takes one token; if there are none,
+    the caller waits for its turn.
+
+    Attributes:
+        rate: Sustained requests per second.
+        burst: Maximum number of requests sent back to back.
+    """
+
+    def __init__(self, rate: float, burst: Union[int, None] = None):
+        if rate <= 0:
+            raise ValueError("The rate must be greater than zero")
+
+        self.rate = rate
+        self.burst = burst or max(1, math.ceil(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until it is available.
+
+        Returns:
+            Time waited, in seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+            # Reserve the token: a negative balance is the queue of waiting callers
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrency:
+    """
+    Limits the number of requests in flight and adjusts the limit
+    using additive increase/multiplicative decrease (AIMD).
+
+    The limit grows by roughly one after a full window of fast and
+    successful responses. It is reduced by `decrease_factor` after a slow
+    response, an HTTP 429 or 5xx code or a transport error, at most once
+    per round trip so that a burst of failures only counts once.
+
+    Attributes:
+        limit: Current number of requests allowed in flight.
+        min_limit: Lower bound for the limit.
+        max_limit: Upper bound for the limit.
+        target_latency: Responses slower than this, in seconds, are
+            considered a sign of overload.
+        decrease_factor: Factor applied to the limit on overload.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        target_latency: float = 2.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def is_overloaded(
+        latency: float, status_code: Union[int, None], target: float
+    ) -> bool:
+        if status_code is None:
+            return True
+        return status_code == 429 or status_code >= 500 or latency > target
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """
+        Waits until a request could be sent without exceeding the limit.
+        """
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, status_code: Union[int, None]) -> None:
+        """
+        Reports the outcome of a request and adjusts the limit.
+
+        Args:
+            latency: Time, in seconds, until the response was received.
+            status_code: HTTP status code, None if the request failed
+                before receiving a response.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if self.is_overloaded(latency, status_code, self.target_latency):
+                if now - self._last_decrease >= latency:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class RateLimiter:
+    """
+    Paces the requests sent to a web application with a token bucket
+    and, optionally, an adaptive concurrency limit.
+
+    Attributes:
+        bucket: Requests per second limit, if any.
+        concurrency: Adaptive limit for the requests in flight, if any.
+    """
+
+    _registry_lock = threading.Lock()
+    _registry: dict[str, "RateLimiter"] = {}
+
+    def __init__(
+        self,
+        requests_per_second: Union[float, None] = None,
+        burst: Union[int, None] = None,
+        adaptive: bool = False,
+        max_concurrency: int = 32,
+        target_latency: float = 2.0,
+    ):
+        self.bucket: Union[TokenBucket, None] = None
+        if requests_per_second:
+            self.bucket = TokenBucket(rate=requests_per_second, burst=burst)
+
+        self.concurrency: Union[AdaptiveConcurrency, None] = None
+        if adaptive:
+            self.concurrency = AdaptiveConcurrency(
+                max_limit=max_concurrency, target_latency=target_latency
+            )
+
+        self._lock = threading.Lock()
+        self._throttled = 0.0
+        self._logger = LoggerFactory.getLogger("pdmv-http-client.client")
+
+    @classmethod
+    def for_server(cls, server: str, **options) -> "RateLimiter":
+        """
+        Provides the limiter shared by all the clients targeting a server.
+        The limits a later client enables are added to it, the ones
+        already set are kept.
+
+        Args:
+            server: Web application URL.
+            options: See `RateLimiter`.
+        """
+        with cls._registry_lock:
+            limiter = cls._registry.get(server)
+            if limiter is None:
+                limiter = cls(**options)
+                cls._registry[server] = limiter
+            else:
+                limiter._merge(server=server, other=cls(**options))
+            return limiter
+
+    def _merge(self, server: str, other: "RateLimiter") -> None:
+        """
+        Adds the limits set by another limiter that this one does not
+        set yet. A warning is logged for the ones already set to other values.
+        """
+        if other.bucket:
+            if self.bucket is None:
+                self.bucket = other.bucket
+            elif (self.bucket.rate, self.bucket.burst) != (
+                other.bucket.rate,
+                other.bucket.burst,
+            ):
+                self._logger.warning(
+                    "Rate limit for %s is already %s requests per second "
+                    "(burst %s), ignoring %s requests per second (burst %s)",
+                    server,
+                    self.bucket.rate,
+                    self.bucket.burst,
+                    other.bucket.rate,
+                    other.bucket.burst,
+                )
+
+        if other.concurrency:
+            if self.concurrency is None:
+                self.concurrency = other.concurrency
+            elif (self.concurrency.max_limit, self.concurrency.target_latency) != (
+                other.concurrency.max_limit,
+                other.concurrency.target_latency,
+            ):
+                self._logger.warning(
+                    "Adaptive concurrency for %s is already enabled with other "
+                    "options, ignoring the new ones",
+                    server,
+                )
+
+    def acquire(self) -> None:
+        """
+        Waits until a request could be sent.
+        """
+        start = time.monotonic()
+        if self.concurrency:
+            self.concurrency.acquire()
+        if self.bucket:
+            self.bucket.acquire()
+
+        with self._lock:
+            self._throttled += time.monotonic() - start
+
+    def release(self, latency: float, status_code: Union[int, None]) -> None:
+        """
+        Reports the outcome of a request, see `AdaptiveConcurrency.release`.
+        """
+        if self.concurrency:
+            self.concurrency.release(latency=latency, status_code=status_code)
+
+    def stats(self) -> dict[str, Union[int, float, None]]:
+        """
+        Reports the current limits and the time requests spent waiting.
+        """
+        with self._lock:
+            throttled = self._throttled
+        return {
+            "requests_per_second": self.bucket.rate if self.bucket else None,
+            "concurrency_limit": self.concurrency.limit if self.concurrency else None,
+            "in_flight": self.concurrency.in_flight if self.concurrency else None,
+            "throttled_seconds": throttled,
+        }
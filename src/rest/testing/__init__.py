@@ -0,0 +1,4 @@
+"""
+Utilities to exercise the clients without reaching
+the real web applications.
+"""
@@ -0,0 +1,714 @@
+"""
+Local stand-in for the McM web application, built on the
+standard library HTTP server, to run the client offline: tests,
+benchmarks and load tests.
+
+It implements the endpoints used by the client over a synthetic
+dataset, and it can inject latency and errors.
+
+Usage:
+    python -m rest.testing.mcm_server --port 8000 --seed 1 --latency 0.05
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Union
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Campaigns for every step of the synthetic chains, the first one is the root.
+CAMPAIGNS = (
+    "Run3Summer22wmLHEGS",
+    "Run3Summer22DRPremix",
+    "Run3Summer22MiniAODv4",
+    "Run3Summer22NanoAODv12",
+)
+PWGS = ("PPD", "HIG", "SUS", "EXO", "TOP", "SMP")
+DATATIERS = ("GEN-SIM", "AODSIM", "MINIAODSIM", "NANOAODSIM")
+
+# Pairs of (approval, status) a request goes through when it is approved.
+APPROVAL_STEPS = (
+    ("none", "new"),
+    ("validation", "validation"),
+    ("define", "defined"),
+    ("approve", "approved"),
+    ("submit", "submitted"),
+)
+
+
+class McMDataset:
+    """
+    In-memory McM databases: requests, chained requests, chained
+    campaigns, tickets (mccms) and invalidations.
+
+    Attributes:
+        databases: Documents per database, keyed by prepid.
+    """
+
+    def __init__(self, databases: Union[dict[str, dict[str, dict]], None] = None):
+        self.databases: dict[str, dict[str, dict]] = {
+            "requests": {},
+            "chained_requests": {},
+            "chained_campaigns": {},
+            "mccms": {},
+            "invalidations": {},
+        }
+        self.databases.update(databases or {})
+        self._counters: Counter[str] = Counter()
+
+    @classmethod
+    def generate(
+        cls,
+        seed: int = 0,
+        root_requests: int = 20,
+        chains_per_root: int = 1,
+        min_chain_length: int = 1,
+        max_chain_length: int = 4,
+    ) -> "McMDataset":
+        """
+        Creates a synthetic dataset. The same seed always produces
+        the same documents.
+
+        Args:
+            seed: Seed for the random generator.
+            root_requests: Number of root requests.
+            chains_per_root: Number of chained requests per root request.
+                They share the first two requests and diverge afterwards.
+            min_chain_length: Minimum number of requests in a chain.
+            max_chain_length: Maximum number of requests in a chain,
+                up to the number of campaigns.
+
+        Returns:
+            The synthetic dataset.
+        """
+        rng = random.Random(seed)
+        dataset = cls()
+        max_chain_length = max(1, min(max_chain_length, len(CAMPAIGNS)))
+        min_chain_length = max(1, min(min_chain_length, max_chain_length))
+
+        chained_campaign = "chain_" + "_flow".join(CAMPAIGNS)
+        dataset.add(
+            "chained_campaigns",
+            {
+                "prepid": chained_campaign,
+                "campaigns": [[CAMPAIGNS[0], None]]
+                + [[campaign, f"flow{campaign}"] for campaign in CAMPAIGNS[1:]],
+            },
+        )
+
+        roots_per_pwg: dict[str, list[str]] = {}
+        for _ in range(root_requests):
+            pwg = rng.choice(PWGS)
+            chain_length = rng.randint(min_chain_length, max_chain_length)
+            root_type = rng.choice(("LHE", "Prod"))
+            keep_output = rng.random() < 0.2
+            chain: list[str] = []
+            for _ in range(chains_per_root):
+                chain_prepid = dataset.next_prepid(pwg=pwg, campaign=chained_campaign)
+
+                # The chains of a root share their first two requests
+                shared = chain[:2]
+                for prepid in shared:
+                    request = dataset.databases["requests"][prepid]
+                    request["member_of_chain"].append(chain_prepid)
+
+                chain = shared + [
+                    dataset.add_request(
+                        pwg=pwg,
+                        step=step,
+                        chain_prepid=chain_prepid,
+                        root_type=root_type,
+                        keep_output=keep_output,
+                    )
+                    for step in range(len(shared), chain_length)
+                ]
+                dataset.add(
+                    "chained_requests",
+                    {
+                        "prepid": chain_prepid,
+                        "pwg": pwg,
+                        "member_of_campaign": chained_campaign,
+                        "chain": chain,
+                        "step": chain_length - 1,
+                        "approval": "submit",
+                        "status": "processing",
+                        "action_parameters": {"flag": True},
+                    },
+                )
+            roots_per_pwg.setdefault(pwg, []).append(chain[0])
+
+        # One ticket per PWG listing its roots, the consecutive ones as a range.
+        for pwg, roots in roots_per_pwg.items():
+            entries: list[Union[str, list[str]]] = [roots[0]]
+            if len(roots) > 1:
+                entries.append([roots[1], roots[-1]])
+            ticket = dataset.next_prepid(pwg=pwg, campaign="2022Oct18")
+            dataset.add("mccms", {"prepid": ticket, "pwg": pwg, "requests": entries})
+
+        return dataset
+
+    @staticmethod
+    def _sequence(prepid: str) -> int:
+        return int(prepid.rsplit("-", 1)[-1])
+
+    @staticmethod
+    def _revision(document: dict, number: int) -> str:
+        content = json.dumps(document, sort_keys=True, default=str).encode()
+        return f"{number}-{hashlib.md5(content).hexdigest()}"
+
+    def next_prepid(self, pwg: str, campaign: str) -> str:
+        key = f"{pwg}-{campaign}"
+        self._counters[key] += 1
+        return f"{key}-{self._counters[key]:05d}"
+
+    def add(self, database: str, document: dict) -> dict:
+        """
+        Stores a new document, setting its `_id` and `_rev`.
+        """
+        document["_id"] = document["prepid"]
+        document["_rev"] = self._revision(document, number=1)
+        self.databases[database][document["prepid"]] = document
+        return document
+
+    def add_request(
+        self,
+        pwg: str,
+        step: int,
+        chain_prepid: str,
+        root_type: str = "Prod",
+        keep_output: bool = False,
+        approval: str = "submit",
+        status: str = "done",
+    ) -> str:
+        """
+        Stores a new request for a step of a chained request.
+
+        Returns:
+            The request prepid.
+        """
+        campaign = CAMPAIGNS[step]
+        prepid = self.next_prepid(pwg=pwg, campaign=campaign)
+        self.add(
+            "requests",
+            {
+                "prepid": prepid,
+                "pwg": pwg,
+                "member_of_campaign": campaign,
+                "member_of_chain": [chain_prepid],
+                "type": root_type if step == 0 else "MCReproc",
+                "approval": approval,
+                "status": status,
+                "keep_output": [keep_output],
+                "output_dataset": [f"/{prepid}/{campaign}/{DATATIERS[step]}"],
+                "validation": {"results": {"time_per_event": 1.0}},
+                "tags": [],
+            },
+        )
+        return prepid
+
+    def get(self, database: str, prepid: str) -> Union[dict, None]:
+        return self.databases.get(database, {}).get(prepid)
+
+    def update(self, database: str, document: dict) -> None:
+        """
+        Replaces a document, bumping its revision.
+        """
+        number = int(str(document.get("_rev", "0")).split("-", 1)[0]) + 1
+        document = deepcopy(document)
+        document["_rev"] = self._revision(document, number=number)
+        self.databases[database][document["prepid"]] = document
+
+    def search(self, database: str, query: dict[str, str]) -> list[dict]:
+        """
+        Finds the documents matching all the query parameters. Values
+        accept `*` wildcards, `contains` looks for a request in a chain.
+        """
+
+        def matches(document: dict, key: str, pattern: str) -> bool:
+            if key == "contains":
+                return pattern in document.get("chain", [])
+            value = document.get(key)
+            values = value if isinstance(value, list) else [value]
+            return any(fnmatch.fnmatchcase(str(v), pattern) for v in values)
+
+        documents = self.databases.get(database, {}).values()
+        return sorted(
+            (
+                document
+                for document in documents
+                if all(matches(document, key, value) for key, value in query.items())
+            ),
+            key=lambda document: document["prepid"],
+        )
+
+    def reset(self, prepid: str, approval: str = "none", status: str = "new") -> None:
+        """
+        Moves a request back to a previous approval/status. Its output
+        datasets get an invalidation record if it was already submitted.
+        """
+        request = self.databases["requests"][prepid]
+        if request["status"] in ("submitted", "done"):
+            for dataset in request.get("output_dataset", []):
+                invalidation_id = f"{prepid}-{len(self.databases['invalidations']) + 1}"
+                self.databases["invalidations"][invalidation_id] = {
+                    "_id": invalidation_id,
+                    "prepid": prepid,
+                    "object": dataset,
+                    "type": "dataset",
+                    "status": "new",
+                }
+        request = deepcopy(request)
+        request["approval"] = approval
+        request["status"] = status
+        self.update("requests", request)
+
+
+class _Reply:
+    """
+    Response to send: HTTP status, JSON body and extra headers.
+    """
+
+    def __init__(
+        self, body: Any, status: int = 200, headers: Union[dict[str, str], None] = None
+    ):
+        self.body = body
+        self.status = status
+        self.headers = headers or {}
+
+
+class McMServer:
+    """
+    Local McM stand-in serving a dataset in a background thread.
+
+    Attributes:
+        dataset: Served documents. It is modified by the requests.
+        host: Interface to listen on.
+        port: Port to listen on, 0 picks a free one.
+        latency: Delay, in seconds, added to every response.
+        jitter: Maximum random delay, in seconds, added on top of `latency`.
+        error_rate: Probability of answering a request with an HTTP 500 error.
+        seed: Seed for the latency and error injection.
+        calls: Number of requests received per HTTP method and action,
+            e.g. ("GET", "get") or ("PUT", "update").
+    """
+
+    ROLE = {"role": "production_manager", "username": "pdmvserv"}
+
+    def __init__(
+        self,
+        dataset: Union[McMDataset, None] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.dataset = dataset or McMDataset.generate(seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls: Counter[tuple[str, str]] = Counter()
+        self._pending_failures: list[int] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._routes: list[tuple[str, re.Pattern, Callable[..., _Reply]]] = [
+            ("GET", re.compile(r"^search/?$"), self._search),
+            ("GET", re.compile(r"^restapi/users/get_role$"), self._role),
+            ("GET", re.compile(r"^restapi/(?P<db>\w+)/get/(?P<id>[^/]+)$"), self._get),
+            (
+                "GET",
+                re.compile(
+                    r"^restapi/(?P<db>\w+)/approve/(?P<id>[^/]+)(?:/(?P<level>\d+))?$"
+                ),
+                self._approve,
+            ),
+            (
+                "GET",
+                re.compile(
+                    r"^restapi/requests/(?P<kind>reset|soft_reset|option_reset)/(?P<id>[^/]+)$"
+                ),
+                self._reset,
+            ),
+            (
+                "GET",
+                re.compile(r"^restapi/chained_requests/rewind_to_root/(?P<id>[^/]+)$"),
+                self._rewind_to_root,
+            ),
+            (
+                "GET",
+                re.compile(r"^restapi/chained_requests/rewind/(?P<id>[^/]+)$"),
+                self._rewind,
+            ),
+            (
+                "GET",
+                re.compile(
+                    r"^restapi/chained_requests/flow/(?P<id>[^/]+)"
+                    r"(?:/(?P<force>force)|/reserve/(?P<campaign>[^/]+))?$"
+                ),
+                self._flow,
+            ),
+            (
+                "PUT",
+                re.compile(r"^restapi/requests/listwithfile$"),
+                self._list_with_file,
+            ),
+            ("PUT", re.compile(r"^restapi/invalidations/announce$"), self._announce),
+            ("PUT", re.compile(r"^restapi/(?P<db>\w+)/update$"), self._update),
+            (
+                "DELETE",
+                re.compile(r"^restapi/(?P<db>\w+)/delete/(?P<id>[^/]+)$"),
+                self._delete,
+            ),
+        ]
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Union[threading.Thread, None] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL of the application, to use as the client's `server`.
+        """
+        host, port = self._httpd.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}/mcm/"
+
+    def start(self) -> "McMServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="mcm-stand-in",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "McMServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def inject_failures(self, count: int, status: int = 503) -> None:
+        """
+        Answers the following requests with an HTTP error.
+
+        Args:
+            count: Number of requests to fail.
+            status: HTTP status code to answer with.
+        """
+        with self._lock:
+            self._pending_failures += [status] * count
+
+    def _handler_class(self) -> type:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, send them right away
+            disable_nagle_algorithm = True
+
+            def _dispatch(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                reply = stand_in.handle(
+                    method=self.command,
+                    path=self.path,
+                    body=body,
+                    headers=dict(self.headers),
+                )
+                payload = (
+                    b"" if reply.status == 304 else json.dumps(reply.body).encode()
+                )
+                self.send_response(reply.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in reply.headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_PUT = do_POST = do_DELETE = _dispatch
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        headers: Union[dict[str, str], None] = None,
+    ) -> _Reply:
+        """
+        Answers a request.
+
+        Args:
+            method: HTTP method.
+            path: Requested path, including the query string.
+            body: Decoded JSON body, if any.
+            headers: Request headers.
+        """
+        parts = urlsplit(path)
+        resource = unquote(parts.path).lstrip("/")
+        if resource.startswith("mcm/"):
+            resource = resource[len("mcm/") :]
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+
+        route = next(
+            (
+                (action, match)
+                for route_method, pattern, action in self._routes
+                for match in [pattern.match(resource)]
+                if route_method == method and match
+            ),
+            None,
+        )
+        with self._lock:
+            if route:
+                self.calls[(method, route[0].__name__.lstrip("_"))] += 1
+            # Injected errors emulate a faulty proxy, the route does not matter
+            if self._pending_failures:
+                status = self._pending_failures.pop(0)
+                return _Reply({"results": False, "message": "Injected error"}, status)
+            if fail:
+                return _Reply({"results": False, "message": "Injected error"}, 500)
+            if not route:
+                message = f"Unknown resource: {resource}"
+                return _Reply({"results": False, "message": message}, 404)
+
+            action, match = route
+            return action(
+                query=query, body=body, headers=headers or {}, **match.groupdict()
+            )
+
+    # Endpoints, the lock is held by the caller.
+    def _role(self, **kwargs) -> _Reply:
+        return _Reply(dict(self.ROLE))
+
+    def _get(self, db: str, id: str, headers: dict[str, str], **kwargs) -> _Reply:
+        document = self.dataset.get(db, id)
+        if document is None:
+            return _Reply({"results": {}, "message": f"{id} does not exist"}, 404)
+
+        etag = f'"{document["_rev"]}"'
+        if headers.get("If-None-Match") == etag:
+            return _Reply(None, 304, {"ETag": etag})
+        return _Reply({"results": deepcopy(document)}, headers={"ETag": etag})
+
+    def _search(self, query: dict[str, str], **kwargs) -> _Reply:
+        database = query.pop("db_name", "")
+        limit = int(query.pop("limit", 20))
+        page = int(query.pop("page", 0))
+        results = self.dataset.search(database, {k: v for k, v in query.items() if v})
+        if page >= 0:
+            results = results[page * limit : (page + 1) * limit]
+        return _Reply({"results": deepcopy(results)})
+
+    def _list_with_file(self, body: Any, **kwargs) -> _Reply:
+        contents = (body or {}).get("contents", "")
+        prepids: list[str] = []
+        for line in contents.splitlines():
+            line = line.strip()
+            if "->" in line:
+                start, end = (el.strip() for el in line.split("->", 1))
+                prefix = start.rsplit("-", 1)[0]
+                first, last = McMDataset._sequence(start), McMDataset._sequence(end)
+                prepids += [f"{prefix}-{n:05d}" for n in range(first, last + 1)]
+            elif line:
+                prepids.append(line)
+
+        documents = [self.dataset.get("requests", prepid) for prepid in prepids]
+        return _Reply({"results": [deepcopy(d) for d in documents if d]})
+
+    def _update(self, db: str, body: Any, **kwargs) -> _Reply:
+        prepid = (body or {}).get("prepid", "")
+        current = self.dataset.get(db, prepid)
+        if current is None:
+            return _Reply(
+                {"results": False, "message": f"{prepid} does not exist"}, 404
+            )
+        if body.get("_rev") != current["_rev"]:
+            # Like CouchDB, the message does not say it is about the revision
+            message = "Document update conflict."
+            return _Reply({"results": False, "message": message}, 409)
+
+        self.dataset.update(db, body)
+        return _Reply({"results": True})
+
+    def _delete(self, db: str, id: str, **kwargs) -> _Reply:
+        document = self.dataset.get(db, id)
+        if document is None:
+            return _Reply({"results": False, "message": f"{id} does not exist"}, 404)
+        if db == "requests" and document["status"] not in ("new", "validation"):
+            message = f"{id} cannot be deleted in status {document['status']}"
+            return _Reply({"results": False, "message": message})
+
+        del self.dataset.databases[db][id]
+        if db == "requests":
+            # Remove it from the chains it belongs to
+            for chain_prepid in document.get("member_of_chain", []):
+                chain = self.dataset.get("chained_requests", chain_prepid)
+                if chain and id in chain["chain"]:
+                    chain = deepcopy(chain)
+                    chain["chain"].remove(id)
+                    chain["step"] = min(chain["step"], len(chain["chain"]) - 1)
+                    self.dataset.update("chained_requests", chain)
+        return _Reply({"results": True})
+
+    def _approve(
+        self, db: str, id: str, level: Union[str, None] = None, **kwargs
+    ) -> _Reply:
+        document = self.dataset.get(db, id)
+        if db != "requests" or document is None:
+            return _Reply({"results": False, "message": f"{id} does not exist"}, 404)
+
+        current = (document["approval"], document["status"])
+        if level is not None:
+            target = int(level)
+        elif current in APPROVAL_STEPS:
+            target = APPROVAL_STEPS.index(current) + 1
+        else:
+            # E.g. submit/done, there is no next step.
+            target = len(APPROVAL_STEPS)
+        if not 0 <= target < len(APPROVAL_STEPS):
+            message = f"Illegal Approval Step: {target}"
+            return _Reply({"results": False, "message": message})
+
+        document = deepcopy(document)
+        document["approval"], document["status"] = APPROVAL_STEPS[target]
+        self.dataset.update(db, document)
+        return _Reply({"results": True})
+
+    def _reset(self, kind: str, id: str, **kwargs) -> _Reply:
+        if self.dataset.get("requests", id) is None:
+            return _Reply({"results": False, "message": f"{id} does not exist"}, 404)
+
+        if kind == "soft_reset":
+            self.dataset.reset(id, approval="approve", status="approved")
+        else:
+            self.dataset.reset(id)
+        return _Reply({"results": True})
+
+    def _rewind_to_root(self, id: str, **kwargs) -> _Reply:
+        return self._rewind(id=id, to_root=True)
+
+    def _rewind(self, id: str, to_root: bool = False, **kwargs) -> _Reply:
+        chain = self.dataset.get("chained_requests", id)
+        if chain is None:
+            return _Reply({"results": False, "message": f"{id} does not exist"}, 404)
+        if chain["action_parameters"].get("flag"):
+            message = f"Chained request {id} must be disabled (flag) to be rewound"
+            return _Reply({"results": False, "message": message})
+
+        target_step = 0 if to_root else max(chain["step"] - 1, 0)
+        for prepid in chain["chain"][target_step + 1 :]:
+            if self.dataset.get("requests", prepid):
+                self.dataset.reset(prepid)
+
+        chain = deepcopy(chain)
+        chain["step"] = target_step
+        self.dataset.update("chained_requests", chain)
+        return _Reply({"results": True})
+
+    def _flow(
+        self,
+        id: str,
+        force: Union[str, None] = None,
+        campaign: Union[str, None] = None,
+        **kwargs,
+    ) -> _Reply:
+        chain = self.dataset.get("chained_requests", id)
+        if chain is None:
+            return _Reply({"results": False, "message": f"{id} does not exist"}, 404)
+
+        chain = deepcopy(chain)
+        if campaign:
+            # Reserve: create the missing requests up to the campaign
+            if campaign not in CAMPAIGNS:
+                return _Reply(
+                    {"results": False, "message": f"Unknown campaign {campaign}"}
+                )
+            for step in range(len(chain["chain"]), CAMPAIGNS.index(campaign) + 1):
+                prepid = self.dataset.add_request(
+                    pwg=chain["pwg"],
+                    step=step,
+                    chain_prepid=id,
+                    approval="none",
+                    status="new",
+                )
+                chain["chain"].append(prepid)
+        elif chain["step"] + 1 < len(chain["chain"]):
+            chain["step"] += 1
+        else:
+            return _Reply({"results": False, "message": f"Nothing to flow for {id}"})
+
+        self.dataset.update("chained_requests", chain)
+        return _Reply({"results": True})
+
+    def _announce(self, body: Any, **kwargs) -> _Reply:
+        invalidations = self.dataset.databases["invalidations"]
+        ids = body if isinstance(body, list) else []
+        if not ids or any(i not in invalidations for i in ids):
+            return _Reply({"results": False, "message": "Unknown invalidation records"})
+
+        for i in ids:
+            invalidations[i]["status"] = "announced"
+        return _Reply({"results": True})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--seed", type=int, default=0, help="Dataset seed")
+    parser.add_argument("--roots", type=int, default=20, help="Root requests")
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random delay (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 ratio")
+    args = parser.parse_args()
+
+    server = McMServer(
+        dataset=McMDataset.generate(seed=args.seed, root_requests=args.roots),
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"Serving McM stand-in at {server.url}")
+    with server:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,11 @@ provided in the `invalidate_request.py`
 module to delete requests in cascade.
 """
 
+import logging
+import re
+from pathlib import Path
+from typing import Iterator
+
 import pytest
 from fixtures.mcm import (
     invalidator_development,
@@ -14,6 +19,11 @@ from fixtures.mcm import (
 )
 from fixtures.oauth import stdin_enabled
 
+from rest.applications.mcm.core import McM
+from rest.applications.mcm.invalidate_request import InvalidateDeleteRequests
+from rest.client.cache import ResponseCache
+from rest.testing.mcm_server import CAMPAIGNS, McMDataset, McMServer
+
 
 @pytest.mark.usefixtures("stdin_enabled", "production_manager_or_higher")
 class TestInvalidateDeleteRequest:
@@ -189,3 +199,368 @@ class TestInvalidateDeleteRequest:
             invalidator_development._invalidate_delete_root_request(
                 root_prepid=root_request_example
             )
+
+
+@pytest.fixture
+def stand_in(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[McMServer]:
+    """
+    Local McM stand-in with two chains per root request. The
+    invalidator's log is written to a temporary folder.
+    """
+    monkeypatch.chdir(tmp_path)
+    dataset = McMDataset.generate(
+        seed=3, root_requests=4, chains_per_root=2, min_chain_length=4
+    )
+    with McMServer(dataset=dataset) as server:
+        yield server
+
+
+def _roots(server: McMServer) -> list[str]:
+    return [
+        r["prepid"]
+        for r in server.dataset.search("requests", {"member_of_campaign": CAMPAIGNS[0]})
+    ]
+
+
+class TestInvalidationLookup:
+    """
+    Test cases for the invalidation lookup of `InvalidateDeleteRequests`,
+    using the local McM stand-in.
+    """
+
+    def test_cascade_lookups(
+        self, stand_in: McMServer, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """
+        Check every invalidation is announced once and the requests
+        shared by the chains are only looked up once.
+        """
+        caplog.set_level(
+            logging.INFO, logger="rest.applications.mcm.invalidate_request"
+        )
+        roots = _roots(stand_in)
+        with McM(id="none", server=stand_in.url) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm)
+            result = invalidator.invalidate_delete_cascade_requests(
+                requests_prepid=roots, remove_chain=True
+            )
+
+        assert result["success"] == roots
+        invalidations = stand_in.dataset.databases["invalidations"].values()
+        assert invalidations
+        assert {i["status"] for i in invalidations} == {"announced"}
+
+        # Per root: the first chain (4 requests), the second chain except
+        # the requests it shares with the first one, and the reset root.
+        chain_searches = len(roots)
+        assert stand_in.calls[("GET", "search")] == chain_searches + len(roots) * 7
+
+        # The root and the second request are shared by both chains
+        skipped = re.findall(r"skipped (\d+) lookups", caplog.text)
+        assert sum(int(count) for count in skipped) == len(roots) * 2
+
+    def test_cascade_with_cache(self, stand_in: McMServer) -> None:
+        """
+        Check the invalidations created while processing the chains
+        are found even if the client caches the search results.
+        """
+        roots = _roots(stand_in)
+        # Only the root requests get invalidations, once they are reset:
+        # nothing is announced while processing the chains.
+        for request in stand_in.dataset.databases["requests"].values():
+            if request["prepid"] not in roots:
+                request["status"] = "new"
+
+        with McM(id="none", server=stand_in.url, cache=ResponseCache()) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm)
+            result = invalidator.invalidate_delete_cascade_requests(
+                requests_prepid=roots, remove_chain=True
+            )
+
+        assert result["success"] == roots
+        invalidations = stand_in.dataset.databases["invalidations"].values()
+        assert {i["prepid"] for i in invalidations} == set(roots)
+        assert {i["status"] for i in invalidations} == {"announced"}
+
+    def test_announce_in_chunks(self, stand_in: McMServer) -> None:
+        """
+        Check the records are announced in chunks and only once.
+        """
+        requests = [
+            r["prepid"] for r in stand_in.dataset.search("requests", {"status": "done"})
+        ][:3]
+        for prepid in requests:
+            stand_in.dataset.reset(prepid)
+
+        with McM(id="none", server=stand_in.url) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm, announce_chunk_size=2)
+            with invalidator._lookup_pool():
+                invalidator._process_invalidation(request_prepids=requests + requests)
+                invalidator._process_invalidation(request_prepids=requests)
+
+        records = len(stand_in.dataset.databases["invalidations"])
+        assert records >= len(requests)
+        assert stand_in.calls[("GET", "search")] == 2 * len(requests)
+        assert stand_in.calls[("PUT", "announce")] == -(-records // 2)
+
+    def test_searches_sent_are_logged(
+        self, stand_in: McMServer, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """
+        Check the log reports the searches actually sent, trailing
+        pages included, against one search per request provided.
+        """
+        caplog.set_level(
+            logging.INFO, logger="rest.applications.mcm.invalidate_request"
+        )
+        first, second = [
+            r["prepid"] for r in stand_in.dataset.search("requests", {"status": "done"})
+        ][:2]
+        stand_in.dataset.reset(first)
+        invalidations = stand_in.dataset.databases["invalidations"]
+        for number in range(3):
+            invalidations[f"{first}-extra-{number}"] = {
+                "_id": f"{first}-extra-{number}",
+                "prepid": first,
+                "object": f"/Extra/{number}/AODSIM",
+                "type": "dataset",
+                "status": "new",
+            }
+        records = len(invalidations)
+
+        with McM(id="none", server=stand_in.url) as mcm:
+            # Small pages the stand-in honors, to get several of them
+            mcm.PAGE_SIZE = 2
+            invalidator = InvalidateDeleteRequests(mcm=mcm)
+            with invalidator._lookup_pool():
+                found = invalidator._get_invalidations([first, second, first])
+
+        assert len(found) == records
+        # The search for `first` stops at the first page that is not full,
+        # an empty one if the records fill the pages, `second` has one page.
+        first_pages = records // 2 + 1
+        sent = first_pages + 1
+        assert stand_in.calls[("GET", "search")] == sent
+        assert (
+            f"Looked up invalidations for 2 requests with {sent} searches, "
+            "skipped 1 lookups of requests already looked up"
+        ) in caplog.text
+
+
+class TestParallelCascade:
+    """
+    Test cases for processing several root requests at the same time,
+    using the local McM stand-in.
+    """
+
+    def test_same_result_as_sequential(
+        self, stand_in: McMServer, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """
+        Check the root requests are processed like in the sequential mode,
+        reported in the order they were provided and with prefixed logs.
+        """
+        caplog.set_level(
+            logging.INFO, logger="rest.applications.mcm.invalidate_request"
+        )
+        roots = _roots(stand_in)
+        with McM(id="none", server=stand_in.url) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm)
+            result = invalidator.invalidate_delete_cascade_requests(
+                requests_prepid=list(reversed(roots)) + ["missing"],
+                remove_chain=True,
+                workers=4,
+            )
+
+        assert result == {
+            "success": list(reversed(roots)),
+            "failed": [],
+            "filtered": ["missing"],
+        }
+        assert not stand_in.dataset.databases["chained_requests"]
+        assert {
+            i["status"] for i in stand_in.dataset.databases["invalidations"].values()
+        } == {"announced"}
+
+        log = next(tmp_path.glob("mcm_invalidate_requests_*.log")).read_text()
+        for root in roots:
+            assert f"[{root}] Processing root request: {root}" in log
+
+    def test_failures_are_isolated(
+        self, stand_in: McMServer, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Check a root request that fails does not stop the others
+        and the limit is honored.
+        """
+        roots = _roots(stand_in)
+        with McM(id="none", server=stand_in.url) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm)
+            process = invalidator._invalidate_delete_root_request
+
+            def failing(root_prepid: str, **kwargs) -> None:
+                if root_prepid == roots[1]:
+                    raise RuntimeError("Unable to rewind")
+                process(root_prepid=root_prepid, **kwargs)
+
+            monkeypatch.setattr(invalidator, "_invalidate_delete_root_request", failing)
+            result = invalidator.invalidate_delete_cascade_requests(
+                requests_prepid=roots, limit=3, workers=3
+            )
+
+        assert result["success"] == [roots[0], roots[2]]
+        assert result["failed"] == [roots[1]]
+
+
+class TestChainRequestSteps:
+    """
+    Test cases for the steps to process the chain requests of a root
+    request, using the local McM stand-in.
+    """
+
+    def test_steps_order(self, stand_in: McMServer) -> None:
+        """
+        Check the steps follow the ordering constraints and run in
+        fewer sequential steps than the sequential processing.
+        """
+        root = _roots(stand_in)[0]
+        with McM(id="none", server=stand_in.url) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm)
+            chains = sorted(
+                mcm.get("chained_requests", query=f"contains={root}"),
+                key=lambda el: el["step"],
+                reverse=True,
+            )
+            steps = invalidator._chain_requests_steps(
+                chain_req_operate=chains, remove_chain=False
+            )
+
+        first, second = chains
+        shared = first["chain"][1]
+        assert shared == second["chain"][1]
+        dependencies = steps._dependencies
+        assert (
+            f"disable-flag:{first['prepid']}"
+            in dependencies[f"rewind:{first['prepid']}"]
+        )
+        assert f"rewind:{first['prepid']}" in dependencies[f"rewind:{second['prepid']}"]
+        assert dependencies[f"delete:{shared}"] == (
+            f"invalidate:{first['prepid']}",
+            f"invalidate:{second['prepid']}",
+            f"delete:{first['chain'][2]}",
+            f"delete:{second['chain'][2]}",
+        )
+        assert f"delete:{root}" not in steps
+        assert steps.depth() < len(steps)
+
+    def test_sequential_order(self, stand_in: McMServer) -> None:
+        """
+        Check the steps run one by one follow the order of the sequential
+        processing: the requests of a chain request are deleted before
+        rewinding the next one, except the ones shared with it.
+        """
+        root = _roots(stand_in)[0]
+        with McM(id="none", server=stand_in.url) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm)
+            chains = sorted(
+                mcm.get("chained_requests", query=f"contains={root}"),
+                key=lambda el: el["step"],
+                reverse=True,
+            )
+            steps = invalidator._chain_requests_steps(
+                chain_req_operate=chains, remove_chain=False
+            )
+
+        first, second = chains
+        order = list(steps._tasks)
+        shared = set(first["chain"]) & set(second["chain"])
+        next_rewind = order.index(f"rewind:{second['prepid']}")
+        own = [rid for rid in reversed(first["chain"]) if rid not in shared]
+        assert own
+        assert [order.index(f"delete:{rid}") for rid in own] == sorted(
+            order.index(f"delete:{rid}") for rid in own
+        )
+        assert all(order.index(f"delete:{rid}") < next_rewind for rid in own)
+        assert all(
+            order.index(f"delete:{rid}") > order.index(f"invalidate:{second['prepid']}")
+            for rid in shared - {root}
+        )
+
+    def test_flags_disabled_before_rewinding(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Check no chain request of a group is rewound while the flag of
+        another one, sharing requests with it, is still enabled.
+        """
+        monkeypatch.chdir(tmp_path)
+        dataset = McMDataset.generate(
+            seed=5, root_requests=1, chains_per_root=4, min_chain_length=4
+        )
+        with (
+            McMServer(dataset=dataset) as server,
+            McM(id="none", server=server.url) as mcm,
+        ):
+            root = _roots(server)[0]
+            invalidator = InvalidateDeleteRequests(mcm=mcm, step_workers=8)
+            events: list[tuple[str, str]] = []
+            set_flag = invalidator._set_chain_request_flag
+            rewind = invalidator._rewind_chain_request
+
+            def recording_set_flag(ch_req_data, flag: bool) -> None:
+                set_flag(ch_req_data, flag)
+                if not flag:
+                    events.append(("disable", ch_req_data["prepid"]))
+
+            def recording_rewind(ch_req_prepid: str) -> None:
+                events.append(("rewind", ch_req_prepid))
+                rewind(ch_req_prepid)
+
+            monkeypatch.setattr(
+                invalidator, "_set_chain_request_flag", recording_set_flag
+            )
+            monkeypatch.setattr(invalidator, "_rewind_chain_request", recording_rewind)
+            chains = mcm.get("chained_requests", query=f"contains={root}")
+            assert len(chains) == 4
+
+            steps = invalidator._chain_requests_steps(
+                chain_req_operate=chains, remove_chain=False
+            )
+            disabled = {f"disable-flag:{ch['prepid']}" for ch in chains}
+            for ch in chains:
+                assert disabled <= set(steps._dependencies[f"rewind:{ch['prepid']}"])
+
+            result = invalidator.invalidate_delete_cascade_requests(
+                requests_prepid=[root]
+            )
+
+        assert result["success"] == [root]
+        kinds = [kind for kind, _ in events]
+        assert kinds == ["disable"] * 4 + ["rewind"] * 4
+        for chain in server.dataset.databases["chained_requests"].values():
+            assert chain["action_parameters"]["flag"]
+
+    def test_chains_are_reenabled(self, stand_in: McMServer) -> None:
+        """
+        Check the chain requests end up with only the root request
+        and their flag enabled.
+        """
+        roots = _roots(stand_in)
+        with McM(id="none", server=stand_in.url) as mcm:
+            invalidator = InvalidateDeleteRequests(mcm=mcm, step_workers=4)
+            result = invalidator.invalidate_delete_cascade_requests(
+                requests_prepid=roots
+            )
+
+        assert result["success"] == roots
+        chains = stand_in.dataset.databases["chained_requests"].values()
+        assert len(chains) == 2 * len(roots)
+        for chain in chains:
+            assert chain["chain"] == [chain["chain"][0]]
+            assert chain["chain"][0] in roots
+            assert chain["action_parameters"]["flag"]
+        assert len(stand_in.dataset.databases["requests"]) == len(roots)
+
+        # The flag is disabled with the retrieved chain requests and
+        # re-enabled without revision conflicts: one update per toggle.
+        assert stand_in.calls[("PUT", "update")] == 2 * len(chains)
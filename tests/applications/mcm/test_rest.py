@@ -4,6 +4,7 @@ the McM REST module and the authentication mechanisms.
 """
 
 import pytest
+from fixtures.mcm import mcm_stand_in
 from fixtures.oauth import (
     access_token_credentials,
     session_cookie_issues,
@@ -11,6 +12,8 @@ from fixtures.oauth import (
 )
 
 from rest import McM
+from rest.client.cache import ResponseCache
+from rest.testing.mcm_server import CAMPAIGNS, McMServer
 from rest.utils.logger import LoggerFactory
 
 # Logger
@@ -78,3 +81,125 @@ def test_api_session_cookie(mcm_id, dev):
     mcm = McM(id=mcm_id, dev=dev)
     public_test_api(mcm=mcm)
     private_test_api(mcm=mcm)
+
+
+@pytest.mark.usefixtures("stdin_enabled")
+def test_get_many():
+    """
+    Check that several requests are retrieved concurrently and
+    that missing ones do not abort the batch.
+    """
+    mcm = McM(id=McM.OIDC, dev=True)
+    existing = ["TOP-Summer12-00368", "TOP-Summer12-00369"]
+    missing = "PPD-Run3ThisDoesNotExists23pLHEGS-00001"
+
+    results = mcm.get_many("requests", existing + [missing], max_workers=3)
+    assert set(results) == set(existing + [missing])
+    for prepid in existing:
+        assert isinstance(results[prepid], dict)
+        assert results[prepid]["prepid"] == prepid
+    assert not results[missing]
+
+
+@pytest.mark.usefixtures("stdin_enabled")
+def test_iter_search():
+    """
+    Check that streaming a search yields the same documents
+    as retrieving all of them at once.
+    """
+    mcm = McM(id=McM.OIDC, dev=True)
+    query = "prepid=TOP-Summer12-003*"
+    streamed = [r["prepid"] for r in mcm.iter_search("requests", query, page_size=7)]
+    all_at_once = [r["prepid"] for r in mcm.get("requests", query=query)]
+    assert streamed
+    assert streamed == all_at_once
+
+
+def test_page_sizes(mcm_stand_in: McMServer):
+    """
+    Check the adaptive page size retrieves the same documents
+    and unknown page sizes are rejected.
+    """
+    with pytest.raises(ValueError):
+        McM(id="none", server=mcm_stand_in.url, page_size="large")
+
+    with McM(id="none", server=mcm_stand_in.url, page_size=McM.ADAPTIVE) as mcm:
+        adaptive = [r["prepid"] for r in mcm.iter_search("requests", "prepid=*")]
+        fixed = [r["prepid"] for r in mcm.iter_search("requests", "prepid=*", 7)]
+        assert adaptive and adaptive == fixed
+
+
+def test_are_root_requests(mcm_stand_in: McMServer):
+    """
+    Check that requests are classified in bulk with one call per chunk
+    and the retrieved documents are reused from the cache.
+    """
+    requests = mcm_stand_in.dataset.search("requests", {})
+    prepids = [r["prepid"] for r in requests] + ["PPD-Run3Missing22GS-00001"]
+    expected = {r["prepid"]: r["member_of_campaign"] == CAMPAIGNS[0] for r in requests}
+
+    with McM(id="none", server=mcm_stand_in.url, cache=ResponseCache()) as mcm:
+        result = mcm.are_root_requests(prepids + prepids[:3], chunk_size=20)
+        assert result == {**expected, "PPD-Run3Missing22GS-00001": False}
+        assert mcm_stand_in.calls[("PUT", "list_with_file")] == -(-len(prepids) // 20)
+
+        # Later steps reuse the retrieved documents
+        assert mcm.is_root_request(prepids[0]) == expected[prepids[0]]
+        assert mcm.get_requests(prepids[:-1])[prepids[1]] == requests[1]
+        assert mcm_stand_in.calls[("GET", "get")] == 0
+        assert mcm_stand_in.calls[("PUT", "list_with_file")] == -(-len(prepids) // 20)
+
+    # Surrounding whitespace is ignored
+    with McM(id="none", server=mcm_stand_in.url) as mcm:
+        padded = mcm.get_requests([f" {prepids[0]}\n", prepids[1]])
+        assert padded == {prepids[0]: requests[0], prepids[1]: requests[1]}
+
+
+def test_update_optimistic(mcm_stand_in: McMServer):
+    """
+    Check that updates reuse the retrieved document and it is only
+    retrieved again when it was modified meanwhile.
+    """
+
+    def disable(chain: dict) -> None:
+        chain["action_parameters"]["flag"] = False
+
+    with McM(id="none", server=mcm_stand_in.url) as mcm:
+        first, second = mcm.get("chained_requests", query="prepid=*")[:2]
+        mcm_stand_in.calls.clear()
+
+        # Up to date: one call
+        assert mcm.update_optimistic("chained_requests", first, disable)["results"]
+        assert mcm_stand_in.calls == {("PUT", "update"): 1}
+        assert first["action_parameters"]["flag"]
+
+        # Modified meanwhile: retrieved again and the change is reapplied
+        mcm_stand_in.calls.clear()
+        modified = mcm.get("chained_requests", second["prepid"])
+        modified["step"] += 1
+        assert mcm.update("chained_requests", modified)["results"]
+        assert mcm.update_optimistic("chained_requests", second, disable)["results"]
+        assert mcm_stand_in.calls[("PUT", "update")] == 3
+        assert mcm_stand_in.calls[("GET", "get")] == 2
+
+        current = mcm_stand_in.dataset.get("chained_requests", second["prepid"])
+        assert current["step"] == modified["step"]
+        assert not current["action_parameters"]["flag"]
+
+        # Stale for every attempt: give up
+        stale = mcm.update_optimistic(
+            "chained_requests", second, disable, max_attempts=1
+        )
+        assert not stale["results"]
+        missing = mcm.update_optimistic(
+            "chained_requests", "PPD-chain_Missing-00001", disable
+        )
+        assert not missing["results"]
+
+    # Conflicts reported without HTTP 409
+    assert McM._is_revision_conflict(
+        200, {"results": False, "message": "Revision clash"}
+    )
+    assert not McM._is_revision_conflict(
+        200, {"results": False, "message": "Forbidden"}
+    )
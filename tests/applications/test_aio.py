@@ -0,0 +1,93 @@
+"""
+Provides some tests for the module
+`src/rest/applications/aio.py` to verify its
+correctness.
+"""
+
+import asyncio
+import threading
+import time
+
+from fixtures.mcm import mcm_stand_in
+
+from rest import AsyncMcM, McM
+from rest.testing.mcm_server import McMServer
+
+
+def test_bounded_concurrency() -> None:
+    """
+    Check that no more than `max_concurrency` calls run at the same time.
+    """
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def blocking_call(idx: int) -> int:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return idx
+
+    async def scenario() -> list[int]:
+        async with AsyncMcM(id="none", max_concurrency=4) as mcm:
+            assert isinstance(mcm.client, McM)
+            assert mcm.server == mcm.client.server
+            return await asyncio.gather(
+                *(mcm._run(blocking_call, idx) for idx in range(40))
+            )
+
+    results = asyncio.run(scenario())
+    assert results == list(range(40))
+    assert 1 < peak <= 4
+
+
+def test_awaited_calls(mcm_stand_in: McMServer) -> None:
+    """
+    Check the requests, the context managers and the generator methods
+    work against the local McM stand-in and the HTTP session is set up
+    in a worker thread.
+    """
+    requests = list(mcm_stand_in.dataset.databases["requests"])
+    setup_threads: list[str] = []
+
+    async def scenario() -> None:
+        async with AsyncMcM(id="none", server=mcm_stand_in.url) as mcm:
+            assert mcm.client._session is None
+            create_session = mcm.client._create_session
+
+            def recorded_create_session():
+                setup_threads.append(threading.current_thread().name)
+                return create_session()
+
+            mcm.client._create_session = recorded_create_session
+            with mcm.deadline(30):
+                request = await mcm.get("requests", requests[0])
+            assert request["prepid"] == requests[0]
+
+            fetched = {
+                prepid: result["prepid"]
+                async for prepid, result in mcm.iter_many(
+                    "requests", requests[:5], max_workers=2
+                )
+            }
+            assert fetched == {prepid: prepid for prepid in requests[:5]}
+
+            found = [
+                document["prepid"]
+                async for document in mcm.iter_search(
+                    "requests", "prepid=*", page_size=7
+                )
+            ]
+            assert sorted(found) == sorted(requests)
+
+            # The worker threads do not share the main session
+            assert mcm._sessions
+            assert all(session is not mcm.client.session for session in mcm._sessions)
+
+    asyncio.run(scenario())
+    assert len(setup_threads) == 1
+    assert setup_threads[0].startswith("pdmv-http-client-mcm")
@@ -0,0 +1,76 @@
+"""
+Provides some tests for the module
+`src/rest/applications/base.py` to verify its
+correctness.
+"""
+
+from pathlib import Path
+
+import requests
+from fixtures.mcm import mcm_stand_in
+
+from rest.applications.base import BaseClient
+from rest.applications.mcm.core import McM
+from rest.testing.mcm_server import McMServer
+
+
+def test_lazy_session_is_deferred(tmp_path: Path) -> None:
+    """
+    Check that a lazy client does not authenticate until it is used.
+    """
+    cookie = tmp_path / "cookie"
+    client = BaseClient(app="mcm", id=BaseClient.SSO, cookie=str(cookie), lazy=True)
+
+    assert client._session is None
+    assert client.session_setup_time is None
+    assert client.credentials_path is None
+    assert not cookie.exists()
+
+    # Closing an unused client must not authenticate it
+    client.close()
+    assert client._session is None
+
+
+def test_lazy_session_is_created_once() -> None:
+    """
+    Check that the session is created on first use and reused afterwards.
+    """
+    with BaseClient(app="mcm", id="none", lazy=True) as client:
+        session = client.session
+        assert isinstance(session, requests.Session)
+        assert client.session_setup_time is not None
+        assert client.session is session
+        assert client._current_session() is session
+
+
+def test_eager_session() -> None:
+    """
+    Check that the session is created on instantiation by default.
+    """
+    with BaseClient(app="mcm", id="none") as client:
+        assert client._session is not None
+        assert client.session_setup_time is not None
+
+
+def test_prefetch_pool_is_reused(mcm_stand_in: McMServer) -> None:
+    """
+    Check that single-page searches use the current session and the
+    prefetching workers are kept across searches.
+    """
+    with McM(id="none", server=mcm_stand_in.url, page_prefetch=4) as mcm:
+        # The stand-in honors large pages, so a short one is the last one
+        mcm.PAGE_SIZE = 1000
+        for _ in range(10):
+            assert mcm.get("requests", query="prepid=*", page_size=1000)
+        assert not mcm._page_pool_sessions
+
+        expected = mcm.get("requests", query="prepid=*", page_size=1000)
+        for _ in range(3):
+            assert mcm.get("requests", query="prepid=*", page_size=5) == expected
+        forked = list(mcm._page_pool_sessions)
+        assert 0 < len(forked) <= 4
+
+        mcm.get("requests", query="prepid=*", page_size=5)
+        assert mcm._page_pool_sessions == forked
+
+    assert mcm._page_pool is None
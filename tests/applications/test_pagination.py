@@ -0,0 +1,212 @@
+"""
+Provides some tests for the module
+`src/rest/applications/pagination.py` to verify its
+correctness.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from requests.exceptions import Timeout
+
+from rest.applications.pagination import AdaptivePaginator, Paginator
+
+
+class FakeSearch:
+    """
+    Emulates a paginated search over `total` results.
+    """
+
+    def __init__(self, total: int, page_size: int):
+        self.total = total
+        self.page_size = page_size
+        self.requested: list[int] = []
+        self._lock = threading.Lock()
+
+    def fetch_page(self, page: int) -> list[int]:
+        with self._lock:
+            self.requested.append(page)
+        start = page * self.page_size
+        end = min(start + self.page_size, self.total)
+        return list(range(start, end))
+
+
+@pytest.mark.parametrize("total", [0, 1, 49, 50, 51, 1000, 1001])
+@pytest.mark.parametrize("prefetch", [1, 4])
+def test_results_in_order(total: int, prefetch: int) -> None:
+    search = FakeSearch(total=total, page_size=50)
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        paginator = Paginator(
+            fetch_page=search.fetch_page,
+            page_size=50,
+            prefetch=prefetch,
+            executor=executor,
+        )
+        results = [el for page in paginator.pages() for el in page]
+
+    assert results == list(range(total))
+
+
+def test_short_page_stops_the_search() -> None:
+    """
+    No trailing empty page is requested if the last one is short.
+    """
+    search = FakeSearch(total=120, page_size=50)
+    paginator = Paginator(fetch_page=search.fetch_page, page_size=50)
+    assert sum(len(page) for page in paginator.pages()) == 120
+    assert search.requested == [0, 1, 2]
+
+
+def test_unknown_page_size_stops_at_empty_page() -> None:
+    search = FakeSearch(total=120, page_size=50)
+    paginator = Paginator(fetch_page=search.fetch_page)
+    assert sum(len(page) for page in paginator.pages()) == 120
+    assert search.requested == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("prefetch", [1, 4])
+def test_capped_page_size_walks_until_empty_page(prefetch: int) -> None:
+    """
+    The server caps the page size, so every page looks short.
+    """
+    search = FakeSearch(total=120, page_size=20)
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        paginator = Paginator(
+            fetch_page=search.fetch_page,
+            page_size=50,
+            prefetch=prefetch,
+            executor=executor,
+            honored_page_size=20,
+        )
+        results = [el for page in paginator.pages() for el in page]
+
+    assert results == list(range(120))
+
+
+def test_full_page_shows_the_page_size_is_honored() -> None:
+    search = FakeSearch(total=120, page_size=50)
+    paginator = Paginator(
+        fetch_page=search.fetch_page, page_size=50, honored_page_size=20
+    )
+    assert sum(len(page) for page in paginator.pages()) == 120
+    assert search.requested == [0, 1, 2]
+
+
+def test_honored_page_size_short_page_stops_the_search() -> None:
+    search = FakeSearch(total=10, page_size=50)
+    paginator = Paginator(
+        fetch_page=search.fetch_page, page_size=50, honored_page_size=50
+    )
+    assert list(paginator.pages()) == [list(range(10))]
+    assert search.requested == [0]
+
+
+def test_single_page_costs_one_request() -> None:
+    search = FakeSearch(total=10, page_size=50)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paginator = Paginator(
+            fetch_page=search.fetch_page, page_size=50, prefetch=8, executor=executor
+        )
+        assert list(paginator.pages()) == [list(range(10))]
+
+    assert search.requested == [0]
+
+
+def test_first_page_in_calling_thread() -> None:
+    search = FakeSearch(total=500, page_size=50)
+    threads: dict[int, str] = {}
+
+    def fetch_page(page: int) -> list[int]:
+        threads[page] = threading.current_thread().name
+        return search.fetch_page(page)
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch") as executor:
+        paginator = Paginator(
+            fetch_page=fetch_page, page_size=50, prefetch=4, executor=executor
+        )
+        assert sum(len(page) for page in paginator.pages()) == 500
+
+    assert threads[0] == threading.current_thread().name
+    assert all(name.startswith("prefetch") for page, name in threads.items() if page)
+
+
+class TestAdaptivePaginator:
+    """
+    Check the page size is tuned without skipping or repeating results.
+    """
+
+    @staticmethod
+    def fake_fetch(total: int, sizes: list[int], payload_per_result: int = 100):
+        def fetch_page(page: int, page_size: int) -> tuple[list[int], int]:
+            sizes.append(page_size)
+            start = page * page_size
+            results = list(range(start, min(start + page_size, total)))
+            return results, len(results) * payload_per_result
+
+        return fetch_page
+
+    def test_grows_within_budget(self) -> None:
+        sizes: list[int] = []
+        paginator = AdaptivePaginator(
+            fetch_page=self.fake_fetch(total=10_000, sizes=sizes), page_size=50
+        )
+        results = [el for page in paginator.pages() for el in page]
+        assert results == list(range(10_000))
+        assert max(sizes) > 50
+        assert len(sizes) < 10_000 // 50
+
+    def test_capped_page_size(self) -> None:
+        sizes: list[int] = []
+        fetch = self.fake_fetch(total=10_000, sizes=sizes)
+
+        def fetch_page(page: int, page_size: int) -> tuple[list[int], int]:
+            # The server caps the page size to 200
+            capped = min(page_size, 200)
+            results, payload = fetch(page * page_size // capped, capped)
+            sizes[-1] = page_size
+            return results, payload
+
+        paginator = AdaptivePaginator(fetch_page=fetch_page, page_size=50)
+        results = [el for page in paginator.pages() for el in page]
+        assert results == list(range(10_000))
+        assert paginator.max_page_size == 200
+        assert sizes[-1] == 200
+
+    def test_shrinks_over_payload_budget(self) -> None:
+        sizes: list[int] = []
+        paginator = AdaptivePaginator(
+            fetch_page=self.fake_fetch(total=1000, sizes=sizes),
+            page_size=200,
+            max_payload=150 * 100,
+        )
+        results = [el for page in paginator.pages() for el in page]
+        assert results == list(range(1000))
+        assert sizes[:3] == [200, 100, 100]
+
+    def test_shrinks_on_timeout(self) -> None:
+        sizes: list[int] = []
+        fetch = self.fake_fetch(total=300, sizes=sizes)
+
+        def fetch_page(page: int, page_size: int) -> tuple[list[int], int]:
+            if page_size > 50:
+                sizes.append(page_size)
+                raise Timeout()
+            return fetch(page, page_size)
+
+        paginator = AdaptivePaginator(
+            fetch_page=fetch_page, page_size=200, target_latency=0
+        )
+        results = [el for page in paginator.pages() for el in page]
+        assert results == list(range(300))
+        assert sizes[:3] == [200, 100, 50]
+
+    def test_timeout_at_minimum_size(self) -> None:
+        def fetch_page(page: int, page_size: int) -> tuple[list[int], int]:
+            raise Timeout()
+
+        paginator = AdaptivePaginator(
+            fetch_page=fetch_page, page_size=40, min_page_size=20
+        )
+        with pytest.raises(Timeout):
+            list(paginator.pages())
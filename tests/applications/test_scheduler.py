@@ -0,0 +1,80 @@
+"""
+Provides some tests for the module
+`src/rest/applications/scheduler.py` to verify its
+correctness.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rest.applications.scheduler import TaskGraph
+
+
+def _diamond(log: list[str], delay: float = 0.0) -> TaskGraph:
+    lock = threading.Lock()
+
+    def step(name: str):
+        def run() -> str:
+            time.sleep(delay)
+            with lock:
+                log.append(name)
+            return name
+
+        return run
+
+    graph = TaskGraph()
+    graph.add("a", step("a"))
+    graph.add("b", step("b"), after=["a"])
+    graph.add("c", step("c"), after=["a"])
+    graph.add("d", step("d"), after=["b", "c"])
+    return graph
+
+
+def test_graph_is_acyclic() -> None:
+    graph = TaskGraph()
+    graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("b", lambda: None, after=["c"])
+
+    assert _diamond([]).depth() == 3
+    assert TaskGraph().depth() == 0
+
+
+def test_sequential_run() -> None:
+    log: list[str] = []
+    results = _diamond(log).run()
+    assert log == ["a", "b", "c", "d"]
+    assert results == {"a": "a", "b": "b", "c": "c", "d": "d"}
+
+
+def test_concurrent_run() -> None:
+    log: list[str] = []
+    graph = _diamond(log, delay=0.1)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        start = time.monotonic()
+        results = graph.run(executor=executor)
+        elapsed = time.monotonic() - start
+
+    assert log[0] == "a" and log[-1] == "d"
+    assert set(results) == {"a", "b", "c", "d"}
+    # b and c run at the same time
+    assert elapsed < 0.35
+
+
+def test_failure_stops_the_dependents() -> None:
+    ran: list[str] = []
+    graph = TaskGraph()
+    graph.add("a", lambda: ran.append("a"))
+    graph.add("b", lambda: 1 / 0, after=["a"])
+    graph.add("c", lambda: ran.append("c"), after=["b"])
+    graph.add("d", lambda: ran.append("d"), after=["a"])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(ZeroDivisionError):
+            graph.run(executor=executor)
+    assert "c" not in ran
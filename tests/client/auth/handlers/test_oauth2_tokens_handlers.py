@@ -4,16 +4,26 @@ Provides some tests for the module
 correctness.
 """
 
+import base64
 import json
 import os
 import stat
+import threading
+import time
 
 import pytest
 import requests
 from fixtures.files import empty_json_file, read_only_file, writable_file
+from fixtures.mcm import mcm_stand_in
 from fixtures.oauth import access_token_credentials, correct_application, stdin_enabled
 
-from rest.client.auth.handlers.oauth2_tokens import AccessTokenHandler, IDTokenHandler
+from rest.client.auth.handlers.oauth2_tokens import (
+    AccessTokenHandler,
+    IDTokenHandler,
+    _token_expiration,
+)
+from rest.client.session import AuthenticatedSession
+from rest.testing.mcm_server import McMServer
 from rest.utils.logger import LoggerFactory
 
 # Logger instance
@@ -182,3 +192,138 @@ class TestIDTokenHandler:
                 "Reject the following request in the CERN Authentication page"
             )
             id_token_handler.configure(session)
+
+
+def encode_token(claims: dict) -> str:
+    """
+    Creates an unsigned JSON Web Token including the given claims.
+    """
+    header = base64.urlsafe_b64encode(b'{"alg":"none"}').rstrip(b"=").decode()
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode())
+    return f"{header}.{payload.rstrip(b'=').decode()}.signature"
+
+
+class TestLocalTokenValidation:
+    """
+    Check tokens are validated without querying the web application
+    when their expiration time is known.
+    """
+
+    @pytest.fixture
+    def handler(self, correct_application, writable_file) -> IDTokenHandler:
+        web_application, target_application = correct_application
+        return IDTokenHandler(
+            url=web_application,
+            credential_path=writable_file,
+            target_application=target_application,
+        )
+
+    def test_token_expiration(self) -> None:
+        exp = time.time() + 600
+        assert _token_expiration({"access_token": encode_token({"exp": exp})}) == exp
+        assert (
+            _token_expiration(
+                {"access_token": "opaque", "obtained_at": 100, "expires_in": 1200}
+            )
+            == 1300
+        )
+        assert _token_expiration({"access_token": "opaque"}) is None
+
+    def test_validate_locally(self, handler) -> None:
+        valid = {"access_token": encode_token({"exp": time.time() + 600})}
+        about_to_expire = {"access_token": encode_token({"exp": time.time() + 5})}
+        expired = {"access_token": encode_token({"exp": time.time() - 600})}
+        assert handler._validate(valid)
+        assert not handler._validate(about_to_expire)
+        assert not handler._validate(expired)
+        assert not handler._validate({})
+
+    def test_rejected_token(self, handler) -> None:
+        valid = {"access_token": encode_token({"exp": time.time() + 600})}
+        rejected = requests.Response()
+        rejected.request = requests.Request(
+            method="GET",
+            url=handler._url,
+            headers={"Authorization": f"Bearer {valid['access_token']}"},
+        ).prepare()
+
+        # Lacking permissions does not invalidate an unexpired token
+        rejected.status_code = 403
+        rejected.url = handler._url
+        handler.discard_credential(response=rejected)
+        assert handler._validate(valid)
+
+        rejected.status_code = 401
+        handler.discard_credential(response=rejected)
+        assert not handler._validate(valid)
+
+
+class CountingAccessTokenHandler(AccessTokenHandler):
+    """
+    Issues a new token locally for each credential request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested = 0
+
+    def _request_credential(self) -> dict:
+        self.requested += 1
+        time.sleep(0.05)
+        claims = {"exp": time.time() + 600, "jti": str(self.requested)}
+        return {"access_token": encode_token(claims), "obtained_at": time.time()}
+
+
+def test_single_flight_renewal(correct_application, empty_json_file) -> None:
+    """
+    Check that only one thread renews the credential, the rest
+    reuse the one it stored.
+    """
+    web_application, target_application = correct_application
+    handlers = [
+        CountingAccessTokenHandler(
+            url=web_application,
+            credential_path=empty_json_file,
+            client_id="",
+            client_secret="",
+            target_application=target_application,
+        )
+        for _ in range(8)
+    ]
+    threads = [threading.Thread(target=h.authenticate) for h in handlers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(h.requested for h in handlers) == 1
+    tokens = {h._credential["access_token"] for h in handlers}
+    assert len(tokens) == 1
+    os.remove(empty_json_file)
+
+
+def test_forbidden_keeps_the_token(mcm_stand_in: McMServer, empty_json_file) -> None:
+    """
+    Check that a 403 (e.g. a missing role) does not renew an unexpired
+    token, while a 401 does.
+    """
+    handler = CountingAccessTokenHandler(
+        url=mcm_stand_in.url,
+        credential_path=empty_json_file,
+        client_id="",
+        client_secret="",
+        target_application="",
+    )
+    session = AuthenticatedSession(handler=handler)
+    url = f"{mcm_stand_in.url}restapi/users/get_role"
+    assert handler.requested == 1
+
+    mcm_stand_in.inject_failures(count=1, status=403)
+    assert session.get(url, timeout=5).status_code == 403
+    assert handler.requested == 1
+    assert mcm_stand_in.calls[("GET", "role")] == 1
+
+    mcm_stand_in.inject_failures(count=1, status=401)
+    assert session.get(url, timeout=5).ok
+    assert handler.requested == 2
+    os.remove(empty_json_file)
@@ -0,0 +1,77 @@
+"""
+Provides some tests for the module
+`src/rest/client/auth/refresher.py` to verify its
+correctness.
+"""
+
+import threading
+import time
+from typing import Union
+
+from requests import Session
+
+from rest.client.auth.auth_interface import AuthInterface
+from rest.client.auth.refresher import CredentialRefresher
+
+
+class ExpiringHandler(AuthInterface):
+    """
+    Handler whose credential lasts `lifetime` seconds.
+    """
+
+    def __init__(self, lifetime: float):
+        self.lifetime = lifetime
+        self.expiration = time.time() + lifetime
+        self.renewals = 0
+        self.renewed = threading.Event()
+
+    def _load_credential(self): ...
+
+    def _request_credential(self): ...
+
+    def _save_credential(self) -> None: ...
+
+    def authenticate(self) -> None: ...
+
+    def configure(self, session: Session) -> Session:
+        return session
+
+    def expires_at(self) -> Union[float, None]:
+        return self.expiration
+
+    def refresh(self) -> bool:
+        self.renewals += 1
+        self.expiration = time.time() + self.lifetime
+        self.renewed.set()
+        return True
+
+
+def test_renews_before_expiration() -> None:
+    handler = ExpiringHandler(lifetime=0.5)
+    refresher = CredentialRefresher(handler=handler, margin=0.4)
+    refresher.start()
+    try:
+        assert handler.renewed.wait(timeout=2)
+        assert handler.expires_at() > time.time()
+    finally:
+        refresher.stop()
+
+
+def test_short_lived_credentials_are_not_renewed_in_a_loop() -> None:
+    handler = ExpiringHandler(lifetime=2)
+    refresher = CredentialRefresher(handler=handler, margin=10)
+    refresher.start()
+    time.sleep(0.2)
+    refresher.stop()
+    assert handler.renewals == 1
+
+
+def test_unknown_expiration_is_not_refreshed() -> None:
+    handler = ExpiringHandler(lifetime=1)
+    handler.expiration = None
+    refresher = CredentialRefresher(handler=handler, margin=10)
+    refresher.start()
+    time.sleep(0.05)
+    assert not refresher._thread.is_alive()
+    refresher.stop()
+    assert handler.renewals == 0
@@ -0,0 +1,138 @@
+"""
+Provides some tests for the module
+`src/rest/client/cache.py` to verify its
+correctness.
+"""
+
+import time
+
+from rest.client.cache import PersistentResponseCache, ResponseCache
+
+DOCUMENT = "restapi/requests/get/PPD-Run3Summer22GS-00001"
+OTHER_DOCUMENT = "restapi/requests/get/PPD-Run3Summer22GS-00002"
+SEARCH = "search/?db_name=requests&limit=50&page=0&prepid=PPD-*"
+CHAIN = "restapi/chained_requests/get/PPD-chain_Run3Summer22GS_flowRun3Summer22DR-00001"
+INVALIDATIONS = "search/?db_name=invalidations&limit=50&page=0&prepid=PPD-00001"
+
+
+class TestResponseCache:
+    def test_classify(self) -> None:
+        assert ResponseCache.classify(DOCUMENT) == (
+            "requests",
+            "PPD-Run3Summer22GS-00001",
+        )
+        assert ResponseCache.classify(SEARCH) == ("requests", None)
+        assert ResponseCache.classify("api/get_json/some_workflow") == (
+            "workflows",
+            "some_workflow",
+        )
+        assert ResponseCache.classify("restapi/requests/approve/PPD-00001") is None
+        assert ResponseCache.classify("restapi/requests/reset/PPD-00001") is None
+
+    def test_hits_and_misses(self) -> None:
+        cache = ResponseCache()
+        assert cache.lookup(DOCUMENT) is None
+        cache.store(DOCUMENT, {"results": {"prepid": "PPD-Run3Summer22GS-00001"}})
+        entry = cache.lookup(DOCUMENT)
+        assert entry and entry.fresh
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_ttl_by_type(self) -> None:
+        cache = ResponseCache(ttl=0, ttl_by_type={"chained_requests": 60})
+        cache.store(DOCUMENT, {})
+        cache.store(CHAIN, {})
+        time.sleep(0.01)
+        assert not cache.lookup(DOCUMENT).fresh
+        assert cache.lookup(CHAIN).fresh
+
+    def test_lru_eviction(self) -> None:
+        cache = ResponseCache(max_entries=2)
+        cache.store(DOCUMENT, {})
+        cache.store(OTHER_DOCUMENT, {})
+        cache.lookup(DOCUMENT)
+        cache.store(SEARCH, {})
+        assert cache.lookup(OTHER_DOCUMENT) is None
+        assert cache.lookup(DOCUMENT) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_write_through_invalidation(self) -> None:
+        cache = ResponseCache()
+        for url in (DOCUMENT, OTHER_DOCUMENT, SEARCH, CHAIN):
+            cache.store(url, {})
+
+        # Approving a request evicts it and the request searches
+        cache.invalidate_request("restapi/requests/approve/PPD-Run3Summer22GS-00001")
+        assert cache.lookup(DOCUMENT) is None
+        assert cache.lookup(SEARCH) is None
+        assert cache.lookup(OTHER_DOCUMENT) is not None
+        assert cache.lookup(CHAIN) is not None
+
+        # Updating a document evicts it using the prepid in its body
+        cache.invalidate_request(
+            "restapi/requests/update", data={"prepid": "PPD-Run3Summer22GS-00002"}
+        )
+        assert cache.lookup(OTHER_DOCUMENT) is None
+        assert cache.lookup(CHAIN) is not None
+
+        # Read-only operations sent via PUT do not evict anything
+        cache.store(SEARCH, {})
+        cache.invalidate_request("restapi/requests/listwithfile", data={"contents": ""})
+        assert cache.lookup(CHAIN) is not None
+        assert cache.lookup(SEARCH) is not None
+
+    def test_side_effects_evict_searches(self) -> None:
+        cache = ResponseCache()
+        for url in (DOCUMENT, SEARCH, INVALIDATIONS, CHAIN):
+            cache.store(url, {})
+
+        # Resetting a request creates invalidations on the server
+        cache.invalidate_request("restapi/requests/reset/PPD-00001")
+        assert cache.lookup(SEARCH) is None
+        assert cache.lookup(INVALIDATIONS) is None
+        assert cache.lookup(DOCUMENT) is not None
+        assert cache.lookup(CHAIN) is not None
+
+
+class TestPersistentResponseCache:
+    def test_persisted_across_instances(self, tmp_path) -> None:
+        path = tmp_path / "cache.sqlite"
+        cache = PersistentResponseCache(path=path, ttl=0)
+        cache.store(DOCUMENT, {"results": {"prepid": "PPD-00001", "_rev": "3-abc"}})
+        cache.store(SEARCH, {"results": []}, etag='"xyz"', last_modified="Tue")
+        cache.close()
+
+        cache = PersistentResponseCache(path=path)
+        entry = cache.lookup(DOCUMENT)
+        assert entry is not None
+        assert not entry.fresh
+        assert entry.value["results"]["prepid"] == "PPD-00001"
+        assert entry.etag == '"3-abc"'
+
+        # Confirmed by the server
+        cache.refresh(DOCUMENT)
+        assert cache.lookup(DOCUMENT).fresh
+
+        search = cache.lookup(SEARCH)
+        assert (search.etag, search.last_modified) == ('"xyz"', "Tue")
+
+    def test_invalidation_and_eviction(self, tmp_path) -> None:
+        cache = PersistentResponseCache(path=tmp_path / "cache.sqlite", max_entries=3)
+        for url in (DOCUMENT, OTHER_DOCUMENT, SEARCH, CHAIN):
+            cache.store(url, {})
+            time.sleep(0.001)
+
+        assert cache.stats()["entries"] == 3
+        assert cache.lookup(DOCUMENT) is None
+
+        cache.invalidate_request("restapi/requests/delete/PPD-Run3Summer22GS-00002")
+        assert cache.lookup(OTHER_DOCUMENT) is None
+        assert cache.lookup(SEARCH) is None
+        assert cache.lookup(CHAIN) is not None
+
+        cache.store(INVALIDATIONS, {})
+        cache.invalidate_request("restapi/chained_requests/rewind_to_root/PPD-00001")
+        assert cache.lookup(INVALIDATIONS) is None
+        assert cache.lookup(CHAIN) is not None
@@ -0,0 +1,60 @@
+"""
+Provides some tests for the module
+`src/rest/client/codec.py` to verify its
+correctness.
+"""
+
+import pytest
+import requests
+from fixtures.mcm import mcm_stand_in
+
+from rest.applications.mcm.core import McM
+from rest.client.codec import JSONCodec, OrjsonCodec, default_codec, orjson
+from rest.testing.mcm_server import McMServer
+
+CODECS = [JSONCodec()]
+if orjson is not None:
+    CODECS.append(OrjsonCodec())
+
+DOCUMENT = {
+    "prepid": "PPD-Run3Summer22GS-00001",
+    "total_events": 1000,
+    "keep_output": [True, False],
+    "notes": "Ünicode ✓",
+    "history": [{"action": "created", "step": None}],
+}
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_round_trip(codec: JSONCodec) -> None:
+    encoded = codec.encode(DOCUMENT)
+    assert isinstance(encoded, bytes)
+    assert codec.decode(encoded) == DOCUMENT
+    assert codec.decode(encoded.decode("utf-8")) == DOCUMENT
+
+    # The codecs are interchangeable
+    for other in CODECS:
+        assert other.decode(encoded) == DOCUMENT
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_invalid_documents(codec: JSONCodec) -> None:
+    for content in (b"", b"<html>Unauthorized</html>", b'{"results": [', b"\xff\xfe"):
+        with pytest.raises(requests.exceptions.JSONDecodeError):
+            codec.decode(content)
+
+
+def test_default_codec() -> None:
+    expected = "orjson" if orjson is not None else "json"
+    assert default_codec().name == expected
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_client_codec(mcm_stand_in: McMServer, codec: JSONCodec) -> None:
+    with McM(id="none", server=mcm_stand_in.url, codec=codec) as mcm:
+        request = mcm.get("requests", query="prepid=*", page_size=5)[0]
+        request["notes"] = DOCUMENT["notes"]
+        assert mcm.update("requests", request)["results"]
+
+        updated = mcm.get("requests", request["prepid"])
+        assert updated["notes"] == DOCUMENT["notes"]
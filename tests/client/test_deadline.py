@@ -0,0 +1,98 @@
+"""
+Provides some tests for the module
+`src/rest/client/deadline.py` to verify its
+correctness.
+"""
+
+import time
+
+import pytest
+import requests
+from fixtures.mcm import mcm_stand_in
+
+from rest.applications.mcm.core import McM
+from rest.client.deadline import (
+    ContextThreadPoolExecutor,
+    DeadlineExceeded,
+    deadline,
+    remaining,
+    timeout_for,
+    without_read_timeout,
+)
+from rest.client.retry import RetryPolicy
+from rest.testing.mcm_server import McMServer
+
+
+def test_timeouts_are_capped_by_the_deadline() -> None:
+    assert remaining() is None
+    assert timeout_for((10, 300)) == (10, 300)
+
+    with deadline(1) as expires:
+        assert expires is not None
+        connect, read = timeout_for((10, 300))  # type: ignore[misc]
+        assert 0 < connect <= 1 and 0 < read <= 1
+        assert timeout_for(0.5) == 0.5
+        assert timeout_for((10, None))[1] <= 1  # type: ignore[index]
+
+        # Nested deadlines never extend the outer one
+        with deadline(60):
+            assert remaining() <= 1  # type: ignore[operator]
+        with deadline(None):
+            assert remaining() <= 1  # type: ignore[operator]
+
+    assert remaining() is None
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            timeout_for((10, 300))
+
+
+def test_deadline_reaches_worker_threads() -> None:
+    with ContextThreadPoolExecutor(max_workers=2) as executor:
+        with deadline(30):
+            inside = executor.submit(remaining).result()
+        outside = executor.submit(remaining).result()
+
+    assert inside is not None and 0 < inside <= 30
+    assert outside is None
+
+
+def test_read_timeout(mcm_stand_in: McMServer) -> None:
+    mcm_stand_in.latency = 0.3
+    with McM(id="none", server=mcm_stand_in.url, timeout=(1, 0.05)) as mcm:
+        with pytest.raises(requests.ReadTimeout):
+            mcm._get("restapi/users/get_role")
+
+
+def test_no_read_timeout_for_changes(mcm_stand_in: McMServer) -> None:
+    assert without_read_timeout((10, 300)) == (10, None)
+    assert without_read_timeout(5) == (5, None)
+    assert without_read_timeout(None) is None
+
+    prepid = next(iter(mcm_stand_in.dataset.databases["requests"]))
+    mcm_stand_in.latency = 0.3
+    with McM(id="none", server=mcm_stand_in.url, timeout=(1, 0.05)) as mcm:
+        assert mcm.approve("requests", prepid, level=1)["results"]
+
+
+def test_deadline_bounds_paginated_search(mcm_stand_in: McMServer) -> None:
+    mcm_stand_in.latency = 0.05
+    with McM(id="none", server=mcm_stand_in.url, page_prefetch=2) as mcm:
+        start = time.monotonic()
+        with pytest.raises(requests.Timeout):
+            mcm.get("requests", query="prepid=*", page_size=1, deadline=0.2)
+        assert time.monotonic() - start < 1
+
+        # Without a deadline, the search completes
+        assert mcm.get("requests", query="prepid=*", page_size=50)
+
+
+def test_no_retries_after_the_deadline(mcm_stand_in: McMServer) -> None:
+    policy = RetryPolicy()
+    policy.backoff = lambda attempt, response=None: 5.0  # type: ignore[method-assign]
+    with McM(id="none", server=mcm_stand_in.url, retry=policy) as mcm:
+        mcm_stand_in.inject_failures(count=1, status=503)
+        start = time.monotonic()
+        with mcm.deadline(1):
+            response = mcm._request(method="GET", url="restapi/users/get_role")
+        assert response.status_code == 503
+        assert time.monotonic() - start < 1
@@ -0,0 +1,112 @@
+"""
+Provides some tests for the module
+`src/rest/client/metrics.py` to verify its
+correctness.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+
+from rest.applications.base import BaseClient
+from rest.client.metrics import Histogram, MetricsRegistry
+
+DOCUMENT = "https://cms-pdmv-prod.web.cern.ch/mcm/restapi/requests/get/PPD-Run3Summer22GS-00001"
+SEARCH = "https://cms-pdmv-prod.web.cern.ch/mcm/search/?db_name=requests&limit=50&page=3&prepid=PPD-*"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        status = 404 if "missing" in self.path else 200
+        body = json.dumps({"results": self.path}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[str]:
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/mcm/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_endpoint_template() -> None:
+    assert (
+        MetricsRegistry.endpoint_template(DOCUMENT) == "mcm/restapi/requests/get/{id}"
+    )
+    assert (
+        MetricsRegistry.endpoint_template(SEARCH)
+        == "mcm/search/?db_name=requests&limit&page&prepid"
+    )
+    assert (
+        MetricsRegistry.endpoint_template(
+            "restapi/chained_requests/flow/PPD-chain-00001/reserve/Run3Summer22DRPremix"
+        )
+        == "restapi/chained_requests/flow/{id}/reserve/{id}"
+    )
+
+
+def test_histogram_quantile() -> None:
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(1.0, 1), (2.0, 3), (4.0, 4), (float("inf"), 4)]
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(1.0) == pytest.approx(4.0)
+
+
+def test_registry_and_prometheus_format() -> None:
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.record_request("GET", DOCUMENT, latency=0.05, bytes_received=100)
+    registry.record_request("get", DOCUMENT, latency=0.5, bytes_received=50, error=True)
+    registry.record_auth_retry("GET", DOCUMENT)
+
+    template = "mcm/restapi/requests/get/{id}"
+    assert registry.endpoints() == [("GET", template)]
+    metrics = registry.get("GET", template)
+    assert metrics is not None
+    assert metrics.calls == 2
+    assert metrics.errors == 1
+    assert metrics.auth_retries == 1
+    assert metrics.bytes_received == 150
+    assert registry.snapshot()[f"GET {template}"]["calls"] == 2
+
+    text = registry.to_prometheus()
+    labels = f'method="GET",endpoint="{template}"'
+    assert f"pdmv_http_requests_total{{{labels}}} 2" in text
+    assert f"pdmv_http_auth_retries_total{{{labels}}} 1" in text
+    assert f'pdmv_http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'pdmv_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"pdmv_http_request_duration_seconds_count{{{labels}}} 2" in text
+
+    registry.reset()
+    assert registry.endpoints() == []
+
+
+def test_client_records_requests(server: str) -> None:
+    registry = MetricsRegistry()
+    with BaseClient(app="mcm", id="none", metrics=registry) as client:
+        client.server = server
+        client._get("restapi/requests/get/PPD-Run3Summer22GS-00001")
+        client._get("restapi/requests/get/PPD-Run3Summer22GS-00002")
+        client._get("restapi/requests/get/missing-00001")
+
+    metrics = registry.get("GET", "mcm/restapi/requests/get/{id}")
+    assert metrics is not None
+    assert metrics.calls == 3
+    assert metrics.errors == 1
+    assert metrics.bytes_received > 0
+    assert metrics.latency.count == 3
@@ -0,0 +1,159 @@
+"""
+Provides some tests for the module
+`src/rest/client/retry.py` to verify its
+correctness.
+"""
+
+import socket
+import time
+
+import pytest
+import requests
+from fixtures.mcm import mcm_stand_in
+
+from rest.applications.mcm.core import McM
+from rest.client.deadline import DeadlineExceeded
+from rest.client.retry import CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy
+from rest.testing.mcm_server import McMServer
+
+
+def _fast_policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(backoff_factor=0.001, **kwargs)
+
+
+def _closed_port() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/mcm/"
+
+
+def test_backoff_with_jitter() -> None:
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+    for attempt in range(1, 6):
+        assert 0 <= policy.backoff(attempt) <= min(2 ** (attempt - 1), 5)
+
+    response = requests.Response()
+    response.headers["Retry-After"] = "3"
+    assert policy.backoff(1, response=response) == 3
+
+
+def test_retry_budget() -> None:
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.record_request()
+    budget.record_request()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+
+def test_circuit_breaker() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # A probe is let through after the timeout, only one.
+    time.sleep(0.06)
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    breaker.check()
+    assert not breaker.is_open
+
+
+def test_probe_without_outcome() -> None:
+    """
+    Check a probe that ends without an outcome lets the next one through.
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    policy = RetryPolicy(circuit_breaker=breaker)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    def expired() -> requests.Response:
+        raise DeadlineExceeded("No time left")
+
+    with pytest.raises(DeadlineExceeded):
+        policy.execute("GET", "restapi/requests/get/prepid", expired)
+    assert breaker.is_open
+
+    response = requests.Response()
+    response.status_code = 200
+    assert policy.execute("GET", "restapi/requests/get/prepid", lambda: response)
+    assert not breaker.is_open
+
+
+def test_retries_transient_responses(mcm_stand_in: McMServer) -> None:
+    with McM(id="none", server=mcm_stand_in.url, retry=_fast_policy()) as mcm:
+        mcm_stand_in.inject_failures(count=2, status=503)
+        assert mcm._get("restapi/users/get_role")["role"] == "production_manager"
+        assert mcm_stand_in.calls[("GET", "role")] == 3
+
+        # Attempts are exhausted: the last response is returned
+        mcm_stand_in.inject_failures(count=4, status=502)
+        assert mcm._get("restapi/users/get_role")["message"] == "Injected error"
+
+
+def test_non_idempotent_methods_are_not_retried(mcm_stand_in: McMServer) -> None:
+    with McM(id="none", server=mcm_stand_in.url, retry=_fast_policy()) as mcm:
+        mcm_stand_in.inject_failures(count=1, status=503)
+        response = mcm._request(method="POST", url="restapi/users/get_role")
+        assert response.status_code == 503
+
+
+def test_circuit_opens_while_server_is_down() -> None:
+    policy = _fast_policy(
+        max_attempts=2, circuit_breaker=CircuitBreaker(failure_threshold=2)
+    )
+    with McM(id="none", server=_closed_port(), retry=policy) as mcm:
+        with pytest.raises(requests.ConnectionError) as error:
+            mcm._get("restapi/users/get_role")
+        assert not isinstance(error.value, CircuitOpenError)
+
+        with pytest.raises(CircuitOpenError):
+            mcm._get("restapi/users/get_role")
+
+
+def test_mutations_are_not_retried(mcm_stand_in: McMServer) -> None:
+    prepid = mcm_stand_in.dataset.search("requests", {})[0]["prepid"]
+    with McM(id="none", server=mcm_stand_in.url, retry=_fast_policy()) as mcm:
+        # The server could have reset the request before the proxy failed
+        mcm_stand_in.inject_failures(count=1, status=503)
+        response = mcm._request(method="GET", url=f"restapi/requests/reset/{prepid}")
+        assert response.status_code == 503
+        assert mcm_stand_in.calls[("GET", "reset")] == 1
+
+        # Unless the caller states it is safe
+        mcm_stand_in.inject_failures(count=1, status=503)
+        response = mcm._request(
+            method="GET", url=f"restapi/requests/reset/{prepid}", idempotent=True
+        )
+        assert response.ok
+        assert mcm_stand_in.calls[("GET", "reset")] == 3
+
+        # Reads are retried, also the ones sent via PUT
+        mcm_stand_in.inject_failures(count=1, status=503)
+        assert mcm.get_range_of_requests(prepid)[0]["prepid"] == prepid
+        assert mcm_stand_in.calls[("PUT", "list_with_file")] == 2
+
+
+def test_unsent_requests_are_retried() -> None:
+    url = f"{_closed_port()}restapi/requests/clone"
+    attempts = []
+
+    def send() -> requests.Response:
+        attempts.append(url)
+        return requests.put(url, json={}, timeout=1)
+
+    policy = _fast_policy(max_attempts=3)
+    assert policy.is_read_only("GET", "restapi/requests/get/PPD-Run3Summer22GS-00001")
+    assert policy.is_read_only("GET", "search/?db_name=requests&page=0")
+    assert not policy.is_read_only("PUT", url)
+    with pytest.raises(requests.ConnectionError):
+        policy.execute(method="PUT", url=url, send=send)
+    assert len(attempts) == 3
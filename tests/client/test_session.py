@@ -5,6 +5,7 @@ correctness.
 """
 
 import pytest
+import requests
 from fixtures.files import writable_file
 from fixtures.oauth import (
     access_token_credentials,
@@ -146,3 +147,24 @@ class TestSessionFactory:
                 client_secret=client_secret,
                 target_application=target_application,
             )
+
+
+class TestConnectionPool:
+    """
+    Check the persistent connection pool mounted into the sessions.
+    """
+
+    def test_configure_connection_pool(self):
+        session = SessionFactory.configure_connection_pool(
+            session=requests.Session(), pool_connections=2, pool_maxsize=32
+        )
+        adapter = session.get_adapter("https://cms-pdmv-dev.web.cern.ch/mcm/")
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 32
+        assert session.headers["Connection"] == "keep-alive"
+
+    def test_disable_keep_alive(self):
+        session = SessionFactory.configure_connection_pool(
+            session=requests.Session(), keep_alive=False
+        )
+        assert session.headers["Connection"] == "close"
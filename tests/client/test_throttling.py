@@ -0,0 +1,116 @@
+"""
+Provides some tests for the module
+`src/rest/client/throttling.py` to verify its
+correctness.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fixtures.mcm import mcm_stand_in
+
+from rest.applications.mcm.core import McM
+from rest.client.throttling import AdaptiveConcurrency, RateLimiter, TokenBucket
+from rest.testing.mcm_server import McMServer
+
+
+def test_token_bucket_rate() -> None:
+    """
+    Check the burst is sent right away and the rest are paced.
+    """
+    bucket = TokenBucket(rate=100, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        assert bucket.acquire() == 0.0
+    assert time.monotonic() - start < 0.05
+
+    for _ in range(10):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_adaptive_concurrency_aimd() -> None:
+    limiter = AdaptiveConcurrency(initial_limit=4, max_limit=8, target_latency=1.0)
+    for _ in range(40):
+        limiter.acquire()
+        limiter.release(latency=0.01, status_code=200)
+    assert limiter.limit == 8
+
+    limiter.acquire()
+    limiter.release(latency=0.0, status_code=503)
+    assert limiter.limit == 4
+
+    # Overload signals within the same round trip only count once
+    limiter.acquire()
+    limiter.release(latency=10.0, status_code=429)
+    assert limiter.limit == 4
+
+    limiter.acquire()
+    limiter.release(latency=0.01, status_code=404)
+    assert limiter.limit > 4
+
+
+def test_adaptive_concurrency_bounds_in_flight() -> None:
+    limiter = AdaptiveConcurrency(initial_limit=2, max_limit=2)
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def call() -> None:
+        nonlocal in_flight, peak
+        limiter.acquire()
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        limiter.release(latency=0.01, status_code=200)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: call(), range(20)))
+    assert peak == 2
+
+
+def test_shared_by_server(mcm_stand_in: McMServer) -> None:
+    """
+    Check the clients targeting the same server share the limiter.
+    """
+    with McM(id="none", server=mcm_stand_in.url, rate_limit=50, rate_burst=1) as first:
+        with McM(id="none", server=mcm_stand_in.url, rate_limit=1000) as second:
+            assert first.rate_limiter is second.rate_limiter
+            assert first.rate_limiter is RateLimiter.for_server(mcm_stand_in.url)
+
+            start = time.monotonic()
+            for client in (first, second) * 3:
+                client._get("restapi/users/get_role")
+            assert time.monotonic() - start >= 0.09
+            assert first.rate_limiter.stats()["throttled_seconds"] > 0
+
+    with McM(id="none", server=mcm_stand_in.url) as unlimited:
+        assert unlimited.rate_limiter is None
+
+
+def test_limits_are_merged(
+    mcm_stand_in: McMServer, caplog: pytest.LogCaptureFixture
+) -> None:
+    """
+    Check a later client adds the limits the shared limiter lacks and
+    a warning is logged for the ones it ignores.
+    """
+    with McM(id="none", server=mcm_stand_in.url, adaptive_concurrency=True) as first:
+        assert first.rate_limiter and first.rate_limiter.bucket is None
+        with McM(id="none", server=mcm_stand_in.url, rate_limit=20) as second:
+            assert second.rate_limiter is first.rate_limiter
+            assert first.rate_limiter.bucket and first.rate_limiter.bucket.rate == 20
+            assert first.rate_limiter.concurrency
+
+        assert "ignoring" not in caplog.text
+        with McM(id="none", server=mcm_stand_in.url, rate_limit=5):
+            assert first.rate_limiter.bucket.rate == 20
+        assert "ignoring 5 requests per second" in caplog.text
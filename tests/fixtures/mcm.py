@@ -2,12 +2,15 @@
 Some fixtures to test the McM REST client.
 """
 
+from typing import Iterator
+
 import pytest
 from fixtures.oauth import stdin_enabled
 
 from rest.applications.mcm.core import McM
 from rest.applications.mcm.invalidate_request import InvalidateDeleteRequests
 from rest.applications.mcm.resubmission import ChainRequestResubmitter
+from rest.testing.mcm_server import McMDataset, McMServer
 from rest.utils.miscellaneous import shuffle_pick
 
 
@@ -79,3 +82,21 @@ def production_manager_or_higher(mcm_development: McM) -> None:
         pytest.skip(
             f"User ({username}) with role ({current_role}) does not have the right permissions to execute this. Expected: {accepted_roles}"
         )
+
+
+@pytest.fixture
+def mcm_stand_in() -> Iterator[McMServer]:
+    """
+    Serves a synthetic McM dataset locally.
+    """
+    with McMServer(dataset=McMDataset.generate(seed=7, root_requests=12)) as server:
+        yield server
+
+
+@pytest.fixture
+def mcm_offline(mcm_stand_in: McMServer) -> Iterator[McM]:
+    """
+    McM client targeting the local stand-in.
+    """
+    with McM(id="none", server=mcm_stand_in.url) as mcm:
+        yield mcm
@@ -0,0 +1,37 @@
+"""
+Provides some tests for the package
+`benchmarks` to verify its correctness.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks import workloads  # noqa: F401 - Registers the benchmarks
+from benchmarks.suite import Config, compare, load, run_suite, save
+
+
+def test_run_and_compare(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check the workflows run against the stand-in and their
+    results could be compared.
+    """
+    monkeypatch.chdir(tmp_path)
+    config = Config(repeat=1, roots=2, chains=2, requests=40, calls=5)
+    results = run_suite(
+        config=config,
+        selected=["session_request_authenticated", "invalidate_delete_cascade"],
+    )
+    assert results["benchmarks"]["invalidate_delete_cascade"]["operations"] == 2
+    assert results["benchmarks"]["session_request_authenticated"]["operations"] == 5
+
+    path = tmp_path / "results.json"
+    save(results, path)
+    baseline = load(path)
+    baseline["benchmarks"]["invalidate_delete_cascade"]["median"] /= 2
+    comparison = {entry["name"]: entry for entry in compare(baseline, results)}
+    assert comparison["invalidate_delete_cascade"]["regression"]
+    assert not comparison["session_request_authenticated"]["regression"]
+
+    with pytest.raises(ValueError):
+        run_suite(config=config, selected=["unknown"])
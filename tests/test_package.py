@@ -0,0 +1,45 @@
+"""
+Provides some tests for the module
+`src/rest/__init__.py` to verify its
+correctness.
+"""
+
+import pytest
+
+import rest
+from benchmarks.imports import import_times
+
+
+def test_import_does_not_load_clients() -> None:
+    """
+    Check that importing the package does not load the
+    application clients nor their dependencies.
+    """
+    times = import_times(statement="import rest")
+    assert "rest" in times
+    assert "requests" not in times
+    assert "rest.applications.base" not in times
+
+
+def test_import_client_loads_only_its_module() -> None:
+    """
+    Check that importing a client does not load the asyncio ones.
+    """
+    times = import_times(statement="from rest import McM")
+    assert "rest.applications.mcm.core" in times
+    assert "rest.applications.aio" not in times
+    assert "rest.applications.stats.core" not in times
+
+
+def test_public_names() -> None:
+    """
+    Check that the public names are still available.
+    """
+    from rest.applications.aio import AsyncMcM
+    from rest.applications.mcm.core import McM
+
+    assert rest.McM is McM
+    assert rest.AsyncMcM is AsyncMcM
+    assert set(rest.__all__) <= set(dir(rest))
+    with pytest.raises(AttributeError):
+        rest.Unknown  # type: ignore[attr-defined]
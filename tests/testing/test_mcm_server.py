@@ -0,0 +1,141 @@
+"""
+Provides some tests for the module
+`src/rest/testing/mcm_server.py` to verify its
+correctness.
+"""
+
+from pathlib import Path
+
+import pytest
+import requests
+from fixtures.mcm import mcm_offline, mcm_stand_in
+
+from rest.applications.mcm.core import McM
+from rest.applications.mcm.invalidate_request import InvalidateDeleteRequests
+from rest.testing.mcm_server import McMDataset, McMServer
+
+
+def _chain_with_requests(dataset: McMDataset, length: int) -> dict:
+    for chain in dataset.databases["chained_requests"].values():
+        if len(chain["chain"]) >= length:
+            return chain
+    raise AssertionError(f"No chain with {length} requests in the dataset")
+
+
+def test_dataset_is_seeded() -> None:
+    first = McMDataset.generate(seed=3, root_requests=5)
+    second = McMDataset.generate(seed=3, root_requests=5)
+    other = McMDataset.generate(seed=4, root_requests=5)
+    assert first.databases == second.databases
+    assert first.databases != other.databases
+    assert len(first.databases["chained_requests"]) == 5
+
+
+def test_get_and_search(mcm_stand_in: McMServer, mcm_offline: McM) -> None:
+    dataset = mcm_stand_in.dataset
+    chain = _chain_with_requests(dataset, length=2)
+    root = chain["chain"][0]
+
+    assert mcm_offline.get("requests", root)["prepid"] == root
+    assert mcm_offline.get("requests", "PPD-DoesNotExist-00001") is None
+    assert mcm_offline.is_root_request(root)
+    assert not mcm_offline.is_root_request(chain["chain"][1])
+
+    chains = mcm_offline.get("chained_requests", query=f"contains={root}")
+    assert [ch["prepid"] for ch in chains] == [chain["prepid"]]
+
+    everything = mcm_offline.get("requests", query="prepid=*", page_size=5)
+    assert len(everything) == len(dataset.databases["requests"])
+    assert len(mcm_offline.get("requests", query="prepid=*", page=1, page_size=5)) == 5
+
+
+def test_root_requests_from_ticket(mcm_stand_in: McMServer, mcm_offline: McM) -> None:
+    ticket = next(iter(mcm_stand_in.dataset.databases["mccms"].values()))
+    roots = mcm_offline.root_requests_from_ticket(ticket["prepid"])
+    expected = mcm_stand_in.dataset.search(
+        "requests", {"pwg": ticket["pwg"], "member_of_campaign": "*LHEGS"}
+    )
+    assert [r["prepid"] for r in roots] == [r["prepid"] for r in expected]
+
+
+def test_approve_and_update_conflict(mcm_stand_in: McMServer, mcm_offline: McM) -> None:
+    chain = _chain_with_requests(mcm_stand_in.dataset, length=1)
+    root = chain["chain"][0]
+
+    assert mcm_offline.soft_reset(root)
+    assert mcm_offline.approve("requests", root)["results"]
+    request = mcm_offline.get("requests", root)
+    assert (request["approval"], request["status"]) == ("submit", "submitted")
+    result = mcm_offline.approve("requests", root)
+    assert result["message"] == "Illegal Approval Step: 5"
+
+    request["tags"] = ["first"]
+    stale = dict(request, tags=["second"])
+    assert mcm_offline.update("requests", request)["results"]
+    conflict = mcm_offline.update("requests", stale)
+    assert not conflict["results"]
+    assert conflict["message"] == "Document update conflict."
+
+
+def test_invalidate_delete_cascade(
+    mcm_stand_in: McMServer,
+    mcm_offline: McM,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Run the full cascade against the stand-in.
+    """
+    monkeypatch.chdir(tmp_path)
+    dataset = mcm_stand_in.dataset
+    chain = _chain_with_requests(dataset, length=3)
+    root, *others = chain["chain"]
+
+    invalidator = InvalidateDeleteRequests(mcm=mcm_offline)
+    result = invalidator.invalidate_delete_cascade_requests(
+        requests_prepid=[root, others[0]]
+    )
+    assert result == {"success": [root], "failed": [], "filtered": [others[0]]}
+
+    updated_chain = dataset.get("chained_requests", chain["prepid"])
+    assert updated_chain["chain"] == [root]
+    assert updated_chain["action_parameters"]["flag"] is True
+    assert all(dataset.get("requests", prepid) is None for prepid in others)
+    invalidations = dataset.databases["invalidations"].values()
+    assert {i["prepid"] for i in invalidations} == set(others)
+    assert all(i["status"] == "announced" for i in invalidations)
+
+
+def test_reserve_and_flow(mcm_stand_in: McMServer, mcm_offline: McM) -> None:
+    chain = _chain_with_requests(mcm_stand_in.dataset, length=1)
+    if len(chain["chain"]) == 4:
+        pytest.skip("The chain is already complete")
+
+    url = f"restapi/chained_requests/flow/{chain['prepid']}/reserve/Run3Summer22NanoAODv12"
+    assert mcm_offline._get(url)["results"]
+    reserved = mcm_stand_in.dataset.get("chained_requests", chain["prepid"])
+    assert len(reserved["chain"]) == 4
+    assert mcm_offline.flow(chain["prepid"])
+
+
+def test_etag_revalidation(mcm_stand_in: McMServer) -> None:
+    chain = _chain_with_requests(mcm_stand_in.dataset, length=1)
+    url = f"{mcm_stand_in.url}restapi/chained_requests/get/{chain['prepid']}"
+    response = requests.get(url, timeout=5)
+    assert response.ok
+    etag = response.headers["ETag"]
+    cached = requests.get(url, headers={"If-None-Match": etag}, timeout=5)
+    assert cached.status_code == 304
+
+
+def test_error_and_latency_injection() -> None:
+    dataset = McMDataset.generate(seed=1, root_requests=1)
+    with McMServer(dataset=dataset, error_rate=1.0) as server:
+        response = requests.get(f"{server.url}restapi/users/get_role", timeout=5)
+        assert response.status_code == 500
+
+    with McMServer(dataset=dataset, latency=0.2) as server:
+        response = requests.get(f"{server.url}restapi/users/get_role", timeout=5)
+        assert response.json()["role"] == "production_manager"
+        assert response.elapsed.total_seconds() >= 0.2
+        assert server.calls[("GET", "role")] == 1